@@ -1,19 +1,124 @@
+import hashlib
+import io
 import pandas as pd
 import numpy as np
+from pandas.io.parsers import TextParser
 from sklearn.linear_model import LinearRegression
 import warnings
 warnings.filterwarnings('ignore')
 
+# Hızlı Excel okuyucu (rust/calamine) - pandas 2.2+ ve python-calamine gerekir
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_VAR = tuple(int(x) for x in pd.__version__.split('.')[:2]) >= (2, 2)
+except ImportError:
+    CALAMINE_VAR = False
+
+# Tahmin çıktısı kolonları
+TAHMIN_KOLONLARI = ['Year', 'Month', 'MainGroup', 'Quantity', 'UnitPrice',
+                    'Sales', 'GrossProfit', 'GrossMargin%', 'Stock', 'COGS',
+                    'Stock_COGS_Ratio']
+
+# forecast_future_months parametreleri ve varsayılanları (forecast_versions bunlarla tamamlar)
+TAHMIN_PARAMETRELERI = {
+    'growth_param': 0.1, 'margin_improvement': 0.0, 'stock_change_pct': 0.0,
+    'monthly_growth_targets': None, 'maingroup_growth_targets': None, 'lessons_learned': None,
+    'inflation_adjustment': 1.0, 'organic_multiplier': 0.5, 'price_change_matrix': None,
+    'inflation_rate': 0.25, 'organic_growth_rate': 0.15
+}
+
+# 2025 Kasım-Aralık özel tahmininin ek kolonları
+OZEL_AY_KOLONLARI = ['PriceChange', 'PriceMultiplier', 'SalesMultiplier']
+
+# process_data'nın okuduğu kolonlar - 2025 kolonları aynı başlığın '.1' ekli tekrarı
+BUTCE_KOLONLARI = ['Month', 'MainGroupDesc', 'TY Sales Unit', 'TY Sales Value TRY2',
+                   'TY Gross Profit TRY2', 'TY Gross Marjin TRY%', 'TY Avg Store Stock Cost TRY2']
+
+# openpyxl'in metin olarak döndürdüğü Excel hata değerleri (pandas bunları NaN okur)
+EXCEL_HATALARI = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A', '#GETTING_DATA'}
+
+# İşlenmiş veri önbelleği (dataset_store) - process_data değişirse sürüm artırılır
+BUTCE_VERI_ANAHTARI = 'butce_forecast'
+ISLEME_SURUMU = 1
+
+def _butce_kolonu_mu(ad):
+    ad = str(ad)
+    return (ad[:-2] if ad.endswith('.1') else ad) in BUTCE_KOLONLARI
+
+
+def _hucre(deger):
+    """openpyxl hücre değerini pandas'ın Excel okuyucusu gibi dönüştür"""
+    if deger is None:
+        return ''
+    if isinstance(deger, float):
+        tam = int(deger)
+        return tam if tam == deger else deger
+    if isinstance(deger, str) and deger in EXCEL_HATALARI:
+        return np.nan
+    return deger
+
+
+def read_budget_sheet(excel_path, sheet_name='Sayfa1'):
+    """
+    Bütçe sayfasını sadece BUTCE_KOLONLARI ile oku (başlık 2. satır)
+
+    - python-calamine varsa: pandas calamine motoru (rust) + usecols
+    - yoksa: openpyxl read-only akışı; sadece gerekli hücreler dönüştürülür,
+      sonuç pandas'ın ayrıştırıcısından (TextParser) geçer - read_excel ile aynı tipler
+    """
+    if CALAMINE_VAR:
+        return pd.read_excel(excel_path, sheet_name=sheet_name, header=1,
+                             engine='calamine', usecols=_butce_kolonu_mu)
+    
+    import openpyxl
+    
+    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        satirlar = wb[sheet_name].iter_rows(values_only=True)
+        next(satirlar, None)  # Başlık öncesi satır
+        baslik = next(satirlar, ())
+        
+        # Tekrarlanan başlıklar pandas gibi '.1', '.2' ekiyle ayrılır
+        adlar, sayac = [], {}
+        for deger in baslik:
+            ad = '' if deger is None else str(deger)
+            adlar.append(f"{ad}.{sayac[ad]}" if ad in sayac else ad)
+            sayac[ad] = sayac.get(ad, 0) + 1
+        secili = [i for i, ad in enumerate(adlar) if _butce_kolonu_mu(ad)]
+        
+        veri = [[_hucre(baslik[i]) for i in secili]]
+        son_dolu = 0
+        for satir in satirlar:
+            genislik = len(satir)
+            projeksiyon = [_hucre(satir[i]) if i < genislik else '' for i in secili]
+            veri.append(projeksiyon)
+            if any(deger != '' for deger in projeksiyon) or \
+                    any(deger is not None and deger != '' for deger in satir):
+                son_dolu = len(veri)
+    finally:
+        wb.close()
+    
+    # Sondaki tamamen boş satırlar atılır, diğerleri kalır (read_excel ile aynı)
+    return TextParser(veri[:max(son_dolu, 1)], header=0, skip_blank_lines=False).read()
+
+
 class BudgetForecaster:
     def __init__(self, excel_path):
-        """Excel'den veriyi yükle ve temizle"""
-        # Raw olarak oku, header belirtme
-        df_raw = pd.read_excel(excel_path, sheet_name='Sayfa1', header=None)
-        
-        # Header 1. satır (index 1)
-        self.df = pd.read_excel(excel_path, sheet_name='Sayfa1', header=1)
+        """Excel'den veriyi yükle ve temizle (excel_path: yol veya dosya nesnesi)"""
+        # Header 1. satır (index 1) - sadece kullanılan kolonlar okunur
+        self.df = read_budget_sheet(excel_path)
         
         self.process_data()
+    
+    @classmethod
+    def from_data(cls, data, last_actual_year, last_actual_month):
+        """İşlenmiş veriden oluştur (önbellek) - Excel okunmaz"""
+        forecaster = cls.__new__(cls)
+        forecaster.df = None
+        forecaster.data = data
+        forecaster.last_actual_year = int(last_actual_year)
+        forecaster.last_actual_month = int(last_actual_month)
+        return forecaster
         
     def process_data(self):
         """Veriyi yıl bazında ayrıştır ve temizle"""
@@ -77,6 +182,8 @@ class BudgetForecaster:
         # forecast_future_months bu işi yapacak
         # Sadece 2024'teki eksik ayları doldur
         self._fill_missing_months()
+        
+        self.data = self.data.reset_index(drop=True)
     
     def _find_last_actual_period(self):
         """Son gerçekleşen veriyi bul (Sales > 0 olan son ay)"""
@@ -97,65 +204,88 @@ class BudgetForecaster:
             self.last_actual_month = 10
             print(f"⚠️ Gerçekleşen veri bulunamadı, varsayılan: 2025/10")
     
-    def _fill_missing_months(self):
-        """SADECE 2024'teki eksik ayları tahmin et - 2025 için YAPMA"""
+    def _fill_missing_months(self, yillar=(2024,)):
+        """
+        SADECE 2024'teki eksik ayları tahmin et - 2025 için YAPMA
         
-        # SADECE 2024'ü kontrol et
-        for month in range(1, 13):
-            # Bu ay verisi var mı?
-            month_data = self.data[(self.data['Year'] == 2024) & (self.data['Month'] == month)]
+        Eksik/yetersiz ay = önceki ay × 0.98. Ardışık eksik aylar aynı kaynak aydan
+        kümülatif çarpımla (grup × ay matrisi) tek geçişte hesaplanır, veri bir kez birleştirilir.
+        """
+        donem_konumlari = self.data.groupby(['Year', 'Month']).indices
+        bos_konum = np.array([], dtype=np.intp)
+        satis = self.data['Sales'].to_numpy()
+        
+        def donem(yil, ay):
+            return donem_konumlari.get((yil, ay), bos_konum)
+        
+        # Hangi ay hangi kaynak aydan kaç adımda tahmin edilecek (önceki ay da tahminse zincir uzar)
+        zincir = {}
+        for yil in sorted(yillar):
+            for ay in range(1, 13):
+                # Bu ay verisi var mı? Eksik veya yetersiz veri - tahmin et
+                konum = donem(yil, ay)
+                if len(konum) > 0 and satis[konum].sum() >= 100000:
+                    continue
+                
+                onceki = (yil, ay - 1) if ay > 1 else (yil - 1, 12)
+                if onceki in zincir:
+                    kaynak, adim = zincir[onceki]
+                    zincir[(yil, ay)] = (kaynak, adim + 1)
+                elif len(donem(*onceki)) > 0:
+                    zincir[(yil, ay)] = (onceki, 1)
+                # Önceki ay da yoksa tahmin yapma
+        
+        if not zincir:
+            return
+        
+        hedefler_by_kaynak = {}
+        for hedef, (kaynak, adim) in zincir.items():
+            hedefler_by_kaynak.setdefault(kaynak, []).append((hedef, adim))
+        
+        tahminler = []
+        for kaynak, hedefler in hedefler_by_kaynak.items():
+            estimate = self.data.iloc[donem(*kaynak)]
+            n = len(estimate)
+            adimlar = np.array([adim for _, adim in hedefler])
             
-            if len(month_data) == 0 or month_data['Sales'].sum() < 100000:
-                # Eksik veya yetersiz veri - tahmin et
-                self._estimate_month(2024, month)
-    
-    def _estimate_month(self, year, month):
-        """Belirli bir ayı tahmin et - SADECE 2024 İÇİN"""
-        
-        # Önceki ayı al
-        prev_month = month - 1
-        prev_year = year
-        
-        if prev_month == 0:
-            prev_month = 12
-            prev_year = year - 1
-        
-        prev_data = self.data[(self.data['Year'] == prev_year) & (self.data['Month'] == prev_month)].copy()
-        
-        if len(prev_data) == 0:
-            return  # Önceki ay da yoksa tahmin yapma
-        
-        estimate = prev_data.copy()
-        estimate['Month'] = month
-        estimate['Year'] = year
-        
-        # Konservatif: × 0.98
-        estimate['Quantity'] = estimate['Quantity'] * 0.98 if 'Quantity' in estimate.columns else 0
-        estimate['Sales'] = estimate['Sales'] * 0.98
-        estimate['GrossProfit'] = estimate['GrossProfit'] * 0.98
-        estimate['COGS'] = estimate['COGS'] * 0.98
-        estimate['Stock'] = estimate['Stock'] * 1.0
-        
-        # Birim fiyat hesapla
-        estimate['UnitPrice'] = np.where(
-            estimate['Quantity'] > 0,
-            estimate['Sales'] / estimate['Quantity'],
-            0
-        ) if 'Quantity' in estimate.columns else 0
+            # Konservatif: × 0.98 her adımda - satır × (kaynak, adım 1..K) kümülatif çarpım
+            def zincirle(kolon, carpan):
+                matris = np.full((n, adimlar.max() + 1), carpan)
+                matris[:, 0] = estimate[kolon].to_numpy(dtype=float)
+                return np.cumprod(matris, axis=1)[:, adimlar].T.ravel()
+            
+            quantity = zincirle('Quantity', 0.98)
+            sales = zincirle('Sales', 0.98)
+            cogs = zincirle('COGS', 0.98)
+            gross_profit = zincirle('GrossProfit', 0.98)
+            stock = zincirle('Stock', 1.0)
+            
+            # Kaynak satırlar her hedef ay için tekrarlanır (ay blokları sırayla)
+            estimate = estimate.iloc[np.tile(np.arange(n), len(hedefler))]
+            estimate['Month'] = np.repeat([ay for (_, ay), _ in hedefler], n)
+            estimate['Year'] = np.repeat([yil for (yil, _), _ in hedefler], n)
+            estimate['Quantity'] = quantity
+            estimate['Sales'] = sales
+            estimate['GrossProfit'] = gross_profit
+            estimate['COGS'] = cogs
+            estimate['Stock'] = stock
+            
+            # Birim fiyat ve stok oranını yeniden hesapla
+            estimate['UnitPrice'] = np.where(quantity > 0, sales / quantity, 0)
+            estimate['Stock_COGS_Ratio'] = np.where(cogs > 0, stock / cogs, 0)
+            
+            tahminler.append(estimate)
         
-        # Stok oranını yeniden hesapla
-        estimate['Stock_COGS_Ratio'] = np.where(
-            estimate['COGS'] > 0,
-            estimate['Stock'] / estimate['COGS'],
-            0
-        )
+        # Mevcut tahminleri çıkar, yenileri tek seferde ekle
+        kalan = np.ones(len(self.data), dtype=bool)
+        for yil, ay in zincir:
+            kalan[donem(yil, ay)] = False
         
-        # Mevcut tahmini çıkar ve yenisini ekle
-        self.data = self.data[~((self.data['Year'] == year) & (self.data['Month'] == month))]
-        self.data = pd.concat([self.data, estimate], ignore_index=True)
+        self.data = pd.concat([self.data[kalan]] + tahminler, ignore_index=True)
         self.data = self.data.sort_values(['Year', 'Month', 'MainGroup']).reset_index(drop=True)
         
-        print(f"📅 {year}/{month} ayı tahmini eklendi (Önceki ay × 0.98)")
+        for yil, ay in sorted(zincir):
+            print(f"📅 {yil}/{ay} ayı tahmini eklendi (Önceki ay × 0.98)")
     
     def calculate_seasonality(self):
         """Her ay için mevsimsellik indeksi hesapla"""
@@ -180,37 +310,158 @@ class BudgetForecaster:
         
         return seasonality[['MainGroup', 'Month', 'SeasonalityIndex']]
     
-    def forecast_future_months(self, num_months=15, growth_param=0.1, margin_improvement=0.0, 
-                          stock_change_pct=0.0, monthly_growth_targets=None, 
-                          maingroup_growth_targets=None, lessons_learned=None,
-                          inflation_adjustment=1.0, organic_multiplier=0.5,
-                          price_change_matrix=None, inflation_rate=0.25, organic_growth_rate=0.15):  # ← EKLE!
+    def _forecast_tables(self):
         """
-        Son gerçekleşen aydan itibaren belirtilen sayıda ay tahmin et
-        
-        Parameters:
-        -----------
-        num_months: Kaç ay ileriye tahmin yapılacak (varsayılan 15)
-        growth_param: Genel büyüme hedefi
-        margin_improvement: Brüt marj iyileşme hedefi
-        stock_change_pct: Stok tutar değişim yüzdesi
-        monthly_growth_targets: Dict {month: growth_rate} - Her ay için özel hedef
-        maingroup_growth_targets: Dict {maingroup: growth_rate} - Her ana grup için özel hedef
-        lessons_learned: Dict {(maingroup, month): score} - Alınan dersler (-10 ile +10 arası)
-        inflation_adjustment: Enflasyon düzeltme faktörü (örn: 25/35 = 0.71)
-        organic_multiplier: Organik büyüme çarpanı (0.0=Çekimser, 0.5=Normal, 1.0=İyimser)
-        price_change_matrix: Dict {(maingroup, month): price_change_pct} - Fiyat değişim matrisi
-        inflation_rate: Enflasyon oranı (default fiyat artışı için, örn: 0.25 = %25)
+        forecast_future_months'un veriye bağlı tabloları - self.data değişene kadar önbellekte
+        (her parametre değişikliğinde yeniden hesaplanmaz)
         """
+        onbellek = getattr(self, '_tahmin_tablolari', None)
+        if onbellek is not None and onbellek['data'] is self.data:
+            return onbellek
         
-        # Mevsimsellik hesapla
+        gruplar = pd.Index(self.data['MainGroup'].unique())
         seasonality = self.calculate_seasonality()
         
+        self._tahmin_tablolari = {
+            'data': self.data,
+            'gruplar': gruplar,
+            # Ana grup × ay mevsimsellik indeksi
+            'mevsimsellik': seasonality.pivot(index='MainGroup', columns='Month', values='SeasonalityIndex').reindex(gruplar),
+            # Yıl-ay → self.data satır konumları (orijinal sırada)
+            'donem_konumlari': self.data.groupby(['Year', 'Month']).indices,
+            'kolonlar': {
+                kolon: self.data[kolon].to_numpy(dtype=object if kolon == 'MainGroup' else float)
+                for kolon in ['MainGroup', 'Quantity', 'UnitPrice', 'Sales', 'GrossProfit',
+                              'GrossMargin%', 'Stock', 'COGS']
+            }
+        }
+        return self._tahmin_tablolari
+    
+    def _stock_health_factors(self, base_data):
+        """Ana grup stok sağlık faktörü - Stok/COGS oranının ortalamadan sapmasına göre max ±%2.5"""
+        
+        # Ortalama Stok/COGS oranı (benchmark)
+        avg_stock_ratio = base_data['Stock_COGS_Ratio'].mean()
+        
+        # Aynı grup birden fazla satırdaysa son satır geçerli
+        son_satirlar = base_data.drop_duplicates('MainGroup', keep='last')
+        gruplar = son_satirlar['MainGroup'].to_numpy()
+        
+        if not avg_stock_ratio > 0:
+            return pd.Series(1.0, index=gruplar)
+        
+        # Benchmark'a göre sapma
+        ratio_deviation = (son_satirlar['Stock_COGS_Ratio'].to_numpy(dtype=float) - avg_stock_ratio) / avg_stock_ratio
+        
+        # ÇOK KONSERVATIF AYARLAMA - Max %2.5
+        # %50'den fazla yüksekse (yavaş hareket) hafif azalt, %30'dan fazla düşükse (hızlı hareket) hafif artır
+        yavas = np.maximum(-0.01 - (np.minimum(ratio_deviation - 0.5, 0.5) * 0.03), -0.025)
+        hizli = np.minimum(0.01 + (np.minimum(np.abs(ratio_deviation) - 0.3, 0.5) * 0.03), 0.025)
+        adjustment = np.select([ratio_deviation > 0.5, ratio_deviation < -0.3], [yavas, hizli], 0)
+        
+        return pd.Series(1 + adjustment, index=gruplar)
+    
+    def _bloklara_ayir(self, bloklar, parcalar, bolme, sonuc, ozel_ay):
+        """Uzun tablo sonucunu ufuk bazında ay bloklarına geri böl (versiyon ekseni korunur)"""
+        parcali = {kolon: np.split(degerler, bolme, axis=-1) for kolon, degerler in sonuc.items()}
+        for sira, (i, _) in enumerate(parcalar):
+            bloklar[i] = {kolon: parcalar_[sira] for kolon, parcalar_ in parcali.items()}
+            bloklar[i]['_ozel_ay'] = ozel_ay
+    
+    def _bloklari_birlestir(self, bloklar, hedef_yil, hedef_ay, surum=0):
+        """Bir versiyonun ay bloklarını tek DataFrame'e diz - eksik kolonlar NaN (pd.concat ile aynı)"""
+        
+        if not bloklar:
+            return pd.DataFrame(columns=TAHMIN_KOLONLARI)
+        
+        # Kolon sırası: blokların ilk göründüğü sıra
+        kolonlar = []
+        for blok in bloklar:
+            if blok['_ozel_ay']:
+                blok_kolonlari = [k for k in self.data.columns if k in blok or k in ('Year', 'Month')]
+                blok_kolonlari += OZEL_AY_KOLONLARI
+            else:
+                blok_kolonlari = TAHMIN_KOLONLARI
+            kolonlar += [k for k in blok_kolonlari if k not in kolonlar]
+        
+        uzunluklar = [len(blok['MainGroup']) for blok in bloklar]
+        
+        def deger(blok, kolon, uzunluk):
+            if kolon not in blok:
+                return np.full(uzunluk, np.nan)
+            # Versiyona göre değişen kolonlar (versiyon × satır)
+            return blok[kolon][surum] if blok[kolon].ndim == 2 else blok[kolon]
+        
+        sutunlar = {}
+        for kolon in kolonlar:
+            if kolon == 'Year':
+                sutunlar[kolon] = np.repeat(np.array(hedef_yil, dtype=np.int64), uzunluklar)
+            elif kolon == 'Month':
+                sutunlar[kolon] = np.repeat(np.array(hedef_ay, dtype=np.int64), uzunluklar)
+            else:
+                sutunlar[kolon] = np.concatenate([
+                    deger(blok, kolon, uzunluk) for blok, uzunluk in zip(bloklar, uzunluklar)
+                ])
+        
+        all_forecasts = pd.DataFrame(sutunlar)
+        all_forecasts['MainGroup'] = all_forecasts['MainGroup'].astype(self.data['MainGroup'].dtype)
+        
+        return all_forecasts
+    
+    def _target_matrices(self, gruplar, hedef_ay, p):
+        """Bir versiyonun ana grup × ay kombine büyüme ve fiyat değişimi matrisleri"""
+        G, H = len(gruplar), len(hedef_ay)
+        growth_param = p['growth_param']
+        
+        # Kombine büyüme hedefi = (aylık + ana grup) / 2 + alınan dersler
+        if p['monthly_growth_targets'] is not None:
+            aylik_hedef = np.array([p['monthly_growth_targets'].get(ay, growth_param) for ay in hedef_ay], dtype=float)
+        else:
+            aylik_hedef = np.full(H, growth_param, dtype=float)
+        
+        if p['maingroup_growth_targets'] is not None:
+            grup_hedef = pd.Series(gruplar).map(p['maingroup_growth_targets']).fillna(growth_param).to_numpy(dtype=float)
+        else:
+            grup_hedef = np.full(G, growth_param, dtype=float)
+        
+        if p['lessons_learned'] is not None:
+            ders_skoru = np.array([[p['lessons_learned'].get((grup, ay), 0) for ay in hedef_ay] for grup in gruplar],
+                                  dtype=float).reshape(G, H)
+            ders_etkisi = ders_skoru * 0.005
+        else:
+            ders_etkisi = np.zeros((G, H))
+        
+        combined_growth = (aylik_hedef[None, :] + grup_hedef[:, None]) / 2 + ders_etkisi
+        
+        # Fiyat değişimi (matriste yoksa enflasyon)
+        if p['price_change_matrix']:
+            fiyat_degisimi = np.array([[p['price_change_matrix'].get((grup, ay), p['inflation_rate']) for ay in hedef_ay]
+                                       for grup in gruplar], dtype=float).reshape(G, H)
+        else:
+            fiyat_degisimi = np.full((G, H), p['inflation_rate'], dtype=float)
+        
+        return combined_growth, fiyat_degisimi
+    
+    def _forecast_blocks(self, num_months, surumler):
+        """
+        Tüm versiyonların tahmin ay blokları tek geçişte
+        
+        Kaynak seçimi, mevsimsellik, stok sağlığı ve uzun tablo bir kez kurulur;
+        versiyona göre değişen kolonlar (versiyon × satır) dizileri olarak hesaplanır.
+        
+        Returns: (bloklar, hedef_yil, hedef_ay) - versiyonlar 2026 tabanında ayrışırsa None
+        """
+        
+        # Veriye bağlı tablolar (mevsimsellik, yıl-ay konumları, kolon dizileri) - parametrelerden bağımsız
+        tablolar = self._forecast_tables()
+        donem_konumlari = tablolar['donem_konumlari']
+        bos_konum = np.array([], dtype=np.intp)
+        
+        def donem(yil, ay):
+            return donem_konumlari.get((yil, ay), bos_konum)
+        
         # Son gerçekleşen ayın verisini base al
-        base_data = self.data[
-            (self.data['Year'] == self.last_actual_year) & 
-            (self.data['Month'] == self.last_actual_month)
-        ].copy()
+        base_data = self.data.iloc[donem(self.last_actual_year, self.last_actual_month)]
         
         # Organik trend (2024->2025) - SADECE AYNI AYLARI KARŞILAŞTIR
         # Son gerçekleşen aya kadar olan ayları al
@@ -226,253 +477,270 @@ class BudgetForecaster:
         
         organic_growth_raw = (common_months_2025 - common_months_2024) / common_months_2024 if common_months_2024 > 0 else 0
         
-        # ENFLASYON DÜZELTMESİ UYGULA
-        organic_growth = organic_growth_raw * inflation_adjustment
-        
-        # BÜTÇE VERSİYONU ÇARPANI UYGULA
+        # ENFLASYON DÜZELTMESİ + BÜTÇE VERSİYONU ÇARPANI (versiyon başına)
         # 0.0 = Çekimser (organik yok), 0.5 = Normal (yarım), 1.0 = İyimser (tam)
-        organic_growth = organic_growth * organic_multiplier
+        organic_growth = np.array([
+            organic_growth_raw * p['inflation_adjustment'] * p['organic_multiplier'] for p in surumler
+        ], dtype=float)[:, None]
+        margin_improvement = np.array([p['margin_improvement'] for p in surumler], dtype=float)[:, None]
+        stock_change_pct = np.array([p['stock_change_pct'] for p in surumler], dtype=float)[:, None]
         
         # ========================================
-        # *** STOK SAĞLIK FAKTÖRLERİNİ HESAPLA ***
+        # *** ANA GRUP × AY MATRİSLERİ ***
         # ========================================
         
-        # Ortalama Stok/COGS oranı (benchmark)
-        avg_stock_ratio = base_data['Stock_COGS_Ratio'].mean()
+        # Hedef yıl-ay (ufuk i = 1..num_months)
+        ufuk = np.arange(1, num_months + 1)
+        hedef_yil = (self.last_actual_year + (self.last_actual_month + ufuk - 1) // 12).tolist()
+        hedef_ay = ((self.last_actual_month + ufuk - 1) % 12 + 1).tolist()
         
-        # Her ana grup için stok sağlık faktörü hesapla
-        stock_health_factors = {}
+        gruplar = tablolar['gruplar']
+        V, H = len(surumler), num_months
         
-        for _, row in base_data.iterrows():
-            main_group = row['MainGroup']
-            group_ratio = row['Stock_COGS_Ratio']
-            
-            # Benchmark'a göre sapma
-            if avg_stock_ratio > 0:
-                ratio_deviation = (group_ratio - avg_stock_ratio) / avg_stock_ratio
-                
-                # ÇOK KONSERVATIF AYARLAMA - Max %2.5
-                if ratio_deviation > 0.5:  # %50'den fazla yüksekse (yavaş hareket)
-                    # Hafif azalt: max %2.5 azalış
-                    adjustment = -0.01 - (min(ratio_deviation - 0.5, 0.5) * 0.03)
-                    adjustment = max(adjustment, -0.025)  # Max -%2.5
-                elif ratio_deviation < -0.3:  # %30'dan fazla düşükse (hızlı hareket)
-                    # Hafif artır: max %2.5 artış
-                    adjustment = 0.01 + (min(abs(ratio_deviation) - 0.3, 0.5) * 0.03)
-                    adjustment = min(adjustment, 0.025)  # Max +%2.5
-                else:
-                    # Normal aralıkta, ayarlama yok
-                    adjustment = 0
-                
-                stock_health_factors[main_group] = 1 + adjustment
-            else:
-                stock_health_factors[main_group] = 1.0
+        # Mevsimsellik indeksi (eşleşmeyen 1.0)
+        mevsimsellik = tablolar['mevsimsellik'].reindex(columns=hedef_ay).fillna(1.0).to_numpy(dtype=float)
+        
+        # Versiyon × ana grup × ay: kombine büyüme ve fiyat değişimi
+        matrisler = [self._target_matrices(gruplar, hedef_ay, p) for p in surumler]
+        combined_growth = np.stack([m[0] for m in matrisler])
+        fiyat_degisimi = np.stack([m[1] for m in matrisler])
+        
+        # *** STOK SAĞLIK FAKTÖRÜ ***
+        stok_saglik = self._stock_health_factors(base_data).reindex(gruplar).fillna(1.0).to_numpy(dtype=float)
         
         # ========================================
-        # *** STOK FAKTÖRÜ HESAPLANDI ***
+        # *** TAHMİN AYLARI ***
         # ========================================
         
-        # Tahmin aylarını oluştur
-        forecast_data = []
+        veri_kolonlari = tablolar['kolonlar']
+        kaynak_kolonlari = [kolon for kolon in veri_kolonlari if kolon != 'MainGroup']
         
-        for i in range(1, num_months + 1):
-            # Hedef yıl-ay hesapla
-            target_month = self.last_actual_month + i
-            target_year = self.last_actual_year
-            
-            while target_month > 12:
-                target_month -= 12
-                target_year += 1
+        def veri_sec(konum):
+            return {kolon: degerler[konum] for kolon, degerler in veri_kolonlari.items()}
+        
+        def satis_toplami(kaynak):
+            # Gerçek veri tek satır dizisi, tahmin bloğu versiyon × satır
+            return kaynak['Sales'].sum(axis=-1)
+        
+        base_kaynak = veri_sec(donem(self.last_actual_year, self.last_actual_month))
+        
+        def uzun_tablo(parcalar):
+            """(ufuk, kaynak) parçalarını tek diziye diz - satır başına grup/ufuk indeksi"""
+            uzunluklar = [len(p['MainGroup']) for _, p in parcalar]
+            kaynak = {
+                kolon: np.concatenate([np.broadcast_to(p[kolon], (V, n)) for (_, p), n in zip(parcalar, uzunluklar)],
+                                      axis=-1)
+                for kolon in kaynak_kolonlari
+            }
+            kaynak['MainGroup'] = np.concatenate([p['MainGroup'] for _, p in parcalar])
+            h = np.repeat([i for i, _ in parcalar], uzunluklar)
+            g = gruplar.get_indexer(kaynak['MainGroup'])
+            return kaynak, h, g, np.cumsum(uzunluklar)[:-1]
+        
+        # Ay blokları sırayla değil, bağımlılık turlarıyla hesaplanır:
+        # 2026+ ayları taban olarak 12 ay önceki tahmini kullanabilir
+        bloklar = [None] * H
+        bekleyen = list(range(H))
+        
+        while bekleyen:
+            ozel, normal, ertelenen = [], [], []
             
-            # *** İLK 2 AY İÇİN ÖZEL YAKLAŞIM (SADECE 2025 Kasım-Aralık) ***
-            if target_year == 2025 and target_month in [11, 12]:
+            for i in bekleyen:
+                target_year, target_month = hedef_yil[i], hedef_ay[i]
+                
+                # *** İLK 2 AY İÇİN ÖZEL YAKLAŞIM (SADECE 2025 Kasım-Aralık) ***
                 # Geçen yılın aynı ayını baz al
-                same_month_last_year = self.data[
-                    (self.data['Year'] == 2024) & 
-                    (self.data['Month'] == target_month)
-                ].copy()
+                konum_2024 = donem(2024, target_month)
+                if target_year == 2025 and target_month in [11, 12] and len(konum_2024) > 0:
+                    ozel.append((i, veri_sec(konum_2024)))
+                    continue
                 
-                if len(same_month_last_year) > 0:
-                    month_forecast = same_month_last_year.copy()
-                    month_forecast['Year'] = 2025
-                    month_forecast['Month'] = target_month
-                    
-                    # Fiyat artışını hesapla
-                    month_forecast['PriceChange'] = month_forecast.apply(
-                        lambda row: price_change_matrix.get((row['MainGroup'], target_month), inflation_rate) 
-                        if price_change_matrix else inflation_rate,
-                        axis=1
-                    )
-                    
-                    # Fiyat artış çarpanı (örn: %25 artış = 1.25)
-                    month_forecast['PriceMultiplier'] = 1 + month_forecast['PriceChange']
-                    
-                    # 2025 Birim Fiyat = 2024 Fiyat × Fiyat Çarpanı
-                    month_forecast['UnitPrice'] = month_forecast['UnitPrice'] * month_forecast['PriceMultiplier']
-                    
-                    # 2025 Adet = 2024 Adet × 1.15
-                    month_forecast['Quantity'] = month_forecast['Quantity'] * 1.15
-                    
-                    # 2025 Ciro = Adet × Fiyat
-                    month_forecast['Sales'] = month_forecast['Quantity'] * month_forecast['UnitPrice']
-                    
-                    # *** ÖNEMLİ: Ciro artış oranını hesapla ***
-                    # Ciro = Adet × Fiyat = 1.15 × Fiyat Çarpanı
-                    month_forecast['SalesMultiplier'] = 1.15 * month_forecast['PriceMultiplier']
-                    
-                    # Brüt Kar ve SMM aynı oranda artar (marj korunsun)
-                    month_forecast['GrossProfit'] = month_forecast['GrossProfit'] * month_forecast['SalesMultiplier']
-                    month_forecast['COGS'] = month_forecast['COGS'] * month_forecast['SalesMultiplier']
-                    
-                    # Marjı yeniden hesapla
-                    month_forecast['GrossMargin%'] = np.where(
-                        month_forecast['Sales'] > 0,
-                        month_forecast['GrossProfit'] / month_forecast['Sales'],
-                        0
-                    )
-                    
-                    # Stok
-                    month_forecast['Stock'] = month_forecast['Stock'] * 1.10
-                    
-                    # Stok oranı
-                    month_forecast['Stock_COGS_Ratio'] = np.where(
-                        month_forecast['COGS'] > 0,
-                        month_forecast['Stock'] / month_forecast['COGS'],
-                        0
-                    )
+                # *** DİĞER AYLAR İÇİN NORMAL TAHMİN ***
+                kaynak = base_kaynak
+                
+                # 2026+ için: GEÇEN YILIN AYNI AYINI BASE AL
+                if target_year >= 2026:
+                    # Önce self.data'dan bak (gerçek veri için)
+                    onceki = veri_sec(donem(target_year - 1, target_month))
                     
-                    forecast_data.append(month_forecast)
+                    # Gerçek veri yoksa, 12 ay önceki tahminden bak (örn: 2025/11-12 tahmini)
+                    if len(onceki['MainGroup']) == 0 or satis_toplami(onceki) < 100000:
+                        if i >= 12 and bloklar[i - 12] is None:
+                            ertelenen.append(i)
+                            continue
+                        if i >= 12 and len(bloklar[i - 12]['MainGroup']) > 0:
+                            onceki = bloklar[i - 12]
                     
-                    continue
+                    # Geçen yılın aynı ayını kullan - direkt, trend ekleme!
+                    yeterli = len(onceki['MainGroup']) > 0 and satis_toplami(onceki) > 100000
+                    if np.all(yeterli):
+                        kaynak = onceki
+                    elif np.any(yeterli):
+                        # Versiyonlar farklı taban seçiyor - ortak satır kümesi yok
+                        return None
+                
+                normal.append((i, kaynak))
             
-            # *** DİĞER AYLAR İÇİN NORMAL TAHMİN ***
-            # 2026+ için: GEÇEN YILIN AYNI AYINI BASE AL
-            if target_year >= 2026:
-                # Önce self.data'dan bak (gerçek veri için)
-                same_month_prev_year = self.data[
-                    (self.data['Year'] == target_year - 1) & 
-                    (self.data['Month'] == target_month)
-                ]
+            if ozel:
+                kaynak, h, g, bolme = uzun_tablo(ozel)
                 
-                # Gerçek veri yoksa, önceki tahminlerden bak
-                if len(same_month_prev_year) == 0 or same_month_prev_year['Sales'].sum() < 100000:
-                    # forecast_data içinde ara (örn: 2025/11-12 tahmini)
-                    for prev_forecast in forecast_data:
-                        if len(prev_forecast) > 0:
-                            if prev_forecast.iloc[0]['Year'] == target_year - 1 and prev_forecast.iloc[0]['Month'] == target_month:
-                                same_month_prev_year = prev_forecast.copy()
-                                break
+                # Fiyat artış çarpanı (örn: %25 artış = 1.25)
+                price_change = fiyat_degisimi[:, g, h]
+                price_multiplier = 1 + price_change
                 
-                if len(same_month_prev_year) > 0 and same_month_prev_year['Sales'].sum() > 100000:
-                    # Geçen yılın aynı ayını kullan - direkt, trend ekleme!
-                    month_forecast = same_month_prev_year.copy()
-                    month_forecast['Year'] = target_year
-                    month_forecast['Month'] = target_month
-                else:
-                    # Fallback: base_data
-                    month_forecast = base_data.copy()
-                    month_forecast['Year'] = target_year
-                    month_forecast['Month'] = target_month
-            else:
-                # 2025 içindeyiz, base_data kullan
-                month_forecast = base_data.copy()
-                month_forecast['Year'] = target_year
-                month_forecast['Month'] = target_month
-            
-            # Mevsimselliği ekle
-            month_forecast = month_forecast.merge(
-                seasonality[seasonality['Month'] == target_month],
-                on=['MainGroup', 'Month'],
-                how='left'
-            )
-            month_forecast['SeasonalityIndex'] = month_forecast['SeasonalityIndex'].fillna(1.0)
-            
-            # Hedefleri uygula
-            if monthly_growth_targets is not None:
-                month_forecast['MonthlyGrowthTarget'] = monthly_growth_targets.get(target_month, growth_param)
-            else:
-                month_forecast['MonthlyGrowthTarget'] = growth_param
-            
-            if maingroup_growth_targets is not None:
-                month_forecast['MainGroupGrowthTarget'] = month_forecast['MainGroup'].map(maingroup_growth_targets)
-                month_forecast['MainGroupGrowthTarget'] = month_forecast['MainGroupGrowthTarget'].fillna(growth_param)
-            else:
-                month_forecast['MainGroupGrowthTarget'] = growth_param
+                # 2025 Birim Fiyat = 2024 Fiyat × Fiyat Çarpanı, 2025 Adet = 2024 Adet × 1.15
+                unit_price = kaynak['UnitPrice'] * price_multiplier
+                quantity = kaynak['Quantity'] * 1.15
+                sales = quantity * unit_price
+                
+                # Brüt Kar ve SMM ciro ile aynı oranda artar (marj korunsun)
+                sales_multiplier = 1.15 * price_multiplier
+                gross_profit = kaynak['GrossProfit'] * sales_multiplier
+                cogs = kaynak['COGS'] * sales_multiplier
+                stock = kaynak['Stock'] * 1.10
+                
+                self._bloklara_ayir(bloklar, ozel, bolme, {
+                    'MainGroup': kaynak['MainGroup'],
+                    'Quantity': quantity,
+                    'Sales': sales,
+                    'GrossProfit': gross_profit,
+                    'GrossMargin%': np.where(sales > 0, gross_profit / sales, 0),
+                    'Stock': stock,
+                    'COGS': cogs,
+                    'UnitPrice': unit_price,
+                    'Stock_COGS_Ratio': np.where(cogs > 0, stock / cogs, 0),
+                    'PriceChange': price_change,
+                    'PriceMultiplier': price_multiplier,
+                    'SalesMultiplier': sales_multiplier
+                }, ozel_ay=True)
             
-            # Alınan dersler
-            if lessons_learned is not None:
-                month_forecast['LessonsScore'] = month_forecast.apply(
-                    lambda row: lessons_learned.get((row['MainGroup'], target_month), 0),
-                    axis=1
+            if normal:
+                kaynak, h, g, bolme = uzun_tablo(normal)
+                
+                # 2026 Birim Fiyat = 2025 Fiyat × (1 + Fiyat Değişimi)
+                unit_price = kaynak['UnitPrice'] * (1 + fiyat_degisimi[:, g, h])
+                
+                # SATIŞ TAHMİNİ (CİRO) - STOK SAĞLIK FAKTÖRÜ VE MEVSİMSELLİK İLE
+                sales = (
+                    kaynak['Sales'] *
+                    (1 + organic_growth * 0.3) *  # Organik büyüme %30
+                    (1 + combined_growth[:, g, h]) *
+                    (0.8 + mevsimsellik[g, h] * 0.2) *
+                    stok_saglik[g]
                 )
-                month_forecast['LessonsAdjustment'] = month_forecast['LessonsScore'] * 0.005
-            else:
-                month_forecast['LessonsAdjustment'] = 0
-            
-            # *** STOK SAĞLIK FAKTÖRÜNÜ EKLE ***
-            month_forecast['StockHealthFactor'] = month_forecast['MainGroup'].map(stock_health_factors)
-            month_forecast['StockHealthFactor'] = month_forecast['StockHealthFactor'].fillna(1.0)
-            
-            # Kombine büyüme hedefi
-            month_forecast['CombinedGrowthTarget'] = (
-                (month_forecast['MonthlyGrowthTarget'] + month_forecast['MainGroupGrowthTarget']) / 2 +
-                month_forecast['LessonsAdjustment']
-            )
-            
-            # Fiyat değişimini hesapla
-            month_forecast['PriceChange'] = month_forecast.apply(
-                lambda row: price_change_matrix.get((row['MainGroup'], target_month), inflation_rate) 
-                if price_change_matrix else inflation_rate,
-                axis=1
-            )
-            
-            # 2026 Birim Fiyat = 2025 Fiyat × (1 + Fiyat Değişimi)
-            month_forecast['UnitPrice'] = month_forecast['UnitPrice'] * (1 + month_forecast['PriceChange'])
-            
-            # Zaman faktörü (uzak gelecek daha konservatif)
-            time_discount = 1.0 - (i * 0.01)
-            time_discount = max(time_discount, 0.85)
-            
-            # SATIŞ TAHMİNİ (CİRO) - STOK SAĞLIK FAKTÖRÜ VE MEVSİMSELLİK İLE
-            month_forecast['Sales'] = (
-                month_forecast['Sales'] *
-                (1 + organic_growth * 0.3) *  # Organik büyüme %30
-                (1 + month_forecast['CombinedGrowthTarget']) *
-                (0.8 + month_forecast['SeasonalityIndex'] * 0.2) *
-                month_forecast['StockHealthFactor']
-            )
-            
-            # ADET TAHMİNİ = Ciro / Birim Fiyat
-            month_forecast['Quantity'] = np.where(
-                month_forecast['UnitPrice'] > 0,
-                month_forecast['Sales'] / month_forecast['UnitPrice'],
-                0
-            )
-            
-            # Marj iyileştirme
-            month_forecast['GrossMargin%'] = (month_forecast['GrossMargin%'] + margin_improvement).clip(0, 1)
-            month_forecast['GrossProfit'] = month_forecast['Sales'] * month_forecast['GrossMargin%']
-            month_forecast['COGS'] = month_forecast['Sales'] - month_forecast['GrossProfit']
-            
-            # Stok
-            month_forecast['Stock'] = month_forecast['Stock'] * (1 + stock_change_pct)
-            month_forecast['Stock_COGS_Ratio'] = np.where(
-                month_forecast['COGS'] > 0,
-                month_forecast['Stock'] / month_forecast['COGS'],
-                0
-            )
-            
-            # Gereksiz kolonları temizle
-            month_forecast = month_forecast[['Year', 'Month', 'MainGroup', 'Quantity', 'UnitPrice',
-                                            'Sales', 'GrossProfit', 'GrossMargin%', 'Stock', 'COGS', 
-                                            'Stock_COGS_Ratio']]
+                
+                # Marj iyileştirme
+                gross_margin = np.clip(kaynak['GrossMargin%'] + margin_improvement, 0, 1)
+                gross_profit = sales * gross_margin
+                cogs = sales - gross_profit
+                stock = kaynak['Stock'] * (1 + stock_change_pct)
+                
+                self._bloklara_ayir(bloklar, normal, bolme, {
+                    'MainGroup': kaynak['MainGroup'],
+                    # ADET TAHMİNİ = Ciro / Birim Fiyat
+                    'Quantity': np.where(unit_price > 0, sales / unit_price, 0),
+                    'UnitPrice': unit_price,
+                    'Sales': sales,
+                    'GrossProfit': gross_profit,
+                    'GrossMargin%': gross_margin,
+                    'Stock': stock,
+                    'COGS': cogs,
+                    'Stock_COGS_Ratio': np.where(cogs > 0, stock / cogs, 0)
+                }, ozel_ay=False)
             
-            forecast_data.append(month_forecast)
+            bekleyen = ertelenen
         
-        # Tüm tahminleri birleştir
-        all_forecasts = pd.concat(forecast_data, ignore_index=True)
+        return bloklar, hedef_yil, hedef_ay
+    
+    def _version_forecasts(self, num_months, surumler):
+        """Versiyon parametre listesi → versiyon başına tahmin DataFrame listesi"""
+        sonuc = self._forecast_blocks(num_months, surumler)
         
-        return all_forecasts
+        # 2026 tabanı versiyonlar arasında ayrışırsa her versiyon ayrı hesaplanır
+        if sonuc is None:
+            return [self._version_forecasts(num_months, [p])[0] for p in surumler]
+        
+        # Tüm tahminleri birleştir (kolon sırası ilk bloktan, özel ay kolonları sonda)
+        bloklar, hedef_yil, hedef_ay = sonuc
+        return [self._bloklari_birlestir(bloklar, hedef_yil, hedef_ay, surum) for surum in range(len(surumler))]
+    
+    def _version_parameters(self, versions, ortak):
+        """Versiyon tanımlarını ortak parametrelerle tamamla → (adlar, parametre listesi)"""
+        adlar, surumler = [], []
+        for sira, surum in enumerate(versions):
+            p = {**TAHMIN_PARAMETRELERI, **ortak, **surum}
+            adlar.append(p.pop('Version', f"Versiyon {sira + 1}"))
+            bilinmeyen = set(p) - set(TAHMIN_PARAMETRELERI)
+            if bilinmeyen:
+                raise TypeError(f"Bilinmeyen tahmin parametresi: {', '.join(sorted(bilinmeyen))}")
+            surumler.append(p)
+        return adlar, surumler
+    
+    def forecast_future_months(self, num_months=15, growth_param=0.1, margin_improvement=0.0, 
+                          stock_change_pct=0.0, monthly_growth_targets=None, 
+                          maingroup_growth_targets=None, lessons_learned=None,
+                          inflation_adjustment=1.0, organic_multiplier=0.5,
+                          price_change_matrix=None, inflation_rate=0.25, organic_growth_rate=0.15):  # ← EKLE!
+        """
+        Son gerçekleşen aydan itibaren belirtilen sayıda ay tahmin et
+        
+        Parameters:
+        -----------
+        num_months: Kaç ay ileriye tahmin yapılacak (varsayılan 15)
+        growth_param: Genel büyüme hedefi
+        margin_improvement: Brüt marj iyileşme hedefi
+        stock_change_pct: Stok tutar değişim yüzdesi
+        monthly_growth_targets: Dict {month: growth_rate} - Her ay için özel hedef
+        maingroup_growth_targets: Dict {maingroup: growth_rate} - Her ana grup için özel hedef
+        lessons_learned: Dict {(maingroup, month): score} - Alınan dersler (-10 ile +10 arası)
+        inflation_adjustment: Enflasyon düzeltme faktörü (örn: 25/35 = 0.71)
+        organic_multiplier: Organik büyüme çarpanı (0.0=Çekimser, 0.5=Normal, 1.0=İyimser)
+        price_change_matrix: Dict {(maingroup, month): price_change_pct} - Fiyat değişim matrisi
+        inflation_rate: Enflasyon oranı (default fiyat artışı için, örn: 0.25 = %25)
+        """
+        parametreler = {
+            'growth_param': growth_param,
+            'margin_improvement': margin_improvement,
+            'stock_change_pct': stock_change_pct,
+            'monthly_growth_targets': monthly_growth_targets,
+            'maingroup_growth_targets': maingroup_growth_targets,
+            'lessons_learned': lessons_learned,
+            'inflation_adjustment': inflation_adjustment,
+            'organic_multiplier': organic_multiplier,
+            'price_change_matrix': price_change_matrix,
+            'inflation_rate': inflation_rate,
+            'organic_growth_rate': organic_growth_rate
+        }
+        return self._version_forecasts(num_months, [parametreler])[0]
+    
+    def forecast_versions(self, versions, num_months=15, **ortak):
+        """
+        Birden fazla bütçe versiyonunu tek geçişte tahmin et (örn: Çekimser / Normal / İyimser)
+        
+        Parameters:
+        -----------
+        versions: List[dict] - {'Version': ad, + forecast_future_months parametreleri
+                  (organic_multiplier, inflation_adjustment, monthly_growth_targets ...)}
+        ortak: Versiyonda verilmeyen parametreler için forecast_future_months parametreleri
+        
+        Returns: DataFrame - Version + forecast_future_months kolonları (uzun format, versiyon sırasıyla);
+                 her versiyon dilimi aynı parametrelerle forecast_future_months ile aynıdır
+        """
+        adlar, surumler = self._version_parameters(versions, ortak)
+        tahminler = self._version_forecasts(num_months, surumler)
+        
+        for ad, tahmin in zip(adlar, tahminler):
+            tahmin.insert(0, 'Version', ad)
+        return pd.concat(tahminler, ignore_index=True)
+    
+    def _historical_data(self):
+        """Gerçekleşen veri (son gerçekleşen aya kadar) - tahmin kolonları"""
+        historical = self.data[TAHMIN_KOLONLARI].copy()
+        
+        return historical[
+            (historical['Year'] < self.last_actual_year) |
+            ((historical['Year'] == self.last_actual_year) & (historical['Month'] <= self.last_actual_month))
+        ]
     
     def get_full_data_with_forecast(self, num_months=15, growth_param=0.1, margin_improvement=0.0, 
                                 stock_change_pct=0.0, monthly_growth_targets=None, 
@@ -498,22 +766,29 @@ class BudgetForecaster:
             organic_growth_rate=organic_growth_rate  # ← EKLE!
         )
         
-        # Gerçekleşen veriyi düzenle - TAHMİN EDİLEN AYLARI ÇIKAR
-        historical = self.data[['Year', 'Month', 'MainGroup', 'Quantity', 'UnitPrice',
-                               'Sales', 'GrossProfit', 'GrossMargin%', 'Stock', 'COGS', 
-                               'Stock_COGS_Ratio']].copy()
-        
-        # Sadece gerçek veriyi al (son gerçekleşen aya kadar)
-        historical = historical[
-            (historical['Year'] < self.last_actual_year) |
-            ((historical['Year'] == self.last_actual_year) & (historical['Month'] <= self.last_actual_month))
-        ]
-        
-        # Birleştir
-        full_data = pd.concat([historical, forecast], ignore_index=True)
+        # Gerçekleşen veri (TAHMİN EDİLEN AYLAR HARİÇ) + tahmin
+        full_data = pd.concat([self._historical_data(), forecast], ignore_index=True)
         
         return full_data
     
+    def get_full_data_with_versions(self, versions, num_months=15, **ortak):
+        """
+        Gerçekleşen veri + versiyon tahminleri (uzun format, Version kolonu)
+        
+        Her versiyon dilimi aynı parametrelerle get_full_data_with_forecast ile aynıdır;
+        gerçekleşen veri her versiyonda tekrarlanır.
+        """
+        adlar, surumler = self._version_parameters(versions, ortak)
+        tahminler = self._version_forecasts(num_months, surumler)
+        historical = self._historical_data()
+        
+        parcalar = []
+        for ad, tahmin in zip(adlar, tahminler):
+            full_data = pd.concat([historical, tahmin], ignore_index=True)
+            full_data.insert(0, 'Version', ad)
+            parcalar.append(full_data)
+        return pd.concat(parcalar, ignore_index=True)
+    
     def get_summary_stats(self, data):
         """Özet istatistikler - Haftalık normalize edilmiş stok/SMM oranı dahil"""
         
@@ -604,3 +879,38 @@ class BudgetForecaster:
             'confidence_level': confidence,
             'avg_growth_2024_2025': np.mean(growth_rates) * 100
         }
+
+
+# -------------------------------
+# YÜKLEME ÖNBELLEĞİ
+# -------------------------------
+
+def load_forecaster(excel_bytes, depo=None, kaynak=None):
+    """
+    Excel baytlarından BudgetForecaster
+
+    depo (dataset_store.DatasetStore) verilirse işlenmiş self.data dosya özetiyle
+    Parquet olarak saklanır; aynı dosya tekrar gelince Excel ayrıştırılmadan yüklenir.
+
+    Returns:
+        tuple: (forecaster, önbellekten_mi)
+    """
+    kaynak_ozet = f"{hashlib.sha256(excel_bytes).hexdigest()}-v{ISLEME_SURUMU}"
+    
+    if depo is not None:
+        meta = depo.find_source(BUTCE_VERI_ANAHTARI, kaynak_ozet)
+        if meta is not None and meta.get('ek'):
+            data = depo.load(BUTCE_VERI_ANAHTARI, meta['surum'])
+            return BudgetForecaster.from_data(data, **meta['ek']), True
+    
+    forecaster = BudgetForecaster(io.BytesIO(excel_bytes))
+    
+    if depo is not None:
+        depo.save(
+            BUTCE_VERI_ANAHTARI, forecaster.data, kaynak=kaynak, kaynak_ozet=kaynak_ozet,
+            ek={
+                'last_actual_year': forecaster.last_actual_year,
+                'last_actual_month': forecaster.last_actual_month
+            }
+        )
+    return forecaster, False
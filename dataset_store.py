@@ -0,0 +1,223 @@
+"""
+🗄️ Veri Deposu
+Thorius AR4U Platform
+Kabul edilen yüklemeleri içerik özetli Parquet dosyaları olarak diskte sakla
+
+- Her sürüm bir kez yazılır: <klasör>/<veri_anahtarı>/<özet>.parquet + <özet>.json
+- Aynı içerik tekrar yüklenirse dosya yeniden yazılmaz, sadece metadata güncellenir
+- Kaynak dosya özeti (ham CSV baytları) de saklanır; aynı dosya tekrar gelirse
+  ayrıştırmadan doğrudan Parquet'ten yüklenir
+- Saklama: son kullanımı saklama_gun'den eski veya anahtar başına son max_surum
+  sürümün dışında kalan sürümler silinir (her anahtarın en son kullanılan sürümü
+  her zaman kalır)
+
+Parquet için pyarrow gerekir; yoksa DEPO_KULLANILABILIR False olur.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from sevkiyat_engine import hash_frame
+
+try:
+    import pyarrow  # noqa: F401
+    DEPO_KULLANILABILIR = True
+except ImportError:
+    DEPO_KULLANILABILIR = False
+
+
+# Varsayılan klasör - THORIUS_VERI_DEPOSU ile değiştirilebilir
+VARSAYILAN_KLASOR = os.environ.get(
+    'THORIUS_VERI_DEPOSU',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'veri_deposu')
+)
+
+# Saklama politikası
+VARSAYILAN_SAKLAMA_GUN = 14
+VARSAYILAN_MAX_SURUM = 5
+
+ZAMAN_FORMATI = '%Y-%m-%dT%H:%M:%S'
+
+
+def _simdi():
+    return datetime.now().strftime(ZAMAN_FORMATI)
+
+
+class DatasetStore:
+    """
+    İçerik özetli Parquet veri deposu
+
+    Metadata: surum, key, satir, kolonlar, boyut_bayt, yukleyen, kaynak,
+    kaynak_ozet, olusturma, son_kullanim, yukleme_sayisi (+ opsiyonel ek)
+    """
+
+    def __init__(self, klasor=VARSAYILAN_KLASOR, saklama_gun=VARSAYILAN_SAKLAMA_GUN,
+                 max_surum=VARSAYILAN_MAX_SURUM):
+        if not DEPO_KULLANILABILIR:
+            raise ImportError("Veri deposu için pyarrow gerekli (pip install pyarrow)")
+        self.klasor = klasor
+        self.saklama_gun = saklama_gun
+        self.max_surum = max_surum
+        os.makedirs(klasor, exist_ok=True)
+
+    # -------------------------------
+    # YOLLAR / METADATA
+    # -------------------------------
+
+    def _yol(self, key, surum, uzanti):
+        return os.path.join(self.klasor, key, f"{surum}.{uzanti}")
+
+    def _meta_oku(self, yol):
+        try:
+            with open(yol, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _meta_yaz(self, meta):
+        # Geçici dosya + os.replace: eşzamanlı okuyucu yarım JSON görmez
+        yol = self._yol(meta['key'], meta['surum'], 'json')
+        gecici = f"{yol}.{os.getpid()}.tmp"
+        with open(gecici, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(gecici, yol)
+
+    def _tum_meta(self, key=None):
+        anahtarlar = [key] if key else sorted(os.listdir(self.klasor))
+        kayitlar = []
+        for anahtar in anahtarlar:
+            klasor = os.path.join(self.klasor, anahtar)
+            if not os.path.isdir(klasor):
+                continue
+            for dosya in os.listdir(klasor):
+                if not dosya.endswith('.json'):
+                    continue
+                meta = self._meta_oku(os.path.join(klasor, dosya))
+                if meta and os.path.exists(self._yol(anahtar, meta['surum'], 'parquet')):
+                    kayitlar.append(meta)
+        return kayitlar
+
+    # -------------------------------
+    # KAYDET / LİSTELE / YÜKLE
+    # -------------------------------
+
+    def save(self, key, df, yukleyen=None, kaynak=None, kaynak_ozet=None, ek=None):
+        """
+        Veri setini kaydet (içerik aynıysa sadece metadata güncellenir)
+
+        Args:
+            key: Veri tanımı anahtarı (po_engine.VERI_TANIMLARI)
+            yukleyen: Kullanıcı adı
+            kaynak: Kaynak dosya adı(ları)
+            kaynak_ozet: Ham dosya baytlarının özeti - find_source ile eşleşir
+            ek: Veriyle birlikte saklanacak JSON uyumlu ek bilgi (meta['ek'])
+
+        Returns:
+            dict: metadata ('yeni' - dosya bu çağrıda mı yazıldı)
+        """
+        surum = hash_frame(df)
+        parquet_yol = self._yol(key, surum, 'parquet')
+        meta = self._meta_oku(self._yol(key, surum, 'json'))
+        yeni = meta is None or not os.path.exists(parquet_yol)
+
+        if yeni:
+            os.makedirs(os.path.dirname(parquet_yol), exist_ok=True)
+            gecici = f"{parquet_yol}.{os.getpid()}.tmp"
+            df.to_parquet(gecici, index=False)
+            os.replace(gecici, parquet_yol)
+            meta = {
+                'surum': surum,
+                'key': key,
+                'satir': int(len(df)),
+                'kolonlar': [str(k) for k in df.columns],
+                'boyut_bayt': os.path.getsize(parquet_yol),
+                'olusturma': _simdi(),
+                'yukleme_sayisi': 0,
+                'kaynak_ozetleri': []
+            }
+
+        meta['yukleyen'] = yukleyen
+        meta['kaynak'] = kaynak
+        meta['son_kullanim'] = _simdi()
+        meta['yukleme_sayisi'] += 1
+        if kaynak_ozet and kaynak_ozet not in meta['kaynak_ozetleri']:
+            meta['kaynak_ozetleri'].append(kaynak_ozet)
+        if ek is not None:
+            meta['ek'] = ek
+        self._meta_yaz(meta)
+
+        self.evict()
+        return {**meta, 'yeni': yeni}
+
+    def find_source(self, key, kaynak_ozet):
+        """Ham dosya özetiyle kaydedilmiş sürüm (yoksa None)"""
+        for meta in self._tum_meta(key):
+            if kaynak_ozet in meta.get('kaynak_ozetleri', []):
+                return meta
+        return None
+
+    def list_versions(self, key=None):
+        """
+        Kayıtlı sürümler - en son kullanılan önce
+
+        Returns:
+            DataFrame: key, surum, satir, boyut_mb, yukleyen, kaynak, olusturma,
+                son_kullanim, yukleme_sayisi
+        """
+        kolonlar = ['key', 'surum', 'satir', 'boyut_mb', 'yukleyen', 'kaynak',
+                    'olusturma', 'son_kullanim', 'yukleme_sayisi']
+        kayitlar = self._tum_meta(key)
+        if not kayitlar:
+            return pd.DataFrame(columns=kolonlar)
+
+        tablo = pd.DataFrame(kayitlar)
+        tablo['boyut_mb'] = (tablo['boyut_bayt'] / 2 ** 20).round(2)
+        return tablo.sort_values(['key', 'son_kullanim'], ascending=[True, False])[kolonlar].reset_index(drop=True)
+
+    def load(self, key, surum):
+        """Sürümü bellek eşlemeli (memory_map) okuyarak yükle, son kullanımı güncelle"""
+        df = pd.read_parquet(self._yol(key, surum, 'parquet'), memory_map=True)
+
+        meta = self._meta_oku(self._yol(key, surum, 'json'))
+        if meta is not None:
+            meta['son_kullanim'] = _simdi()
+            self._meta_yaz(meta)
+        return df
+
+    def delete(self, key, surum):
+        for uzanti in ('parquet', 'json'):
+            try:
+                os.remove(self._yol(key, surum, uzanti))
+            except FileNotFoundError:
+                pass
+
+    # -------------------------------
+    # SAKLAMA
+    # -------------------------------
+
+    def evict(self, simdi=None):
+        """
+        Saklama politikasına göre sürümleri sil: son kullanımı saklama_gun'den eski
+        veya anahtarın son max_surum sürümü dışında kalanlar (en son kullanılan hariç)
+
+        Returns:
+            list: Silinen (key, surum) çiftleri
+        """
+        sinir = ((simdi or datetime.now()) - timedelta(days=self.saklama_gun)).strftime(ZAMAN_FORMATI)
+
+        gruplar = {}
+        for meta in self._tum_meta():
+            gruplar.setdefault(meta['key'], []).append(meta)
+
+        silinen = []
+        for key, kayitlar in gruplar.items():
+            kayitlar.sort(key=lambda m: m['son_kullanim'], reverse=True)
+            for sira, meta in enumerate(kayitlar):
+                if sira == 0:
+                    continue
+                if sira >= self.max_surum or meta['son_kullanim'] < sinir:
+                    self.delete(key, meta['surum'])
+                    silinen.append((key, meta['surum']))
+        return silinen
@@ -7,7 +7,6 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import time
-import io
 import os
 import sys
 
@@ -33,6 +32,17 @@ except ImportError as e:
     st.info(f"Aranan yollar: {possible_paths}")
     st.stop()
 
+try:
+    from sevkiyat_engine import (
+        assign_cover_groups, compute_urun_cover, read_csv_advanced, normalize_columns,
+        run_shipment_calculation, compute_purchase_need, hash_bytes, PreprocessingCache,
+        run_scenario_sweep,
+        VARSAYILAN_COVER_GRUPLARI, VARSAYILAN_CARPAN_MATRISI
+    )
+except ImportError as e:
+    st.error(f"❌ Sevkiyat motoru yüklenemedi! Hata: {str(e)}")
+    st.stop()
+
 # ==================== AUTHENTICATION & TOKEN CONTROL ====================
 
 # Redirect to Home if not authenticated
@@ -197,34 +207,21 @@ with st.sidebar:
 # YARDIMCI FONKSİYONLAR
 # -------------------------------
 
-def read_csv_advanced(uploaded_file):
-    """Gelişmiş CSV okuma fonksiyonu"""
-    try:
-        uploaded_file.seek(0)
-        return pd.read_csv(uploaded_file, encoding='utf-8')
-    except:
-        try:
-            uploaded_file.seek(0)
-            return pd.read_csv(uploaded_file, encoding='iso-8859-9')
-        except:
-            content = uploaded_file.getvalue().decode('utf-8', errors='ignore')
-            delimiters = [',', ';', '\t', '|']
-            for delimiter in delimiters:
-                try:
-                    df = pd.read_csv(io.StringIO(content), delimiter=delimiter)
-                    if len(df.columns) > 1:
-                        return df
-                except:
-                    continue
-            return pd.read_csv(io.StringIO(content), delimiter=',')
-
-def normalize_columns(df):
-    """Kolon isimlerini standardize et"""
-    if df.empty:
-        return df
-    df.columns = df.columns.str.strip().str.lower()
-    df.columns = df.columns.str.replace('[^a-z0-9_]', '_', regex=True)
-    return df
+def streamlit_progress():
+    """Motorun ilerleme geri çağrısını Streamlit bileşenlerine bağla"""
+    bilesenler = {}
+    
+    def progress(mesaj, seviye='info', oran=None):
+        if oran is None:
+            getattr(st, seviye)(mesaj)
+            return
+        if not bilesenler:
+            bilesenler['bar'] = st.progress(0)
+            bilesenler['text'] = st.empty()
+        bilesenler['bar'].progress(int(oran * 100))
+        bilesenler['text'].text(mesaj)
+    
+    return progress
 
 def get_carpan_from_matrix(magaza_cover_grubu, urun_cover_grubu, carpan_matrisi=None):
     """Matristen çarpan değerini al - GÜVENLİ VERSİYON"""
@@ -237,38 +234,6 @@ def get_carpan_from_matrix(magaza_cover_grubu, urun_cover_grubu, carpan_matrisi=
     except:
         return 1.0
 
-def calculate_urun_cover(haftalik_satis, mevcut_stok, yolda=0):
-    """Ürün cover'ını DOĞRU şekilde hesapla - YOLDA STOĞU ÇIKARMA"""
-    try:
-        if haftalik_satis is None or haftalik_satis <= 0:
-            return 999  # Satış yoksa yüksek cover
-        
-        # Stok değerlerini kontrol et - YOLDA STOĞU ÇIKARMA (doğru olan bu)
-        mevcut_stok = mevcut_stok if mevcut_stok is not None else 0
-        
-        # DÜZELTME: Yolda stoğu çıkarmıyoruz, çünkü zaten mağazada değil
-        total_stok = mevcut_stok
-        
-        if total_stok <= 0:
-            return 0  # Stok yoksa cover 0
-        
-        cover = total_stok / haftalik_satis
-        return round(float(cover), 2)
-    except:
-        return 999
-
-def get_cover_grubu_adi(cover_value, cover_gruplari):
-    """Cover değerine göre grup adını doğru şekilde bul"""
-    try:
-        cover_value = float(cover_value)
-        for grup in cover_gruplari:
-            if grup['min'] <= cover_value <= grup['max']:
-                return grup['etiket']
-        # Varsayılan olarak en yüksek grup
-        return "20+"
-    except:
-        return "20+"
-
 # -------------------------------
 # COVER GRUPLARI ve MATRİS YÖNETİMİ (DÜZELTMELİ)
 # -------------------------------
@@ -277,22 +242,10 @@ def manage_cover_groups_and_matrix():
     st.header("📊 Parametre Ayarları")
     
     # Varsayılan cover grupları
-    default_cover_data = [
-        {"min": 0, "max": 4, "etiket": "0-4"},
-        {"min": 5, "max": 8, "etiket": "5-8"},
-        {"min": 9, "max": 12, "etiket": "9-12"},
-        {"min": 13, "max": 20, "etiket": "13-20"},
-        {"min": 21, "max": 999, "etiket": "20+"}
-    ]
+    default_cover_data = [dict(g) for g in VARSAYILAN_COVER_GRUPLARI]
     
     # Varsayılan sevkiyat matrisi
-    default_matrix = {
-        "0-4": {"0-4": 1.2, "5-8": 1.1, "9-12": 1.0, "13-20": 1.0, "20+": 0.9},
-        "5-8": {"0-4": 1.1, "5-8": 1.0, "9-12": 1.0, "13-20": 0.9, "20+": 0.8},
-        "9-12": {"0-4": 1.0, "5-8": 1.0, "9-12": 0.9, "13-20": 0.8, "20+": 0.7},
-        "13-20": {"0-4": 1.0, "5-8": 0.9, "9-12": 0.8, "13-20": 0, "20+": 0},
-        "20+": {"0-4": 1.0, "5-8": 0.9, "9-12": 0.8, "13-20": 0, "20+": 0}
-    }
+    default_matrix = {k: dict(v) for k, v in VARSAYILAN_CARPAN_MATRISI.items()}
     
     # Varsayılan ALIM matrisi
     default_alim_matrix = {
@@ -632,17 +585,21 @@ def create_file_upload_section():
     uploaded_files = st.file_uploader("**CSV dosyalarınızı seçin**", type=["csv"], accept_multiple_files=True)
     
     file_data = {}
+    file_hashes = {}
     
     if uploaded_files:
         for uploaded_file in uploaded_files:
             try:
                 df = read_csv_advanced(uploaded_file)
                 file_data[uploaded_file.name] = df
+                file_hashes[uploaded_file.name] = hash_bytes(uploaded_file.getvalue())
                 st.success(f"✅ {uploaded_file.name} - {len(df.columns)} kolon, {len(df)} satır")
                 
             except Exception as e:
                 st.error(f"❌ {uploaded_file.name} okunamadı: {e}")
     
+    # Ön işleme önbelleği anahtarı için dosya içerik özetleri
+    st.session_state.file_hashes = file_hashes
     return file_data
 
 # -------------------------------
@@ -650,99 +607,17 @@ def create_file_upload_section():
 # -------------------------------
 def calculate_purchase_need(sevk_df, total_sevk, original_sevkiyat_df, depo_stok_df):
     """
-    Karşılanamayan ihtiyaçları hesapla - BASİT VERSİYON
+    Karşılanamayan ihtiyaçları hesapla - hesap sevkiyat_engine.compute_purchase_need'de
+    depo_stok_df: Depo stok DataFrame'i veya dağıtım sonrası DepotStockLedger
     """
     try:
-        if original_sevkiyat_df.empty:
-            return pd.DataFrame()
-        
-        # Orijinal sevkiyat verisini kopyala
-        sevkiyat_df = original_sevkiyat_df.copy()
-        
-        # Sevkiyat miktarını birleştir
-        if not sevk_df.empty and 'sevk_miktar' in sevk_df.columns:
-            sevk_toplam = sevk_df.groupby(['depo_id', 'magaza_id', 'urun_id'])['sevk_miktar'].sum().reset_index()
-            sevkiyat_df = pd.merge(
-                sevkiyat_df,
-                sevk_toplam,
-                on=['depo_id', 'magaza_id', 'urun_id'],
-                how='left'
-            )
-            sevkiyat_df['sevk_miktar'] = sevkiyat_df['sevk_miktar'].fillna(0)
-        else:
-            sevkiyat_df['sevk_miktar'] = 0
-        
-        # İhtiyaç hesapla (eğer yoksa)
-        if 'ihtiyac' not in sevkiyat_df.columns:
-            sevkiyat_df['ihtiyac'] = (
-                (sevkiyat_df['haftalik_satis'] * sevkiyat_df.get('hedef_hafta', 4)) - 
-                (sevkiyat_df['mevcut_stok'] + sevkiyat_df.get('yolda', 0))
-            ).clip(lower=0)
-        
-        # Kalan ihtiyaç = ihtiyaç - sevk_miktar
-        sevkiyat_df["kalan_ihtiyac"] = (sevkiyat_df["ihtiyac"] - sevkiyat_df["sevk_miktar"]).clip(lower=0)
-        
-        # Depo stok bilgilerini ekle
-        if not depo_stok_df.empty:
-            depo_stok_toplam = depo_stok_df.groupby(['depo_id', 'urun_id'])['depo_stok'].sum().reset_index()
-            sevkiyat_df = pd.merge(
-                sevkiyat_df,
-                depo_stok_toplam,
-                on=['depo_id', 'urun_id'],
-                how='left'
-            )
-            sevkiyat_df['depo_stok'] = sevkiyat_df['depo_stok'].fillna(0)
-        else:
-            sevkiyat_df['depo_stok'] = 0
-
-        # Karşılanamayan ve depoda stok olmayanları filtrele
-        alim_siparis_df = sevkiyat_df[
-            (sevkiyat_df["kalan_ihtiyac"] > 0) & (sevkiyat_df["depo_stok"] <= 0)
-        ].copy()
-
-        if alim_siparis_df.empty:
-            st.info("ℹ️ Alım ihtiyacı bulunmamaktadır.")
-            return pd.DataFrame()
-
-        # BASİT HESAP: Alım miktarı = kalan ihtiyaç
-        alim_siparis_df['alim_siparis_miktari'] = alim_siparis_df['kalan_ihtiyac']
-
-        # Ürün bazında toplam alım siparişi
-        alim_siparis_toplam = alim_siparis_df.groupby(
-            ["depo_id", "urun_id", "klasmankod"], as_index=False
-        ).agg({
-            'alim_siparis_miktari': 'sum',
-            'kalan_ihtiyac': 'sum',
-            'ihtiyac': 'first',
-            'depo_stok': 'first',
-            'haftalik_satis': 'first'
-        })
-
-        # Ürün adını ekle
-        if 'urunler_df' in st.session_state and not st.session_state.urunler_df.empty:
-            urunler_df = st.session_state.urunler_df.copy()
-            urunler_df['urun_id'] = urunler_df['urun_id'].astype(str).str.strip()
-            alim_siparis_toplam['urun_id'] = alim_siparis_toplam['urun_id'].astype(str).str.strip()
-            if 'urun_adi' in urunler_df.columns:
-                alim_siparis_toplam = pd.merge(
-                    alim_siparis_toplam,
-                    urunler_df[['urun_id', 'urun_adi']],
-                    on='urun_id',
-                    how='left'
-                )
-        
-        if 'urun_adi' not in alim_siparis_toplam.columns:
-            alim_siparis_toplam['urun_adi'] = "Ürün " + alim_siparis_toplam['urun_id'].astype(str)
-        
-        # Cover bilgilerini ekle
-        alim_siparis_toplam['toplam_ihtiyac_cover'] = (
-            alim_siparis_toplam['alim_siparis_miktari'] / alim_siparis_toplam['haftalik_satis']
-        ).round(1)
-        
-        # Sıralama
-        alim_siparis_toplam = alim_siparis_toplam.sort_values('alim_siparis_miktari', ascending=False)
-        
-        return alim_siparis_toplam
+        return compute_purchase_need(
+            sevk_df,
+            original_sevkiyat_df,
+            depo_stok_df,
+            urunler_df=st.session_state.get('urunler_df'),
+            progress=streamlit_progress()
+        )
     
     except Exception as e:
         st.error(f"Alım ihtiyacı hesaplanırken hata: {str(e)}")
@@ -756,399 +631,56 @@ def calculate_purchase_need(sevk_df, total_sevk, original_sevkiyat_df, depo_stok
 # -------------------------------
 
 def calculate_shipment_optimized(file_data, params, cover_gruplari):
-    # Dosyaları yükle
-    sevk_df, depo_stok_df, urunler_df, magazalar_df, cover_df, kpi_df = None, None, None, None, None, None
-    
-    for name, df in file_data.items():
-        name_lower = name.lower()
-        if "sevkiyat" in name_lower:
-            sevk_df = df.copy()
-            st.info(f"📊 Sevkiyat dosyası: {len(sevk_df)} satır")
-        elif "depo" in name_lower and "stok" in name_lower:
-            depo_stok_df = df.copy()
-            st.info(f"📦 Depo stok dosyası: {len(depo_stok_df)} satır")
-        elif "urun" in name_lower:
-            urunler_df = df.copy()
-            st.info(f"🏷️ Ürünler dosyası: {len(urunler_df)} satır")
-            st.session_state.urunler_df = urunler_df
-        elif "magaza" in name_lower:
-            magazalar_df = df.copy()
-            st.info(f"🏪 Mağazalar dosyası: {len(magazalar_df)} satır")
-            st.session_state.magazalar_df = magazalar_df
-        elif "cover" in name_lower:
-            cover_df = df.copy()
-            st.info(f"📈 Cover dosyası: {len(cover_df)} satır")
-        elif "kpi" in name_lower:
-            kpi_df = df.copy()
-            st.info(f"🎯 KPI dosyası: {len(kpi_df)} satır")
-    
-    if sevk_df is None or depo_stok_df is None:
-        raise Exception("Zorunlu dosyalar (Sevkiyat.csv, Depo_Stok.csv) eksik!")
-    
-    # Orijinal sevkiyat df'ini kaydet (alım ihtiyacı için)
-    original_sevkiyat_df = sevk_df.copy()
-    
-    # Kolon normalizasyonu
-    sevk_df = normalize_columns(sevk_df)
-    depo_stok_df = normalize_columns(depo_stok_df)
-    original_sevkiyat_df = normalize_columns(original_sevkiyat_df)
-    
-    # Zorunlu kolon kontrolü
-    required_sevk = ['depo_id', 'urun_id', 'magaza_id', 'haftalik_satis', 'mevcut_stok', 'klasmankod']
-    missing_cols = [col for col in required_sevk if col not in sevk_df.columns]
-    if missing_cols:
-        raise Exception(f"Sevkiyat.csv'de eksik kolonlar: {missing_cols}")
-    
-    # yolda kolonu kontrolü
-    if 'yolda' not in sevk_df.columns:
-        sevk_df['yolda'] = 0
-        original_sevkiyat_df['yolda'] = 0
-        st.info("ℹ️ 'yolda' kolonu eklenerek 0 değeri atandı")
-    
-    # VERİ TİPLERİNİ KESİNLİKLE DÖNÜŞTÜR
-    st.info("🔄 Veri tipleri kontrol ediliyor...")
-    numeric_cols = ['haftalik_satis', 'mevcut_stok', 'yolda', 'cover', 'hedef_hafta', 'min_adet', 'maks_adet']
-    for col in numeric_cols:
-        if col in sevk_df.columns:
-            sevk_df[col] = pd.to_numeric(sevk_df[col], errors='coerce').fillna(0).astype(float)
-        if col in original_sevkiyat_df.columns:
-            original_sevkiyat_df[col] = pd.to_numeric(original_sevkiyat_df[col], errors='coerce').fillna(0).astype(float)
-    
-    # ÖNEMLİ: Sıfır ve negatif satış değerlerini düzelt
-    sevk_df['haftalik_satis'] = sevk_df['haftalik_satis'].apply(lambda x: max(0.1, x))  # En az 0.1
-    original_sevkiyat_df['haftalik_satis'] = original_sevkiyat_df['haftalik_satis'].apply(lambda x: max(0.1, x))
-    
-    # Cover dosyasını işle
-    if cover_df is not None and not cover_df.empty:
-        cover_df = normalize_columns(cover_df)
-        if 'magaza_id' in cover_df.columns and 'cover' in cover_df.columns:
-            cover_df = cover_df[['magaza_id', 'cover']].drop_duplicates()
-            cover_df['magaza_id'] = cover_df['magaza_id'].astype(str).str.strip()
-            sevk_df['magaza_id'] = sevk_df['magaza_id'].astype(str).str.strip()
-            original_sevkiyat_df['magaza_id'] = original_sevkiyat_df['magaza_id'].astype(str).str.strip()
-            
-            sevk_df = sevk_df.merge(cover_df, on='magaza_id', how='left')
-            original_sevkiyat_df = original_sevkiyat_df.merge(cover_df, on='magaza_id', how='left')
-            st.success("✅ Mağaza cover verileri eklendi")
-        else:
-            st.warning("⚠️ Cover dosyasında gerekli kolonlar bulunamadı")
-            sevk_df['cover'] = 999
-            original_sevkiyat_df['cover'] = 999
-    else:
-        st.warning("⚠️ Cover dosyası bulunamadı, varsayılan cover=999")
-        sevk_df['cover'] = 999
-        original_sevkiyat_df['cover'] = 999
-    
-    # Cover değerlerini temizle
-    sevk_df['cover'] = pd.to_numeric(sevk_df['cover'], errors='coerce').fillna(999)
-    original_sevkiyat_df['cover'] = pd.to_numeric(original_sevkiyat_df['cover'], errors='coerce').fillna(999)
-    
-    # KPI dosyasını işle - EĞER KPI DOSYASI YOKSA PARAMETRELERDEN KULLAN
-    kpi_loaded = False
-    if kpi_df is not None and not kpi_df.empty:
-        kpi_df = normalize_columns(kpi_df)
-        if 'klasmankod' in kpi_df.columns:
-            kpi_df['klasmankod'] = kpi_df['klasmankod'].astype(str).str.strip()
-            sevk_df['klasmankod'] = sevk_df['klasmankod'].astype(str).str.strip()
-            original_sevkiyat_df['klasmankod'] = original_sevkiyat_df['klasmankod'].astype(str).str.strip()
-            
-            kpi_cols = ['klasmankod']
-            for col in ['hedef_hafta', 'min_adet', 'maks_adet']:
-                if col in kpi_df.columns:
-                    kpi_cols.append(col)
-            
-            sevk_df = sevk_df.merge(kpi_df[kpi_cols], on='klasmankod', how='left')
-            original_sevkiyat_df = original_sevkiyat_df.merge(kpi_df[kpi_cols], on='klasmankod', how='left')
-            st.success("✅ KPI verileri eklendi (KPI.csv kullanılıyor)")
-            kpi_loaded = True
-        else:
-            st.warning("⚠️ KPI dosyasında klasmankod bulunamadı")
-    else:
-        st.warning("⚠️ KPI dosyası bulunamadı, parametrelerden alınan değerler kullanılacak")
-    
-    # Eksik KPI değerlerini doldur
-    if not kpi_loaded:
-        sevk_df['hedef_hafta'] = params['hedef_hafta']
-        sevk_df['min_adet'] = params['min_adet']
-        sevk_df['maks_adet'] = params['maks_adet']
-        
-        original_sevkiyat_df['hedef_hafta'] = params['hedef_hafta']
-        original_sevkiyat_df['min_adet'] = params['min_adet']
-        original_sevkiyat_df['maks_adet'] = params['maks_adet']
-        st.info("ℹ️ Parametrelerden alınan değerler kullanılıyor")
-    else:
-        sevk_df['hedef_hafta'] = sevk_df.get('hedef_hafta', params['hedef_hafta'])
-        sevk_df['min_adet'] = sevk_df.get('min_adet', params['min_adet'])
-        sevk_df['maks_adet'] = sevk_df.get('maks_adet', params['maks_adet'])
-        
-        original_sevkiyat_df['hedef_hafta'] = original_sevkiyat_df.get('hedef_hafta', params['hedef_hafta'])
-        original_sevkiyat_df['min_adet'] = original_sevkiyat_df.get('min_adet', params['min_adet'])
-        original_sevkiyat_df['maks_adet'] = original_sevkiyat_df.get('maks_adet', params['maks_adet'])
-    
-    # YENİ: Ürün cover'ını HATA KONTROLLÜ hesapla - YOLDA STOĞU ÇIKARMA
-    st.info("🔄 Ürün cover değerleri hesaplanıyor...")
-    
-    # Hata kontrolü ile ürün cover hesaplama - YOLDA STOĞU ÇIKARMA
-    def safe_urun_cover(row):
-        try:
-            return calculate_urun_cover(
-                row.get('haftalik_satis', 0), 
-                row.get('mevcut_stok', 0), 
-                row.get('yolda', 0)
-            )
-        except:
-            return 999
-    
-    sevk_df['urun_cover'] = sevk_df.apply(safe_urun_cover, axis=1)
-    original_sevkiyat_df['urun_cover'] = original_sevkiyat_df.apply(safe_urun_cover, axis=1)
-    
-    # Cover gruplarını detaylı şekilde belirle
-    def detailed_cover_group(cover_value, gruplar):
-        try:
-            cover_value = float(cover_value)
-            for i, grup in enumerate(gruplar):
-                if grup['min'] <= cover_value <= grup['max']:
-                    return grup['etiket']
-            return "20+"
-        except:
-            return "20+"
-    
-    sevk_df['magaza_cover_grubu'] = sevk_df['cover'].apply(
-        lambda x: detailed_cover_group(x, cover_gruplari)
-    )
-    sevk_df['urun_cover_grubu'] = sevk_df['urun_cover'].apply(
-        lambda x: detailed_cover_group(x, cover_gruplari)
+    """Hesaplama sevkiyat_engine.run_shipment_calculation'da - burada sadece session state ve ekran"""
+    # Matris / min-maks adet değişikliklerinde ön işleme tekrar yapılmaz
+    if 'hazirlik_cache' not in st.session_state:
+        st.session_state.hazirlik_cache = PreprocessingCache()
+    
+    sonuc = run_shipment_calculation(
+        file_data,
+        params,
+        cover_gruplari,
+        st.session_state.get('carpan_matrisi', {}),
+        progress=streamlit_progress(),
+        cache=st.session_state.hazirlik_cache,
+        file_hashes=st.session_state.get('file_hashes')
     )
     
-    # Cover 30'dan küçük olanları filtrele
-    df_filtered = sevk_df[sevk_df['cover'] <= 50].copy()
-    st.info(f"ℹ️ Mağaza cover ≤ 50 olan {len(df_filtered)} satır işlenecek (toplam: {len(sevk_df)})")
-    
-    # İhtiyaç hesabı - YOLDA STOĞU EKLE (doğru olan bu)
-    df_filtered["ihtiyac"] = (
-        (df_filtered["haftalik_satis"] * df_filtered["hedef_hafta"]) - 
-        (df_filtered["mevcut_stok"] + df_filtered["yolda"])
-    ).clip(lower=0)
-    
-    # Orijinal df'e ihtiyaç ekle - YOLDA STOĞU EKLE (doğru olan bu)
-    original_sevkiyat_df["ihtiyac"] = (
-        (original_sevkiyat_df["haftalik_satis"] * original_sevkiyat_df['hedef_hafta']) - 
-        (original_sevkiyat_df["mevcut_stok"] + original_sevkiyat_df['yolda'])
-    ).clip(lower=0)
-    
-    # Sıralama - YENİ: Önce ürün cover'a göre sırala
-    df_sorted = df_filtered.sort_values(by=["urun_id", "urun_cover", "haftalik_satis"], ascending=[True, True, False]).copy()
-    
-    sevk_listesi = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    # Cover gruplarını PARAMETRELERDEN AL
-    cover_gruplari_sirali = sorted(cover_gruplari, key=lambda x: x['min'])
-    cover_gruplari_etiketler = [g['etiket'] for g in cover_gruplari_sirali]
-    
-    st.info(f"ℹ️ Kullanılan cover grupları: {cover_gruplari_etiketler}")
-    
-    # Tüm olası kombinasyonları oluştur
-    all_combinations = []
-    for magaza_grubu in cover_gruplari_etiketler:
-        for urun_grubu in cover_gruplari_etiketler:
-            all_combinations.append((magaza_grubu, urun_grubu))
-    
-    st.info(f"ℹ️ Toplam {len(all_combinations)} kombinasyon işlenecek")
+    if sonuc['urunler_df'] is not None:
+        st.session_state.urunler_df = sonuc['urunler_df']
+    if sonuc['magazalar_df'] is not None:
+        st.session_state.magazalar_df = sonuc['magazalar_df']
     
     # Debug: Her kombinasyon için veri sayısını göster - TÜM GRUPLARI GÖSTER
     st.write("🔍 Kombinasyon Dağılımı:")
-    dagilim_df = pd.DataFrame(columns=['Mağaza Grubu', 'Ürün Grubu', 'Kayıt Sayısı'])
-    
-    for magaza_grubu in cover_gruplari_etiketler:
-        for urun_grubu in cover_gruplari_etiketler:
-            count = len(df_sorted[
-                (df_sorted['magaza_cover_grubu'] == magaza_grubu) & 
-                (df_sorted['urun_cover_grubu'] == urun_grubu)
-            ])
-            dagilim_df = pd.concat([dagilim_df, pd.DataFrame({
-                'Mağaza Grubu': [magaza_grubu],
-                'Ürün Grubu': [urun_grubu],
-                'Kayıt Sayısı': [count]
-            })], ignore_index=True)
-    
-    # Tüm kombinasyonları tablo olarak göster
-    pivot_dagilim = dagilim_df.pivot(index='Mağaza Grubu', columns='Ürün Grubu', values='Kayıt Sayısı').fillna(0)
-    st.dataframe(pivot_dagilim, use_container_width=True)
-    
-    depo_urun_gruplari = list(df_sorted.groupby(["depo_id", "urun_id"]))
-    total_groups = len(depo_urun_gruplari) * len(all_combinations)
-    processed_groups = 0
-    
-    # Matrisi güvenli şekilde kullan
-    def safe_get_carpan(magaza_cover_grubu, urun_cover_grubu):
-        try:
-            # Session state'den matrisi al
-            carpan_matrisi = st.session_state.get('carpan_matrisi', {})
-            return carpan_matrisi.get(magaza_cover_grubu, {}).get(urun_cover_grubu, 1.0)
-        except:
-            return 1.0
-    
-    # YENİ: Matris tabanlı işleme - TÜM GRUPLARI İŞLE
-    for magaza_cover_grubu in cover_gruplari_etiketler:
-        status_text.text(f"⏳ Mağaza {magaza_cover_grubu} Grubu İşleniyor...")
-        magaza_grup_df = df_sorted[df_sorted["magaza_cover_grubu"] == magaza_cover_grubu]
-        
-        if magaza_grup_df.empty:
-            processed_groups += len(depo_urun_gruplari) * len(cover_gruplari_etiketler)
-            progress_bar.progress(min(100, int(100 * processed_groups / total_groups)))
-            continue
-        
-        for urun_cover_grubu in cover_gruplari_etiketler:
-            status_text.text(f"⏳ Mağaza {magaza_cover_grubu} × Ürün {urun_cover_grubu}...")
-            grup_df = magaza_grup_df[magaza_grup_df["urun_cover_grubu"] == urun_cover_grubu]
-            
-            if grup_df.empty:
-                processed_groups += len(depo_urun_gruplari)
-                progress_bar.progress(min(100, int(100 * processed_groups / total_groups)))
-                continue
-            
-            for (depo, urun), tum_grup in depo_urun_gruplari:
-                grup = tum_grup[
-                    (tum_grup["magaza_cover_grubu"] == magaza_cover_grubu) & 
-                    (tum_grup["urun_cover_grubu"] == urun_cover_grubu)
-                ]
-                
-                if grup.empty:
-                    processed_groups += 1
-                    progress_bar.progress(min(100, int(100 * processed_groups / total_groups)))
-                    continue
-                
-                # Depo stok kontrolü
-                stok_idx = (depo_stok_df["depo_id"] == depo) & (depo_stok_df["urun_id"] == urun)
-                stok = int(depo_stok_df.loc[stok_idx, "depo_stok"].sum()) if stok_idx.any() else 0
-                
-                if stok <= 0:
-                    processed_groups += 1
-                    progress_bar.progress(min(100, int(100 * processed_groups / total_groups)))
-                    continue
-                
-                # YENİ: Matristen çarpan al - GÜVENLİ VERSİYON
-                carpan = safe_get_carpan(magaza_cover_grubu, urun_cover_grubu)
-                
-                # TUR 1: İhtiyaç bazlı sevkiyat
-                for _, row in grup.iterrows():
-                    min_adet = row["min_adet"]
-                    MAKS_SEVK = row["maks_adet"]
-                    ihtiyac = row["ihtiyac"]
-                    
-                    ihtiyac_carpanli = ihtiyac * carpan
-                    
-                    sevk = int(min(ihtiyac_carpanli, stok, MAKS_SEVK)) if stok > 0 and ihtiyac_carpanli > 0 else 0
-                    
-                    if sevk > 0:
-                        stok -= sevk
-                        sevk_listesi.append({
-                            "depo_id": depo, "magaza_id": row["magaza_id"], "urun_id": urun,
-                            "klasmankod": row["klasmankod"], "tur": 1, 
-                            "magaza_cover_grubu": magaza_cover_grubu,
-                            "urun_cover_grubu": urun_cover_grubu,
-                            "ihtiyac": ihtiyac, "ihtiyac_carpanli": ihtiyac_carpanli, 
-                            "carpan": carpan, "yolda": row["yolda"], "sevk_miktar": sevk,
-                            "haftalik_satis": row["haftalik_satis"], "mevcut_stok": row["mevcut_stok"],
-                            "cover": row["cover"], "urun_cover": row["urun_cover"],
-                            "min_adet": min_adet, "maks_adet": MAKS_SEVK, "hedef_hafta": row["hedef_hafta"]
-                        })
-                
-                # TUR 2: Min stok tamamlama (düşük cover olanlar için)
-                if stok > 0:
-                    for _, row in grup.iterrows():
-                        if row["cover"] >= 12 and row["urun_cover"] >= 12:
-                            continue
-                            
-                        min_adet = row["min_adet"]
-                        MAKS_SEVK = row["maks_adet"]
-                        mevcut = row["mevcut_stok"] + row["yolda"]
-                        eksik_min = max(0, min_adet - mevcut)
-                        
-                        eksik_min_carpanli = eksik_min * carpan
-                        
-                        sevk2 = int(min(eksik_min_carpanli, stok, MAKS_SEVK)) if eksik_min_carpanli > 0 else 0
-                        
-                        if sevk2 > 0:
-                            stok -= sevk2
-                            sevk_listesi.append({
-                                "depo_id": depo, "magaza_id": row["magaza_id"], "urun_id": urun,
-                                "klasmankod": row["klasmankod"], "tur": 2,
-                                "magaza_cover_grubu": magaza_cover_grubu,
-                                "urun_cover_grubu": urun_cover_grubu,
-                                "ihtiyac": row["ihtiyac"], "ihtiyac_carpanli": row["ihtiyac"] * carpan,
-                                "carpan": carpan, "yolda": row["yolda"], "sevk_miktar": sevk2,
-                                "haftalik_satis": row["haftalik_satis"], "mevcut_stok": row["mevcut_stok"],
-                                "cover": row["cover"], "urun_cover": row["urun_cover"],
-                                "min_adet": min_adet, "maks_adet": MAKS_SEVK, "hedef_hafta": row["hedef_hafta"]
-                            })
-                
-                # Depo stok güncelleme
-                if stok_idx.any():
-                    if stok_idx.sum() == 1:
-                        depo_stok_df.loc[stok_idx, "depo_stok"] = stok
-                    else:
-                        first_match_idx = stok_idx.idxmax()
-                        depo_stok_df.loc[first_match_idx, "depo_stok"] = stok
-                
-                processed_groups += 1
-                progress_bar.progress(min(100, int(100 * processed_groups / total_groups)))
-            
-            st.write(f"✅ {magaza_cover_grubu} × {urun_cover_grubu} kombinasyonu tamamlandı")
-    
-    progress_bar.progress(100)
-    status_text.text("✅ Hesaplama tamamlandı")
-    
-    # Sonuçları birleştir
-    if sevk_listesi:
-        sevk_df_result = pd.DataFrame(sevk_listesi)
-        
-        # Grup bazında toplam sevkiyat
-        total_sevk = sevk_df_result.groupby(
-            ["depo_id", "magaza_id", "urun_id", "klasmankod", "magaza_cover_grubu", "urun_cover_grubu"], as_index=False
-        ).agg({
-            "sevk_miktar": "sum", "yolda": "first", "haftalik_satis": "first",
-            "ihtiyac": "first", "mevcut_stok": "first", "cover": "first",
-            "urun_cover": "first", "carpan": "first", "min_adet": "first", 
-            "maks_adet": "first", "hedef_hafta": "first", "tur": "first"
-        })
-        
-        # Min tamamlama (tur2) istatistiklerini hesapla
-        min_tamamlama = sevk_df_result[sevk_df_result['tur'] == 2]['sevk_miktar'].sum()
-        toplam_sevk = sevk_df_result['sevk_miktar'].sum()
-        min_yuzde = (min_tamamlama / toplam_sevk * 100) if toplam_sevk > 0 else 0
-        
-        st.session_state.min_tamamlama = min_tamamlama
-        st.session_state.min_yuzde = min_yuzde
-        st.session_state.toplam_sevk = toplam_sevk
-        st.session_state.sevk_df_result = sevk_df_result
-        
+    st.dataframe(sonuc['pivot_dagilim'], use_container_width=True)
+    
+    depo_sureleri = sonuc['depo_sureleri']
+    st.session_state.depo_sureleri = depo_sureleri
+    if not depo_sureleri.empty:
+        st.write("⏱️ Depo Bazlı Dağıtım Süreleri:")
+        st.dataframe(depo_sureleri, use_container_width=True)
+    
+    st.session_state.depo_stok_ledger = sonuc['depo_stok_ledger']
+    st.session_state.min_tamamlama = sonuc['min_tamamlama']
+    st.session_state.min_yuzde = sonuc['min_yuzde']
+    st.session_state.toplam_sevk = sonuc['toplam_sevk']
+    st.session_state.sevk_df_result = sonuc['sevk_df_result']
+    
+    sevk_df_result = sonuc['sevk_df_result']
+    if not sevk_df_result.empty:
         # Debug: Sonuçları göster - TÜM GRUPLARI GÖSTER
         st.write("🎯 Hesaplama Sonuçları - Grup Dağılımı:")
-        grup_dagilim = sevk_df_result.groupby(['magaza_cover_grubu', 'urun_cover_grubu']).agg({
-            'sevk_miktar': 'sum',
-            'magaza_id': 'nunique'
-        }).reset_index()
-        
-        st.dataframe(grup_dagilim, use_container_width=True)
-        
-        st.write(f"   - Toplam sevkiyat: {toplam_sevk:,} adet")
-        st.write(f"   - Min tamamlama (Tur2): {min_tamamlama:,} adet")
-        st.write(f"   - Min yüzdesi: {min_yuzde:.1f}%")
-        st.write(f"   - Toplam işlem: {len(sevk_listesi)} sevkiyat kaydı")
+        st.dataframe(sonuc['grup_dagilim'], use_container_width=True)
         
+        st.write(f"   - Toplam sevkiyat: {sonuc['toplam_sevk']:,} adet")
+        st.write(f"   - Min tamamlama (Tur2): {sonuc['min_tamamlama']:,} adet")
+        st.write(f"   - Min yüzdesi: {sonuc['min_yuzde']:.1f}%")
+        st.write(f"   - Toplam işlem: {len(sevk_df_result)} sevkiyat kaydı")
     else:
-        sevk_df_result = pd.DataFrame()
-        total_sevk = pd.DataFrame()
-        st.session_state.min_tamamlama = 0
-        st.session_state.min_yuzde = 0
-        st.session_state.toplam_sevk = 0
-        st.session_state.sevk_df_result = pd.DataFrame()
         st.warning("⚠️ Hiç sevkiyat kaydı oluşturulamadı!")
     
-    return sevk_df_result, total_sevk, depo_stok_df, original_sevkiyat_df
+    return sevk_df_result, sonuc['total_sevk'], sonuc['depo_stok_df'], sonuc['original_sevkiyat_df']
         
 # -------------------------------
 # RAPORLAR SAYFASI (GÜNCELLENMİŞ VE GENİŞLETİLMİŞ)
@@ -1205,7 +737,7 @@ def show_reports():
         # Matris bazlı analiz
         if not sevk_df_result.empty:
             st.subheader("🎯 Matris Bazlı Dağılım")
-            matris_dagilim = sevk_df_result.groupby(['magaza_cover_grubu', 'urun_cover_grubu']).agg({
+            matris_dagilim = sevk_df_result.groupby(['magaza_cover_grubu', 'urun_cover_grubu'], observed=True).agg({
                 'sevk_miktar': 'sum',
                 'magaza_id': 'nunique',
                 'urun_id': 'nunique',
@@ -1223,7 +755,7 @@ def show_reports():
         
         if not total_sevk.empty:
             # Mağaza bazlı özet
-            magaza_analiz = total_sevk.groupby(['magaza_id', 'magaza_cover_grubu']).agg({
+            magaza_analiz = total_sevk.groupby(['magaza_id', 'magaza_cover_grubu'], observed=True).agg({
                 'sevk_miktar': 'sum',
                 'ihtiyac': 'sum',
                 'cover': 'first',
@@ -1252,7 +784,7 @@ def show_reports():
             
             # Mağaza Cover Grubu bazlı analiz
             st.subheader("🏪 Mağaza Cover Grubu Bazlı Analiz")
-            magaza_grup_analiz = magaza_analiz.groupby('magaza_cover_grubu').agg({
+            magaza_grup_analiz = magaza_analiz.groupby('magaza_cover_grubu', observed=True).agg({
                 'magaza_id': 'nunique',
                 'sevk_miktar': 'sum',
                 'ihtiyac': 'sum',
@@ -1272,7 +804,7 @@ def show_reports():
         
         if not total_sevk.empty:
             # Ürün bazlı özet
-            urun_analiz = total_sevk.groupby(['urun_id', 'urun_cover_grubu']).agg({
+            urun_analiz = total_sevk.groupby(['urun_id', 'urun_cover_grubu'], observed=True).agg({
                 'sevk_miktar': 'sum',
                 'ihtiyac': 'sum',
                 'magaza_id': 'nunique',
@@ -1303,7 +835,7 @@ def show_reports():
             
             # Ürün Cover Grubu bazlı analiz
             st.subheader("📦 Ürün Cover Grubu Bazlı Analiz")
-            urun_grup_analiz = urun_analiz.groupby('urun_cover_grubu').agg({
+            urun_grup_analiz = urun_analiz.groupby('urun_cover_grubu', observed=True).agg({
                 'urun_id': 'nunique',
                 'sevk_miktar': 'sum',
                 'ihtiyac': 'sum',
@@ -1313,7 +845,7 @@ def show_reports():
             
             urun_grup_analiz['magaza_basi_sevk'] = (urun_grup_analiz['sevk_miktar'] / urun_grup_analiz['magaza_id']).round(1)
             urun_grup_analiz['ihtiyac_karsilama'] = (urun_grup_analiz['sevk_miktar'] / urun_grup_analiz['ihtiyac'] * 100).round(1)
-            urun_grup_analiz['ortalama_cover'] = urun_analiz.groupby('urun_cover_grubu')['urun_cover'].mean().round(1).values
+            urun_grup_analiz['ortalama_cover'] = urun_analiz.groupby('urun_cover_grubu', observed=True)['urun_cover'].mean().round(1).values
             
             st.dataframe(urun_grup_analiz, use_container_width=True)
     
@@ -1322,7 +854,10 @@ def show_reports():
         st.subheader("🛒 Alım Sipariş İhtiyacı")
         
         # Alım ihtiyacını hesapla
-        alim_ihtiyaci = calculate_purchase_need(sevk_df, total_sevk, original_sevkiyat_df, depo_stok_df)
+        alim_ihtiyaci = calculate_purchase_need(
+            sevk_df, total_sevk, original_sevkiyat_df,
+            st.session_state.get('depo_stok_ledger', depo_stok_df)
+        )
         
         if not alim_ihtiyaci.empty:
             # Basit özet göster
@@ -1398,7 +933,7 @@ def show_reports():
         if not sevk_df_result.empty:
             # Cover grupları karşılaştırması
             st.write("**Cover Grupları Karşılaştırması:**")
-            cover_karsilastirma = sevk_df_result.groupby(['magaza_cover_grubu', 'urun_cover_grubu']).agg({
+            cover_karsilastirma = sevk_df_result.groupby(['magaza_cover_grubu', 'urun_cover_grubu'], observed=True).agg({
                 'sevk_miktar': 'sum',
                 'ihtiyac': 'sum',
                 'magaza_id': 'nunique',
@@ -1496,9 +1031,8 @@ def show_main_page():
                         sevk_df['mevcut_stok'] = pd.to_numeric(sevk_df['mevcut_stok'], errors='coerce').fillna(0)
                         
                         # DÜZELTME: Yolda stoğu çıkarmadan hesapla
-                        sevk_df['urun_cover_sim'] = sevk_df.apply(
-                            lambda row: calculate_urun_cover(row['haftalik_satis'], row['mevcut_stok']), 
-                            axis=1
+                        sevk_df['urun_cover_sim'] = compute_urun_cover(
+                            sevk_df['haftalik_satis'], sevk_df['mevcut_stok']
                         )
                         st.write("Ürün Cover Simülasyonu (Yolda stoğu çıkarılmadan):")
                         st.write(f"Min: {sevk_df['urun_cover_sim'].min():.2f}, Max: {sevk_df['urun_cover_sim'].max():.2f}")
@@ -1506,8 +1040,8 @@ def show_main_page():
                         
                         # Grup dağılımı simülasyonu - FONKSİYON ADI DÜZELTİLDİ
                         if 'cover_gruplari' in st.session_state and st.session_state.cover_gruplari:
-                            sevk_df['urun_cover_grubu_sim'] = sevk_df['urun_cover_sim'].apply(
-                                lambda x: get_cover_grubu_adi(x, st.session_state.cover_gruplari)
+                            sevk_df['urun_cover_grubu_sim'] = assign_cover_groups(
+                                sevk_df['urun_cover_sim'], st.session_state.cover_gruplari
                             )
                             st.write("Ürün Cover Grup Dağılımı (Simülasyon - Tüm Gruplar):")
                             dagilim = sevk_df['urun_cover_grubu_sim'].value_counts().reindex(
@@ -1558,7 +1092,7 @@ def show_main_page():
                     st.subheader("📋 Sevkiyat Detayları - Grup Bazında")
                     if not total_sevk.empty:
                         # Grup bazında özet
-                        grup_bazli_ozet = total_sevk.groupby(['magaza_cover_grubu', 'urun_cover_grubu']).agg({
+                        grup_bazli_ozet = total_sevk.groupby(['magaza_cover_grubu', 'urun_cover_grubu'], observed=True).agg({
                             'sevk_miktar': 'sum',
                             'magaza_id': 'nunique',
                             'urun_id': 'nunique',
@@ -1584,7 +1118,10 @@ def show_main_page():
                                 use_container_width=True
                             )
                         with col2:
-                            alim_ihtiyaci = calculate_purchase_need(sevk_df, total_sevk, original_sevkiyat_df, depo_stok_df)
+                            alim_ihtiyaci = calculate_purchase_need(
+                                sevk_df, total_sevk, original_sevkiyat_df,
+                                st.session_state.get('depo_stok_ledger', depo_stok_df)
+                            )
                             if not alim_ihtiyaci.empty:
                                 csv_alim = alim_ihtiyaci.to_csv(index=False, encoding='utf-8-sig')
                                 st.download_button(
@@ -1611,6 +1148,87 @@ def show_main_page():
                 import traceback
                 with st.expander("Hata Detayları"):
                     st.code(traceback.format_exc())
+        
+        # Senaryo karşılaştırma - ön işleme senaryolar arasında paylaşılır
+        st.markdown("---")
+        st.subheader("🧪 Senaryo Karşılaştırma")
+        st.caption("Çarpan katsayısı mevcut matristeki tüm çarpanlarla çarpılır. "
+                   "Aynı hedef haftalı senaryolar tek ön işlemeyi paylaşır.")
+        
+        if 'senaryolar' not in st.session_state:
+            params = st.session_state.params
+            st.session_state.senaryolar = pd.DataFrame([
+                {'ad': 'Mevcut', 'hedef_hafta': params['hedef_hafta'], 'min_adet': params['min_adet'],
+                 'maks_adet': params['maks_adet'], 'carpan_katsayi': 1.0},
+                {'ad': 'Temkinli', 'hedef_hafta': params['hedef_hafta'], 'min_adet': params['min_adet'],
+                 'maks_adet': params['maks_adet'], 'carpan_katsayi': 0.8},
+                {'ad': 'Agresif', 'hedef_hafta': params['hedef_hafta'], 'min_adet': params['min_adet'],
+                 'maks_adet': params['maks_adet'], 'carpan_katsayi': 1.2}
+            ])
+        
+        senaryo_df = st.data_editor(
+            st.session_state.senaryolar,
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                'ad': st.column_config.TextColumn("Senaryo"),
+                'hedef_hafta': st.column_config.NumberColumn("Hedef Hafta", min_value=1, max_value=12, step=1),
+                'min_adet': st.column_config.NumberColumn("Min Adet", min_value=0, step=1),
+                'maks_adet': st.column_config.NumberColumn("Maks Adet", min_value=1, step=1),
+                'carpan_katsayi': st.column_config.NumberColumn("Çarpan Katsayısı", min_value=0.0, step=0.05, format="%.2f")
+            },
+            key="senaryo_editor"
+        )
+        
+        if st.button("🧪 SENARYOLARI KARŞILAŞTIR", use_container_width=True):
+            senaryo_df = senaryo_df.dropna(subset=['hedef_hafta', 'min_adet', 'maks_adet'])
+            st.session_state.senaryolar = senaryo_df
+            senaryolar = [
+                {
+                    'ad': row['ad'] or f"Senaryo {i + 1}",
+                    'hedef_hafta': int(row['hedef_hafta']),
+                    'min_adet': int(row['min_adet']),
+                    'maks_adet': int(row['maks_adet']),
+                    'carpan_matrisi': {
+                        magaza: {urun: carpan * (1.0 if pd.isna(row['carpan_katsayi']) else float(row['carpan_katsayi'])) for urun, carpan in satir.items()}
+                        for magaza, satir in st.session_state.carpan_matrisi.items()
+                    }
+                }
+                for i, (_, row) in enumerate(senaryo_df.iterrows())
+            ]
+            
+            if not senaryolar:
+                st.warning("⚠️ En az bir senaryo tanımlayın")
+            else:
+                try:
+                    if 'hazirlik_cache' not in st.session_state:
+                        st.session_state.hazirlik_cache = PreprocessingCache()
+                    
+                    start_time = time.time()
+                    st.session_state.senaryo_sonuc = run_scenario_sweep(
+                        st.session_state.file_data,
+                        senaryolar,
+                        st.session_state.cover_gruplari,
+                        progress=streamlit_progress(),
+                        cache=st.session_state.hazirlik_cache,
+                        file_hashes=st.session_state.get('file_hashes')
+                    )
+                    st.success(f"✅ {len(senaryolar)} senaryo {time.time() - start_time:.2f} saniyede karşılaştırıldı")
+                except Exception as e:
+                    st.error(f"❌ Senaryo hatası: {str(e)}")
+        
+        if st.session_state.get('senaryo_sonuc') is not None:
+            st.dataframe(
+                st.session_state.senaryo_sonuc.rename(columns={
+                    'senaryo': 'Senaryo', 'hedef_hafta': 'Hedef Hafta', 'min_adet': 'Min Adet',
+                    'maks_adet': 'Maks Adet', 'toplam_sevk': 'Toplam Sevk', 'tur2_sevk': 'Tur 2 Sevk',
+                    'tur2_payi': 'Tur 2 Payı %', 'toplam_ihtiyac': 'Toplam İhtiyaç',
+                    'karsilanan_ihtiyac': 'Karşılanan İhtiyaç', 'doluluk_orani': 'Doluluk %',
+                    'kalan_depo_stok': 'Kalan Depo Stok', 'sevk_satiri': 'Sevk Satırı', 'sure_sn': 'Dağıtım (sn)'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
 
 # -------------------------------
 # ANA UYGULAMA
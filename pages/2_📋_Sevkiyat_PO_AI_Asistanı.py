@@ -16,6 +16,60 @@ import sqlite3
 import hashlib
 import zipfile
 from zipfile import ZipFile
+from po_engine import (
+    VERI_TANIMLARI, parse_dtypes, ingest_csv_files, match_dataset_key, missing_dataset_columns,
+    clean_dataset, merge_parts,
+    default_cover_segment_matrix, calculate_store_shipments, sap_export,
+    calculate_purchase_orders, po_depot_summary,
+    prepare_po_table, po_parameter_grid, po_grid_summary
+)
+from dataset_store import DEPO_KULLANILABILIR, DatasetStore
+from sevkiyat_engine import PreprocessingCache
+
+# ============================================
+# İLERLEME BİLDİRİMİ (motor → Streamlit)
+# ============================================
+def streamlit_progress():
+    """Motorun ilerleme geri çağrısını Streamlit bileşenlerine bağla"""
+    bilesenler = {}
+    
+    def progress(mesaj, seviye='info', oran=None):
+        if oran is None:
+            getattr(st, seviye)(mesaj)
+            return
+        if not bilesenler:
+            bilesenler['bar'] = st.progress(0)
+        bilesenler['bar'].progress(oran)
+    
+    return progress
+
+# ============================================
+# VERİ DEPOSU (kabul edilen yüklemeler diskte Parquet sürümü olarak)
+# ============================================
+@st.cache_resource
+def veri_deposu():
+    """Tüm oturumların paylaştığı veri deposu - pyarrow yoksa None"""
+    return DatasetStore() if DEPO_KULLANILABILIR else None
+
+def depoya_kaydet(key, df, kaynak, kaynak_ozet=None):
+    """Yüklemeyi depoya yaz - depo yoksa veya yazılamazsa oturum verisi yine kullanılır"""
+    depo = veri_deposu()
+    if depo is None:
+        return None
+    try:
+        return depo.save(key, df, yukleyen=st.session_state.get('username') or 'demo',
+                         kaynak=kaynak, kaynak_ozet=kaynak_ozet)
+    except OSError as e:
+        st.warning(f"⚠️ Veri deposuna yazılamadı: {e}")
+        return None
+
+def depodan_bul(key, kaynak_ozet):
+    """Aynı ham dosya daha önce kaydedildiyse (metadata, DataFrame), yoksa (None, None)"""
+    depo = veri_deposu()
+    meta = depo.find_source(key, kaynak_ozet) if depo is not None else None
+    if meta is None:
+        return None, None
+    return meta, depo.load(key, meta['surum'])
 
 # ============================================
 # TOKEN SİSTEMİ
@@ -135,6 +189,12 @@ if 'sevkiyat_sonuc' not in st.session_state:
     st.session_state.sevkiyat_sonuc = None
 if 'yeni_urun_listesi' not in st.session_state:
     st.session_state.yeni_urun_listesi = None
+# 📐 Hesaplama ve 💵 PO Hesaplama'nın ortak zenginleştirilmiş tablosu (kaynak özetine göre)
+if 'fact_cache' not in st.session_state:
+    st.session_state.fact_cache = PreprocessingCache(max_kayit=1)
+# 💵 PO parametre ızgarası sonucu
+if 'po_izgara' not in st.session_state:
+    st.session_state.po_izgara = None
 
 # Hedef Matris'ten gelen segmentler (otomatik kaydedilecek)
 if 'urun_segment_map' not in st.session_state:
@@ -213,19 +273,6 @@ if menu == "📂 Veri Yükleme":
     st.title("📤 Ortak Veri Yükleme Merkezi")
     st.markdown("---")
 
-    # CSV okuma fonksiyonu
-    def read_csv_safe(file):
-        try:
-            df = pd.read_csv(file, sep=';', encoding='utf-8-sig', quoting=1, on_bad_lines='warn')
-            return df, ';'
-        except:
-            try:
-                file.seek(0)
-                df = pd.read_csv(file, sep=',', encoding='utf-8-sig', quoting=1, on_bad_lines='warn')
-                return df, ','
-            except Exception as e:
-                raise Exception(f"CSV okuma hatası: {str(e)}")
-
     # CSV yazma fonksiyonu
     def write_csv_safe(df):
         return df.to_csv(index=False, sep=';', encoding='utf-8-sig', quoting=1)
@@ -333,82 +380,8 @@ if menu == "📂 Veri Yükleme":
         }
     }
 
-    # Veri tanımları
-    data_definitions = {
-        'urun_master': {
-            'name': 'Ürün Master',
-            'required': True,
-            'columns': ['urun_kod', 'satici_kod', 'kategori_kod', 'umg', 'mg', 'marka_kod', 
-                       'klasman_kod', 'nitelik', 'durum', 'ithal', 'olcu_birimi', 'koli_ici', 'paket_ici'],
-            'state_key': 'urun_master',
-            'icon': '📦',
-            'modules': ['Sevkiyat', 'PO', 'Prepack']
-        },
-        'magaza_master': {
-            'name': 'Mağaza Master',
-            'required': True,
-            'columns': ['magaza_kod', 'il', 'bolge', 'tip', 'adres_kod', 'sm', 'bs', 'depo_kod'],
-            'state_key': 'magaza_master',
-            'icon': '🏪',
-            'modules': ['Sevkiyat', 'PO']
-        },
-        'depo_stok': {
-            'name': 'Depo Stok',
-            'required': True,
-            'columns': ['depo_kod', 'urun_kod', 'stok'],
-            'state_key': 'depo_stok',
-            'icon': '📦',
-            'modules': ['Sevkiyat', 'PO']
-        },
-        'anlik_stok_satis': {
-            'name': 'Anlık Stok/Satış',
-            'required': True,
-            'columns': ['magaza_kod', 'urun_kod', 'stok', 'yol', 'satis', 'ciro', 'smm'],
-            'state_key': 'anlik_stok_satis',
-            'icon': '📊',
-            'modules': ['Sevkiyat', 'PO']
-        },
-        'kpi': {
-            'name': 'KPI',
-            'required': True,
-            'columns': ['mg_id', 'min_deger', 'max_deger', 'forward_cover'],
-            'state_key': 'kpi',
-            'icon': '🎯',
-            'modules': ['Sevkiyat', 'PO']
-        },
-        'yasak_master': {
-            'name': 'Yasak',
-            'required': False,
-            'columns': ['urun_kod', 'magaza_kod', 'yasak_durum'],
-            'state_key': 'yasak_master',
-            'icon': '🚫',
-            'modules': ['Sevkiyat']
-        },
-        'haftalik_trend': {
-            'name': 'Haftalık Trend',
-            'required': False,
-            'columns': ['klasman_kod', 'marka_kod', 'yil', 'hafta', 'stok', 'satis', 'ciro', 'smm', 'iftutar'],
-            'state_key': 'haftalik_trend',
-            'icon': '📈',
-            'modules': ['Sevkiyat']
-        },
-        'po_yasak': {
-            'name': 'PO Yasak',
-            'required': False,
-            'columns': ['urun_kodu', 'yasak_durum', 'acik_siparis'],
-            'state_key': 'po_yasak',
-            'icon': '🚫',
-            'modules': ['PO']
-        },
-        'po_detay_kpi': {
-            'name': 'PO Detay KPI',
-            'required': False,
-            'columns': ['marka_kod', 'mg_kod', 'cover_hedef', 'bkar_hedef'],
-            'state_key': 'po_detay_kpi',
-            'icon': '🎯',
-            'modules': ['PO']
-        }
-    }
+    # Veri tanımları (po_engine.VERI_TANIMLARI)
+    data_definitions = VERI_TANIMLARI
 
     # ============================================
     # 📖 KULLANICI KILAVUZU - İNDİRİLEBİLİR DOKÜMAN
@@ -611,61 +584,73 @@ if menu == "📂 Veri Yükleme":
     
         if st.button("🔗 Parçaları Birleştir ve Yükle", type="primary", use_container_width=True):
             try:
-                combined_df = None
+                temiz_parcalar = []
                 total_rows = 0
                 part_info = []
             
-                for idx, part_file in enumerate(anlik_parts, 1):
-                    # CSV oku
-                    df_part, used_sep = read_csv_safe(part_file)
+                # Aynı parçalar (aynı sırayla) daha önce birleştirildiyse depodan yükle
+                parca_ozeti = hashlib.sha256(
+                    ''.join(hashlib.sha256(p.getvalue()).hexdigest() for p in anlik_parts).encode()
+                ).hexdigest()
+                depo_meta, depo_df = depodan_bul('anlik_stok_satis', parca_ozeti)
+                if depo_df is not None:
+                    st.session_state.anlik_stok_satis = depo_df
+                    st.success(f"🗄️ Bu parçalar daha önce yüklenmiş - depodan alındı: "
+                               f"{len(depo_df):,} satır ({depo_meta['yukleyen']}, {depo_meta['olusturma']})")
+                    time.sleep(1)
+                    st.rerun()
+            
+                # Tüm parçalar eşzamanlı okunur (ayraç/kodlama her parçada koklanır)
+                baslangic = time.time()
+                okunan_parcalar = ingest_csv_files(
+                    [(part_file.name, part_file, parse_dtypes('anlik_stok_satis'))
+                     for part_file in anlik_parts],
+                    progress=streamlit_progress()
+                )
+                okuma_suresi = time.time() - baslangic
+            
+                for idx, okunan in enumerate(okunan_parcalar, 1):
+                    if okunan['hata']:
+                        st.error(f"❌ {okunan['ad']}: {okunan['hata']}")
+                        continue
+                    df_part = okunan['df']
                 
                     # Kolon kontrolü
-                    expected_cols = set(data_definitions['anlik_stok_satis']['columns'])
-                    if not expected_cols.issubset(set(df_part.columns)):
-                        st.error(f"❌ {part_file.name}: Eksik kolonlar var!")
+                    if missing_dataset_columns('anlik_stok_satis', df_part):
+                        st.error(f"❌ {okunan['ad']}: Eksik kolonlar var!")
                         continue
                 
-                    # Sadece gerekli kolonları al
-                    df_part = df_part[data_definitions['anlik_stok_satis']['columns']].copy()
-                
-                    # String kolonları temizle
-                    string_cols = df_part.select_dtypes(include=['object']).columns
-                    for col in string_cols:
-                        df_part[col] = df_part[col].str.strip()
+                    # Gerekli kolonlar, string kırpma, sayısal zorlama
+                    temiz_parcalar.append(clean_dataset('anlik_stok_satis', df_part))
+                    okunan['df'] = df_part = None
                 
-                    # 🆕 Sayısal kolonları zorla
-                    numeric_cols = ['stok', 'yol', 'satis', 'ciro', 'smm']
-                    for col in numeric_cols:
-                        if col in df_part.columns:
-                            df_part[col] = pd.to_numeric(df_part[col], errors='coerce').fillna(0)
-                
-                    # Birleştir
-                    if combined_df is None:
-                        combined_df = df_part
-                    else:
-                        combined_df = pd.concat([combined_df, df_part], ignore_index=True)
-                
-                    part_info.append(f"✅ Parça {idx}: {len(df_part):,} satır")
-                    total_rows += len(df_part)
+                    part_info.append((idx, okunan))
+                    total_rows += len(temiz_parcalar[-1])
             
-                if combined_df is not None:
-                    # Duplicate kontrolü (opsiyonel)
-                    before_dedup = len(combined_df)
-                    combined_df = combined_df.drop_duplicates(subset=['magaza_kod', 'urun_kod'], keep='last')
+                if temiz_parcalar:
+                    # Tek seferde birleştir - aynı mağaza/ürün için son parçadaki satır kalır
+                    combined_df, tekrar_raporu = merge_parts(temiz_parcalar)
                     after_dedup = len(combined_df)
                 
-                    # Kaydet
+                    # Kaydet (oturum + veri deposu)
                     st.session_state.anlik_stok_satis = combined_df
+                    depoya_kaydet('anlik_stok_satis', combined_df,
+                                  ', '.join(p.name for p in anlik_parts), parca_ozeti)
                 
                     # Sonuçları göster
                     st.success(f"🎉 **Başarıyla birleştirildi!**")
-                    for info in part_info:
-                        st.write(info)
+                    for (idx, okunan), tekrar in zip(part_info, tekrar_raporu):
+                        st.write(
+                            f"✅ Parça {idx} ({okunan['ad']}): {okunan['satir']:,} satır - "
+                            f"{okunan['sure_sn']:.2f} sn, ayraç '{okunan['sep']}', {okunan['encoding']} | "
+                            f"sonraki parçalarla değişen: {tekrar['ezilen']:,}, öncekilerin yerine geçen: {tekrar['ezen']:,}"
+                        )
                 
                     st.info(f"""
                     **Özet:**
                     - Toplam yüklenen: {total_rows:,} satır
-                    - Duplicate temizlendi: {before_dedup - after_dedup:,} satır
+                    - Okuma süresi: {okuma_suresi:.2f} sn ({len(anlik_parts)} parça eşzamanlı)
+                    - Duplicate temizlendi: {total_rows - after_dedup:,} satır
                     - Final: {after_dedup:,} satır
                     """)
                 
@@ -714,15 +699,12 @@ if menu == "📂 Veri Yükleme":
         if uploaded_files:
             if st.button("🚀 Tüm Dosyaları Yükle", type="primary", use_container_width=True):
                 upload_results = []
+                eslesen_dosyalar = []
             
                 for uploaded_file in uploaded_files:
                     filename = uploaded_file.name.lower()
                 
-                    matched_key = None
-                    for key, definition in data_definitions.items():
-                        if key in filename or definition['name'].lower().replace(' ', '_') in filename:
-                            matched_key = key
-                            break
+                    matched_key = match_dataset_key(filename)
                 
                     if not matched_key:
                         upload_results.append({
@@ -731,18 +713,35 @@ if menu == "📂 Veri Yükleme":
                         })
                         continue
                 
+                    # Aynı dosya daha önce kaydedildiyse ayrıştırmadan depodan yükle
+                    kaynak_ozet = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+                    depo_meta, depo_df = depodan_bul(matched_key, kaynak_ozet)
+                    if depo_df is not None:
+                        st.session_state[data_definitions[matched_key]['state_key']] = depo_df
+                        upload_results.append({
+                            'Dosya': uploaded_file.name,
+                            'Durum': f"✅ {len(depo_df):,} satır (🗄️ depodan, {depo_meta['yukleyen']})"
+                        })
+                        continue
+                    eslesen_dosyalar.append((matched_key, uploaded_file, kaynak_ozet))
+            
+                # Eşleşen dosyalar eşzamanlı okunur
+                okunan_dosyalar = ingest_csv_files(
+                    [(uploaded_file.name, uploaded_file, parse_dtypes(matched_key))
+                     for matched_key, uploaded_file, _ in eslesen_dosyalar],
+                    sep=None if selected_separator == 'auto' else selected_separator,
+                    progress=streamlit_progress()
+                )
+            
+                for (matched_key, uploaded_file, kaynak_ozet), okunan in zip(eslesen_dosyalar, okunan_dosyalar):
                     definition = data_definitions[matched_key]
                 
                     try:
-                        if selected_separator == 'auto':
-                            df, used_sep = read_csv_safe(uploaded_file)
-                        else:
-                            df = pd.read_csv(uploaded_file, sep=selected_separator, encoding='utf-8-sig', 
-                                           quoting=1, on_bad_lines='warn')
+                        if okunan['hata']:
+                            raise ValueError(okunan['hata'])
+                        df = okunan['df']
                     
-                        existing_cols = set(df.columns)
-                        required_cols = set(definition['columns'])
-                        missing_cols = required_cols - existing_cols
+                        missing_cols = missing_dataset_columns(matched_key, df)
                     
                         if missing_cols:
                             upload_results.append({
@@ -750,37 +749,13 @@ if menu == "📂 Veri Yükleme":
                                 'Durum': f"❌ Eksik kolon: {', '.join(list(missing_cols)[:3])}"
                             })
                         else:
-                            df_clean = df[definition['columns']].copy()
-                        
-                            # String kolonları temizle
-                            string_columns = df_clean.select_dtypes(include=['object']).columns
-                            for col in string_columns:
-                                df_clean[col] = df_clean[col].str.strip() if df_clean[col].dtype == 'object' else df_clean[col]
-                        
-                            # 🆕 SAYISAL KOLONLARI ZORLA (Özel dosyalar için)
-                            if matched_key == 'anlik_stok_satis':
-                                # Anlık Stok/Satış için sayısal kolonları zorla
-                                numeric_cols = ['stok', 'yol', 'satis', 'ciro', 'smm']
-                                for col in numeric_cols:
-                                    if col in df_clean.columns:
-                                        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
-                        
-                            elif matched_key == 'depo_stok':
-                                # Depo Stok için sayısal kolonları zorla
-                                if 'stok' in df_clean.columns:
-                                    df_clean['stok'] = pd.to_numeric(df_clean['stok'], errors='coerce').fillna(0)
-                        
-                            elif matched_key == 'kpi':
-                                # KPI için sayısal kolonları zorla
-                                numeric_cols = ['min_deger', 'max_deger', 'forward_cover']
-                                for col in numeric_cols:
-                                    if col in df_clean.columns:
-                                        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+                            df_clean = clean_dataset(matched_key, df)
                         
                             st.session_state[definition['state_key']] = df_clean
+                            depoya_kaydet(matched_key, df_clean, uploaded_file.name, kaynak_ozet)
                             upload_results.append({
                                 'Dosya': uploaded_file.name,
-                                'Durum': f"✅ {len(df_clean):,} satır"
+                                'Durum': f"✅ {len(df_clean):,} satır ({okunan['sure_sn']:.2f} sn)"
                             })
                 
                     except Exception as e:
@@ -819,6 +794,58 @@ if menu == "📂 Veri Yükleme":
     st.markdown("---")
 
 
+    # ============================================
+    # KAYITLI SÜRÜMLER (VERİ DEPOSU)
+    # ============================================
+    st.subheader("🗄️ Kayıtlı Veri Sürümleri")
+
+    depo = veri_deposu()
+    if depo is None:
+        st.info("ℹ️ Veri deposu için pyarrow kurulu olmalı - yüklemeler sadece bu oturumda tutulur.")
+    else:
+        # Depoyu paylaşan diğer sayfaların kayıtları (örn. bütçe) listelenmez
+        surumler = depo.list_versions()
+        surumler = surumler[surumler['key'].isin(list(data_definitions))].reset_index(drop=True)
+        if surumler.empty:
+            st.info("Henüz kayıtlı sürüm yok - kabul edilen yüklemeler otomatik olarak kaydedilir.")
+        else:
+            def surum_etiketi(i):
+                s = surumler.loc[i]
+                tanim = data_definitions.get(s['key'], {'icon': '📄', 'name': s['key']})
+                return (f"{tanim['icon']} {tanim['name']} · {s['surum'][:8]} · {s['satir']:,} satır · "
+                        f"{s['yukleyen']} · {s['son_kullanim']}")
+        
+            st.dataframe(
+                surumler.assign(surum=surumler['surum'].str[:8]).rename(columns={
+                    'key': 'Veri', 'surum': 'Sürüm', 'satir': 'Satır', 'boyut_mb': 'Boyut (MB)',
+                    'yukleyen': 'Yükleyen', 'kaynak': 'Kaynak', 'olusturma': 'Oluşturma',
+                    'son_kullanim': 'Son Kullanım', 'yukleme_sayisi': 'Yükleme'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+        
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                secili_surum = st.selectbox("Sürüm seçin:", options=list(surumler.index),
+                                            format_func=surum_etiketi, key="depo_surum_secimi")
+            with col2:
+                st.write("")
+                if st.button("📂 Oturuma Yükle", use_container_width=True):
+                    secili = surumler.loc[secili_surum]
+                    baslangic = time.time()
+                    st.session_state[data_definitions[secili['key']]['state_key']] = depo.load(
+                        secili['key'], secili['surum']
+                    )
+                    st.success(f"✅ {secili['satir']:,} satır yüklendi ({time.time() - baslangic:.2f} sn)")
+                    time.sleep(1)
+                    st.rerun()
+        
+            st.caption(f"Saklama: son kullanımı {depo.saklama_gun} günden eski veya veri başına "
+                       f"son {depo.max_surum} sürümün dışında kalan kayıtlar silinir.")
+
+    st.markdown("---")
+
     # ============================================
     # VERİ YÜKLEME DURUMU TABLOSU - DÜZELTİLMİŞ
     # ============================================
@@ -1001,7 +1028,7 @@ elif menu == "🫧 Segmentasyon":
     data = st.session_state.anlik_stok_satis.copy()
     
     # Ürün bazında gruplama
-    urun_aggregated = data.groupby('urun_kod').agg({
+    urun_aggregated = data.groupby('urun_kod', observed=True).agg({
         'stok': 'sum',
         'yol': 'sum',
         'satis': 'sum',
@@ -1018,7 +1045,7 @@ elif menu == "🫧 Segmentasyon":
         urun_aggregated['marka_kod'] = 'Bilinmiyor'
     
     # Mağaza bazında gruplama
-    magaza_aggregated = data.groupby('magaza_kod').agg({
+    magaza_aggregated = data.groupby('magaza_kod', observed=True).agg({
         'stok': 'sum',
         'yol': 'sum',
         'satis': 'sum',
@@ -1677,317 +1704,43 @@ elif menu == "📐 Hesaplama":
     
     st.success("✅ Tüm zorunlu veriler hazır!")
     
+    if st.session_state.get('oncelik_siralama'):
+        st.info(f"🔢 Kayıtlı öncelik sıralaması kullanılacak ({len(st.session_state.oncelik_siralama)} segment)")
+    else:
+        st.info("🔢 Default öncelik sıralaması kullanılacak (RPT → Initial → Min)")
+    
     if st.button("🚀 HESAPLA", type="primary", use_container_width=True):
         baslaangic_zamani = time.time()
         
         with st.spinner("Hesaplanıyor..."):
             try:
                 # ============================================
-                # 1. VERİ HAZIRLA
-                # ============================================
-                st.info("📂 Veriler hazırlanıyor...")
-                
-                df = st.session_state.anlik_stok_satis.copy()
-                df['urun_kod'] = df['urun_kod'].astype(str)
-                df['magaza_kod'] = df['magaza_kod'].astype(str)
-                
-                depo_df = st.session_state.depo_stok.copy()
-                depo_df['urun_kod'] = depo_df['urun_kod'].astype(str)
-                depo_df['depo_kod'] = depo_df['depo_kod'].astype(int)
-                
-                magaza_df = st.session_state.magaza_master.copy()
-                magaza_df['magaza_kod'] = magaza_df['magaza_kod'].astype(str)
-                
-                kpi_df = st.session_state.kpi.copy()
-                
-                st.write(f"✅ Anlık stok/satış: {len(df):,} satır")
-                st.write(f"✅ Depo stok: {len(depo_df):,} satır")
-                
+                # 1-10. HESAP (po_engine.calculate_store_shipments)
                 # ============================================
-                # 2. YENİ ÜRÜNLER
-                # ============================================
-                depo_sum = depo_df.groupby('urun_kod')['stok'].sum()
-                yeni_adaylar = depo_sum[depo_sum > 300].index.tolist()
-                
-                urun_magaza_count = df[df['urun_kod'].isin(yeni_adaylar)].groupby('urun_kod')['magaza_kod'].nunique()
-                total_magaza = df['magaza_kod'].nunique()
-                yeni_urunler = urun_magaza_count[urun_magaza_count < total_magaza * 0.5].index.tolist()
-                
-                st.write(f"✅ Yeni ürün adayı: {len(yeni_urunler):,}")
-
-
-
-                # 3. SEGMENTASYON - VERİ TİPİ UYUMLU
-                if (st.session_state.urun_segment_map and st.session_state.magaza_segment_map):
-                    # String key'li dictionary oluştur
-                    urun_seg_map_str = {str(k): str(v) for k, v in st.session_state.urun_segment_map.items()}
-                    magaza_seg_map_str = {str(k): str(v) for k, v in st.session_state.magaza_segment_map.items()}
-                    
-                    # String'e çevirip map yap
-                    df['urun_segment'] = df['urun_kod'].astype(str).map(urun_seg_map_str).fillna('0-4')
-                    df['magaza_segment'] = df['magaza_kod'].astype(str).map(magaza_seg_map_str).fillna('0-4')
-                    
-                    # Debug
-                    urun_eslesen = (df['urun_segment'] != '0-4').sum()
-                    magaza_eslesen = (df['magaza_segment'] != '0-4').sum()
-                    st.info(f"📊 Segment eşleşme: Ürün {urun_eslesen}/{len(df)} | Mağaza {magaza_eslesen}/{len(df)}")
-                else:
-                    df['urun_segment'] = '0-4'
-                    df['magaza_segment'] = '0-4'
-                    st.warning("⚠️ Segment map bulunamadı, default '0-4' kullanılıyor")
-
-                
-                # ============================================
-                # 4. KPI VE MG BİLGİLERİ
-                # ============================================
-                default_fc = kpi_df['forward_cover'].mean() if 'forward_cover' in kpi_df.columns else 7.0
-                
-                df['min_deger'] = 0.0
-                df['max_deger'] = 999999.0
-                
-                # MG bilgisi ekle
-                if st.session_state.urun_master is not None and 'mg' in st.session_state.urun_master.columns:
-                    urun_m = st.session_state.urun_master[['urun_kod', 'mg']].copy()
-                    urun_m['urun_kod'] = urun_m['urun_kod'].astype(str)
-                    urun_m['mg'] = urun_m['mg'].fillna('0').astype(str)
-                    df = df.merge(urun_m, on='urun_kod', how='left')
-                    df['mg'] = df['mg'].fillna('0')
-                else:
-                    df['mg'] = '0'
-                
-                # KPI değerlerini uygula
-                if not kpi_df.empty and 'mg_id' in kpi_df.columns:
-                    kpi_lookup = {}
-                    for _, row in kpi_df.iterrows():
-                        mg_key = str(row['mg_id'])
-                        kpi_lookup[mg_key] = {
-                            'min': float(row.get('min_deger', 0)) if pd.notna(row.get('min_deger', 0)) else 0,
-                            'max': float(row.get('max_deger', 999999)) if pd.notna(row.get('max_deger', 999999)) else 999999
-                        }
-                    
-                    for mg_val in df['mg'].unique():
-                        if mg_val in kpi_lookup:
-                            mask = df['mg'] == mg_val
-                            df.loc[mask, 'min_deger'] = kpi_lookup[mg_val]['min']
-                            df.loc[mask, 'max_deger'] = kpi_lookup[mg_val]['max']
-                
-                # ============================================
-                # 5. DEPO KODU EKLEMESİ
-                # ============================================
-                if 'depo_kod' in magaza_df.columns:
-                    df = df.merge(magaza_df[['magaza_kod', 'depo_kod']], on='magaza_kod', how='left')
-                    df['depo_kod'] = df['depo_kod'].fillna(0).astype(int)
-                    df['depo_kod'] = df['depo_kod'].replace(0, 1)
-                else:
-                    df['depo_kod'] = 1
-                
-                st.write(f"✅ Depo kodları eklendi")
-                
-                # ============================================
-                # 6. MATRİS DEĞERLERİ
-                # ============================================
-                df['genlestirme'] = 1.0
-                df['sisme'] = 0.5
-                df['min_oran'] = 1.0
-                df['initial_katsayi'] = 1.0
-                
-                all_matrices_exist = all([
-                    st.session_state.genlestirme_orani is not None,
-                    st.session_state.sisme_orani is not None,
-                    st.session_state.min_oran is not None,
-                    st.session_state.initial_matris is not None
-                ])
-                
-                if all_matrices_exist:
-                    st.info("🔄 Matris değerleri uygulanıyor...")
-                    
-                    # Genleştirme
-                    genles_long = st.session_state.genlestirme_orani.stack().reset_index()
-                    genles_long.columns = ['magaza_segment', 'urun_segment', 'genlestirme_mat']
-                    genles_long['magaza_segment'] = genles_long['magaza_segment'].astype(str)
-                    genles_long['urun_segment'] = genles_long['urun_segment'].astype(str)
-                    df = df.merge(genles_long, on=['magaza_segment', 'urun_segment'], how='left')
-                    df['genlestirme'] = df['genlestirme_mat'].fillna(df['genlestirme'])
-                    df.drop('genlestirme_mat', axis=1, inplace=True)
-                    
-                    # Şişme
-                    sisme_long = st.session_state.sisme_orani.stack().reset_index()
-                    sisme_long.columns = ['magaza_segment', 'urun_segment', 'sisme_mat']
-                    sisme_long['magaza_segment'] = sisme_long['magaza_segment'].astype(str)
-                    sisme_long['urun_segment'] = sisme_long['urun_segment'].astype(str)
-                    df = df.merge(sisme_long, on=['magaza_segment', 'urun_segment'], how='left')
-                    df['sisme'] = df['sisme_mat'].fillna(df['sisme'])
-                    df.drop('sisme_mat', axis=1, inplace=True)
-                    
-                    # Min Oran
-                    min_long = st.session_state.min_oran.stack().reset_index()
-                    min_long.columns = ['magaza_segment', 'urun_segment', 'min_oran_mat']
-                    min_long['magaza_segment'] = min_long['magaza_segment'].astype(str)
-                    min_long['urun_segment'] = min_long['urun_segment'].astype(str)
-                    df = df.merge(min_long, on=['magaza_segment', 'urun_segment'], how='left')
-                    df['min_oran'] = df['min_oran_mat'].fillna(df['min_oran'])
-                    df.drop('min_oran_mat', axis=1, inplace=True)
-                    
-                    # Initial
-                    initial_long = st.session_state.initial_matris.stack().reset_index()
-                    initial_long.columns = ['magaza_segment', 'urun_segment', 'initial_mat']
-                    initial_long['magaza_segment'] = initial_long['magaza_segment'].astype(str)
-                    initial_long['urun_segment'] = initial_long['urun_segment'].astype(str)
-                    df = df.merge(initial_long, on=['magaza_segment', 'urun_segment'], how='left')
-                    df['initial_katsayi'] = df['initial_mat'].fillna(df['initial_katsayi'])
-                    df.drop('initial_mat', axis=1, inplace=True)
-                    
-                    st.success("✅ Matris değerleri uygulandı!")
-                
-                # ============================================
-                # 7. İHTİYAÇ HESAPLA - MAX YAKLAŞIMI ✅
-                # ============================================
-                st.info("📊 İhtiyaçlar hesaplanıyor (MAX yaklaşımı)...")
-                
-                # Her ürün-mağaza için 3 farklı ihtiyaç hesapla
-                df['rpt_ihtiyac'] = (
-                    default_fc * df['satis'] * df['genlestirme']
-                ) - (df['stok'] + df['yol'])
-                
-                df['min_ihtiyac'] = (
-                    df['min_oran'] * df['min_deger']
-                ) - (df['stok'] + df['yol'])
-                
-                # Initial ihtiyacı (sadece yeni ürünler için)
-                df['initial_ihtiyac'] = 0.0
-                if yeni_urunler:
-                    yeni_mask = df['urun_kod'].isin(yeni_urunler)
-                    df.loc[yeni_mask, 'initial_ihtiyac'] = (
-                        df.loc[yeni_mask, 'min_deger'] * df.loc[yeni_mask, 'initial_katsayi']
-                    ) - (df.loc[yeni_mask, 'stok'] + df.loc[yeni_mask, 'yol'])
-                
-                # Negatif değerleri sıfırla
-                df['rpt_ihtiyac'] = df['rpt_ihtiyac'].clip(lower=0)
-                df['min_ihtiyac'] = df['min_ihtiyac'].clip(lower=0)
-                df['initial_ihtiyac'] = df['initial_ihtiyac'].clip(lower=0)
-                
-                # ✅ MAX'I AL - TEK İHTİYAÇ
-                df['ihtiyac'] = df[['rpt_ihtiyac', 'min_ihtiyac', 'initial_ihtiyac']].max(axis=1)
-                
-                # Hangi türden geldiğini belirle
-                def belirle_durum(row):
-                    if row['ihtiyac'] == 0:
-                        return 'Yok'
-                    if row['ihtiyac'] == row['rpt_ihtiyac']:
-                        return 'RPT'
-                    elif row['ihtiyac'] == row['initial_ihtiyac'] and row['initial_ihtiyac'] > 0:
-                        return 'Initial'
-                    elif row['ihtiyac'] == row['min_ihtiyac']:
-                        return 'Min'
-                    else:
-                        return 'RPT'
-                
-                df['durum'] = df.apply(belirle_durum, axis=1)
-                
-                st.success(f"✅ İhtiyaçlar hesaplandı (MAX yaklaşımı)")
-                
-                             
-                # ============================================
-                # 8. YASAK KONTROL
-                # ============================================
-                if (st.session_state.yasak_master is not None and 
-                    'urun_kod' in st.session_state.yasak_master.columns and
-                    'magaza_kod' in st.session_state.yasak_master.columns):
-                    
-                    yasak = st.session_state.yasak_master.copy()
-                    yasak['urun_kod'] = yasak['urun_kod'].astype(str)
-                    yasak['magaza_kod'] = yasak['magaza_kod'].astype(str)
-                    
-                    if 'yasak_durum' in yasak.columns:
-                        df = df.merge(
-                            yasak[['urun_kod', 'magaza_kod', 'yasak_durum']], 
-                            on=['urun_kod', 'magaza_kod'], how='left'
-                        )
-                        df.loc[df['yasak_durum'] == 'Yasak', 'ihtiyac'] = 0
-                        df.drop('yasak_durum', axis=1, inplace=True, errors='ignore')
-                
-                # ============================================
-                # 9. DEPO STOK DAĞITIMI
-                # ============================================
-                st.info("🚀 Depo stok dağıtımı yapılıyor...")
-                
-                # Sadece pozitif ihtiyaçları al
-                result = df[df['ihtiyac'] > 0].copy()
-                st.write(f"Pozitif ihtiyaç sayısı: {len(result):,}")
+                hesap = calculate_store_shipments(
+                    st.session_state.anlik_stok_satis,
+                    st.session_state.depo_stok,
+                    st.session_state.magaza_master,
+                    st.session_state.kpi,
+                    urun_master=st.session_state.urun_master,
+                    yasak_master=st.session_state.yasak_master,
+                    urun_segment_map=st.session_state.urun_segment_map,
+                    magaza_segment_map=st.session_state.magaza_segment_map,
+                    genlestirme_orani=st.session_state.genlestirme_orani,
+                    sisme_orani=st.session_state.sisme_orani,
+                    min_oran=st.session_state.min_oran,
+                    initial_matris=st.session_state.initial_matris,
+                    oncelik_siralama=st.session_state.get('oncelik_siralama'),
+                    cache=st.session_state.fact_cache,
+                    progress=streamlit_progress()
+                )
                 
-                if len(result) == 0:
-                    st.warning("⚠️ Hiç pozitif ihtiyaç bulunamadı!")
+                if hesap['final'] is None:
                     st.stop()
                 
-                # Öncelik sıralaması
-                durum_priority = {'RPT': 1, 'Initial': 2, 'Min': 3}
-                result['durum_oncelik'] = result['durum'].map(durum_priority).fillna(4)
-                result = result.sort_values(['durum_oncelik', 'ihtiyac'], ascending=[True, False])
-                result = result.reset_index(drop=True)
-                
-                # Depo stok dictionary oluştur
-                depo_stok_dict = {}
-                for _, row in depo_df.iterrows():
-                    key = (int(row['depo_kod']), str(row['urun_kod']))
-                    depo_stok_dict[key] = float(row['stok'])
-                
-                # NumPy array'lerle çalış
-                depo_kodlar = result['depo_kod'].values.astype(int)
-                urun_kodlar = result['urun_kod'].values.astype(str)
-                ihtiyaclar = result['ihtiyac'].values.astype(float)
-                
-                sevkiyat_array = np.zeros(len(result), dtype=float)
-                
-                # Tek döngü
-                progress_bar = st.progress(0)
-                total_rows = len(result)
-                
-                for idx in range(total_rows):
-                    key = (depo_kodlar[idx], urun_kodlar[idx])
-                    ihtiyac = ihtiyaclar[idx]
-                    
-                    if key in depo_stok_dict and depo_stok_dict[key] > 0:
-                        sevk = min(ihtiyac, depo_stok_dict[key])
-                        depo_stok_dict[key] -= sevk
-                        sevkiyat_array[idx] = sevk
-                    
-                    # Progress güncelle (her 10K'da bir)
-                    if idx % 10000 == 0:
-                        progress_bar.progress(idx / total_rows)
-                
-                progress_bar.progress(1.0)
-                
-                result['sevkiyat_miktari'] = sevkiyat_array
-                result['stok_yoklugu_satis_kaybi'] = result['ihtiyac'] - result['sevkiyat_miktari']
-                
-                # Temizlik
-                result.drop('durum_oncelik', axis=1, inplace=True, errors='ignore')
-                
-                st.success("✅ Depo stok dağıtımı tamamlandı!")
-                
-                # ============================================
-                # 10. SONUÇ HAZIRLA
-                # ============================================
-                final_columns = [
-                    'magaza_kod', 'urun_kod', 'magaza_segment', 'urun_segment', 'durum',
-                    'stok', 'yol', 'satis', 'ihtiyac', 'sevkiyat_miktari', 'depo_kod', 'stok_yoklugu_satis_kaybi'
-                ]
-                
-                available_columns = [col for col in final_columns if col in result.columns]
-                final = result[available_columns].copy()
-                
-                final = final.rename(columns={
-                    'ihtiyac': 'ihtiyac_miktari'
-                })
-                
-                # Integer dönüşüm
-                for col in ['stok', 'yol', 'satis', 'ihtiyac_miktari', 'sevkiyat_miktari', 'stok_yoklugu_satis_kaybi']:
-                    if col in final.columns:
-                        final[col] = final[col].round().fillna(0).astype(int)
-                
-                # Sıra numaraları
-                final.insert(0, 'sira_no', range(1, len(final) + 1))
-                final.insert(1, 'oncelik', range(1, len(final) + 1))
+                df = hesap['df']
+                depo_df = hesap['depo_df']
+                final = hesap['final']
                 
                 # KAYDET
                 st.session_state.sevkiyat_sonuc = final
@@ -2081,8 +1834,7 @@ elif menu == "📐 Hesaplama":
                 # İndirme butonları
                 col1, col2, col3 = st.columns([1, 1, 2])
                 with col1:
-                    sap_data = final[['magaza_kod', 'urun_kod', 'depo_kod', 'sevkiyat_miktari']].copy()
-                    sap_data = sap_data[sap_data['sevkiyat_miktari'] > 0]
+                    sap_data = sap_export(final)
                     
                     st.download_button(
                         label="📥 SAP Dosyası İndir (CSV)",
@@ -2330,7 +2082,7 @@ elif menu == "📈 Raporlar":
                 il_verileri = il_verileri.merge(magaza_master, on='magaza_kod', how='left')
                 
                 # İl bazında toplamlar
-                il_bazinda = il_verileri.groupby('il').agg({
+                il_bazinda = il_verileri.groupby('il', observed=True).agg({
                     sevkiyat_kolon: 'sum',
                     ihtiyac_kolon: 'sum',
                     'magaza_kod': 'nunique'
@@ -2641,39 +2393,12 @@ elif menu == "💵 PO Hesaplama":
     product_ranges = st.session_state.segmentation_params['product_ranges']
     store_ranges = st.session_state.segmentation_params['store_ranges']
     
-    cover_segments = [f"{int(r[0])}-{int(r[1]) if r[1] != float('inf') else 'inf'}" for r in product_ranges]
-    store_segments = [f"{int(r[0])}-{int(r[1]) if r[1] != float('inf') else 'inf'}" for r in store_ranges]
-    
-    def sort_segments(segments):
-        def get_sort_key(seg):
-            try:
-                return int(seg.split('-')[0])
-            except:
-                return 9999
-        return sorted(segments, key=get_sort_key)
-    
-    cover_segments_sorted = sort_segments(cover_segments)
-    store_segments_sorted = sort_segments(store_segments)
-    
     # İlk kez oluşturuluyorsa
     if st.session_state.cover_segment_matrix is None or \
        not isinstance(st.session_state.cover_segment_matrix, pd.DataFrame) or \
        len(st.session_state.cover_segment_matrix.columns) < 2:
         
-        default_matrix = pd.DataFrame(1.0, index=cover_segments_sorted, columns=store_segments_sorted)
-        
-        for i, prod_seg in enumerate(cover_segments_sorted):
-            prod_start = int(prod_seg.split('-')[0])
-            if prod_start < 5:
-                default_matrix.loc[prod_seg, :] = 1.2
-            elif prod_start < 10:
-                default_matrix.loc[prod_seg, :] = 1.1
-            elif prod_start < 15:
-                default_matrix.loc[prod_seg, :] = 1.05
-            else:
-                default_matrix.loc[prod_seg, :] = 0.75
-        
-        st.session_state.cover_segment_matrix = default_matrix
+        st.session_state.cover_segment_matrix = default_cover_segment_matrix(product_ranges, store_ranges)
     
     # Editable matris göster
     matrix_display = st.session_state.cover_segment_matrix.reset_index()
@@ -2714,281 +2439,37 @@ elif menu == "💵 PO Hesaplama":
                 
                 start_time = time.time()
                 
-                # 1. VERİLERİ HAZIRLA
-                anlik_df = st.session_state.anlik_stok_satis.copy()
-                depo_df = st.session_state.depo_stok.copy()
-                magaza_master = st.session_state.magaza_master.copy()
-                kpi_df = st.session_state.kpi.copy()
-                cover_matrix = st.session_state.cover_segment_matrix.copy()
-                
+                # 1. VERİ BOYUTLARI
                 st.write("**📊 Veri Boyutları:**")
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Anlık Stok/Satış", f"{len(anlik_df):,}")
+                    st.metric("Anlık Stok/Satış", f"{len(st.session_state.anlik_stok_satis):,}")
                 with col2:
-                    st.metric("Depo Stok", f"{len(depo_df):,}")
+                    st.metric("Depo Stok", f"{len(st.session_state.depo_stok):,}")
                 with col3:
-                    st.metric("Mağaza Master", f"{len(magaza_master):,}")
+                    st.metric("Mağaza Master", f"{len(st.session_state.magaza_master):,}")
                 with col4:
-                    st.metric("KPI", f"{len(kpi_df):,}")
-                
-                # Veri tiplerini düzelt
-                anlik_df['urun_kod'] = anlik_df['urun_kod'].astype(str)
-                anlik_df['magaza_kod'] = anlik_df['magaza_kod'].astype(str)
-                depo_df['urun_kod'] = depo_df['urun_kod'].astype(str)
-                depo_df['depo_kod'] = depo_df['depo_kod'].astype(str)
-                magaza_master['magaza_kod'] = magaza_master['magaza_kod'].astype(str)
-                magaza_master['depo_kod'] = magaza_master['depo_kod'].astype(str)
-                
-                # 2. MAĞAZA-DEPO EŞLEŞTİRMESİ
-                st.info("🔗 Mağaza-Depo eşleştirmesi yapılıyor...")
-                
-                df = anlik_df.merge(
-                    magaza_master[['magaza_kod', 'depo_kod']],
-                    on='magaza_kod',
-                    how='left'
+                    st.metric("KPI", f"{len(st.session_state.kpi):,}")
+                
+                # 2-8. HESAP (po_engine.calculate_purchase_orders)
+                po_hesap = calculate_purchase_orders(
+                    st.session_state.anlik_stok_satis,
+                    st.session_state.depo_stok,
+                    st.session_state.magaza_master,
+                    st.session_state.kpi,
+                    st.session_state.cover_segment_matrix,
+                    product_ranges,
+                    store_ranges,
+                    forward_cover=forward_cover,
+                    fc_ek=fc_ek,
+                    depo_stok_threshold=depo_stok_threshold,
+                    urun_master=st.session_state.urun_master,
+                    po_yasak=st.session_state.po_yasak,
+                    cache=st.session_state.fact_cache,
+                    progress=streamlit_progress()
                 )
-                
-                eksik_depo = df['depo_kod'].isna().sum()
-                if eksik_depo > 0:
-                    st.warning(f"⚠️ {eksik_depo} satırda depo kodu bulunamadı (default '1' atanacak)")
-                    df['depo_kod'] = df['depo_kod'].fillna('1')
-                
-                st.write(f"✅ Mağaza-Depo eşleşmesi: {len(df):,} satır")
-                
-                # 3. DEPO STOK EKLE
-                st.info("📦 Depo stokları ekleniyor...")
-                
-                depo_stok_map = depo_df.groupby(['depo_kod', 'urun_kod'])['stok'].sum().reset_index()
-                depo_stok_map.columns = ['depo_kod', 'urun_kod', 'depo_stok']
-                
-                df = df.merge(
-                    depo_stok_map,
-                    on=['depo_kod', 'urun_kod'],
-                    how='left'
-                )
-                df['depo_stok'] = df['depo_stok'].fillna(0)
-                
-                st.write(f"✅ Depo stokları eklendi")
-                
-                # 4. KPI'DAN MIN DEĞER VE FORWARD COVER EKLE
-                st.info("📋 KPI değerleri ekleniyor...")
-                
-                if st.session_state.urun_master is not None and 'mg' in st.session_state.urun_master.columns:
-                    urun_master = st.session_state.urun_master[['urun_kod', 'mg']].copy()
-                    urun_master['urun_kod'] = urun_master['urun_kod'].astype(str)
-                    urun_master['mg'] = urun_master['mg'].astype(str)
-                    
-                    df = df.merge(urun_master, on='urun_kod', how='left')
-                    df['mg'] = df['mg'].fillna('0')
-                    
-                    if 'mg_id' in kpi_df.columns:
-                        kpi_lookup = kpi_df.copy()
-                        kpi_lookup['mg_id'] = kpi_lookup['mg_id'].astype(str)
-                        
-                        # Min değer
-                        if 'min_deger' in kpi_lookup.columns:
-                            df = df.merge(
-                                kpi_lookup[['mg_id', 'min_deger']],
-                                left_on='mg',
-                                right_on='mg_id',
-                                how='left'
-                            )
-                            df['min_deger'] = df['min_deger'].fillna(0)
-                            df.drop('mg_id', axis=1, inplace=True, errors='ignore')
-                        else:
-                            df['min_deger'] = 0
-                        
-                        # Forward Cover (KPI'dan)
-                        if 'forward_cover' in kpi_lookup.columns:
-                            fc_kpi = kpi_lookup[['mg_id', 'forward_cover']].copy()
-                            fc_kpi.columns = ['mg_id', 'fc_kpi']
-                            
-                            df = df.merge(
-                                fc_kpi,
-                                left_on='mg',
-                                right_on='mg_id',
-                                how='left'
-                            )
-                            df['forward_cover_final'] = df['fc_kpi'].fillna(forward_cover)
-                            df.drop(['mg_id', 'fc_kpi'], axis=1, inplace=True, errors='ignore')
-                            
-                            kpi_fc_count = (df['forward_cover_final'] != forward_cover).sum()
-                            if kpi_fc_count > 0:
-                                st.info(f"ℹ️ {kpi_fc_count:,} satır için KPI'dan FC alındı")
-                        else:
-                            df['forward_cover_final'] = forward_cover
-                    else:
-                        df['min_deger'] = 0
-                        df['forward_cover_final'] = forward_cover
-                else:
-                    df['mg'] = '0'
-                    df['min_deger'] = 0
-                    df['forward_cover_final'] = forward_cover
-                
-                st.write(f"✅ KPI değerleri eklendi")
-                
-                # 5. PO YASAK KONTROLÜ
-                if st.session_state.po_yasak is not None:
-                    st.info("🚫 PO Yasak kontrolü yapılıyor...")
-                    
-                    po_yasak = st.session_state.po_yasak.copy()
-                    po_yasak['urun_kodu'] = po_yasak['urun_kodu'].astype(str)
-                    
-                    df = df.merge(
-                        po_yasak[['urun_kodu', 'yasak_durum', 'acik_siparis']],
-                        left_on='urun_kod',
-                        right_on='urun_kodu',
-                        how='left'
-                    )
-                    
-                    df['yasak_durum'] = df['yasak_durum'].fillna(0)
-                    df['acik_siparis'] = df['acik_siparis'].fillna(0)
-                    
-                    yasak_sayisi = (df['yasak_durum'] == 1).sum()
-                    df = df[df['yasak_durum'] != 1]
-                    
-                    if yasak_sayisi > 0:
-                        st.warning(f"⚠️ {yasak_sayisi:,} yasak satır çıkarıldı")
-                    
-                    st.write(f"✅ PO Yasak kontrolü tamamlandı")
-                else:
-                    df['acik_siparis'] = 0
-                
-                # 6. SEGMENTASYON VE GENLEŞTİRME KATSAYISI
-                st.info("📊 Segment ve genleştirme katsayıları hesaplanıyor...")
-                
-                # Ürün bazında toplam stok/satış
-                urun_agg = anlik_df.groupby('urun_kod').agg({
-                    'stok': 'sum',
-                    'satis': 'sum'
-                }).reset_index()
-                urun_agg['urun_stok_satis'] = urun_agg['stok'] / urun_agg['satis'].replace(0, 1)
-                
-                # Mağaza bazında toplam stok/satış
-                magaza_agg = anlik_df.groupby('magaza_kod').agg({
-                    'stok': 'sum',
-                    'satis': 'sum'
-                }).reset_index()
-                magaza_agg['magaza_stok_satis'] = magaza_agg['stok'] / magaza_agg['satis'].replace(0, 1)
-                
-                # Ürün segment ataması
-                urun_agg['urun_segment'] = pd.cut(
-                    urun_agg['urun_stok_satis'],
-                    bins=[r[0] for r in product_ranges] + [product_ranges[-1][1]],
-                    labels=cover_segments_sorted,
-                    include_lowest=True
-                ).astype(str)
-                
-                # Mağaza segment ataması
-                magaza_agg['magaza_segment'] = pd.cut(
-                    magaza_agg['magaza_stok_satis'],
-                    bins=[r[0] for r in store_ranges] + [store_ranges[-1][1]],
-                    labels=store_segments_sorted,
-                    include_lowest=True
-                ).astype(str)
-                
-                # Ana dataframe'e segment bilgilerini ekle
-                df = df.merge(
-                    urun_agg[['urun_kod', 'urun_segment']],
-                    on='urun_kod',
-                    how='left'
-                )
-                df['urun_segment'] = df['urun_segment'].fillna('0-4')
-                
-                df = df.merge(
-                    magaza_agg[['magaza_kod', 'magaza_segment']],
-                    on='magaza_kod',
-                    how='left'
-                )
-                df['magaza_segment'] = df['magaza_segment'].fillna('0-4')
-                
-                # Genleştirme katsayısını matristen al
-                if isinstance(cover_matrix, pd.DataFrame) and len(cover_matrix.columns) > 1:
-                    matrix_long = cover_matrix.stack().reset_index()
-                    matrix_long.columns = ['urun_segment', 'magaza_segment', 'genlestirme_katsayisi']
-                    matrix_long['urun_segment'] = matrix_long['urun_segment'].astype(str)
-                    matrix_long['magaza_segment'] = matrix_long['magaza_segment'].astype(str)
-                    
-                    df = df.merge(
-                        matrix_long,
-                        on=['urun_segment', 'magaza_segment'],
-                        how='left'
-                    )
-                    df['genlestirme_katsayisi'] = df['genlestirme_katsayisi'].fillna(1.0)
-                else:
-                    df['genlestirme_katsayisi'] = 1.0
-                
-                st.write(f"✅ Genleştirme katsayıları eklendi")
-                
-                # 7-8. DEPO-ÜRÜN BAZINDA GRUPLA VE PO HESAPLA
-                st.info("📊 Depo-Ürün bazında gruplama ve PO hesaplama...")
-                
-                # SMM bilgisini kontrol et
-                if 'smm' not in df.columns:
-                    df['smm'] = 0
-                
-                # Önce depo-ürün bazında topla
-                po_sonuc = df.groupby(['depo_kod', 'urun_kod']).agg({
-                    'satis': 'sum',
-                    'stok': 'sum',
-                    'yol': 'sum',
-                    'depo_stok': 'first',
-                    'min_deger': 'first',
-                    'acik_siparis': 'sum',
-                    'forward_cover_final': 'first',
-                    'genlestirme_katsayisi': 'first',
-                    'smm': 'first',
-                    'magaza_kod': 'nunique'
-                }).reset_index()
-                
-                po_sonuc.columns = [
-                    'depo_kod', 'urun_kod', 'toplam_satis', 'toplam_magaza_stok', 
-                    'toplam_yol', 'depo_stok', 'min_deger', 'toplam_acik_siparis',
-                    'forward_cover', 'genlestirme', 'smm', 'magaza_sayisi'
-                ]
-                
-                # Brüt ihtiyaç (TOPLAM bazında)
-                po_sonuc['brut_ihtiyac'] = (
-                    (po_sonuc['forward_cover'] + fc_ek) * 
-                    po_sonuc['toplam_satis'] * 
-                    po_sonuc['genlestirme']
-                )
-                
-                # Net ihtiyaç = Brüt - Mağaza Stok - Yol - Depo Stok - Açık Sipariş
-                po_sonuc['net_ihtiyac'] = (
-                    po_sonuc['brut_ihtiyac'] - 
-                    po_sonuc['toplam_magaza_stok'] - 
-                    po_sonuc['toplam_yol'] - 
-                    po_sonuc['depo_stok'] - 
-                    po_sonuc['toplam_acik_siparis']
-                )
-                
-                # Min kontrolü (toplam mağaza stoku < min ise)
-                po_sonuc['min_ihtiyac'] = np.where(
-                    po_sonuc['min_deger'] > po_sonuc['toplam_magaza_stok'],
-                    po_sonuc['min_deger'] - po_sonuc['toplam_magaza_stok'],
-                    0
-                )
-                
-                # PO ihtiyacı
-                po_sonuc['po_ihtiyac'] = np.maximum(po_sonuc['net_ihtiyac'], po_sonuc['min_ihtiyac'])
-                po_sonuc['po_ihtiyac'] = po_sonuc['po_ihtiyac'].clip(lower=0)
-                
-                st.write(f"✅ PO ihtiyacı hesaplandı: {len(po_sonuc):,} depo-ürün kombinasyonu")
-                
-                # DEPO STOK EŞİĞİ KONTROLÜ
-                yuksek_stok_sayisi = (po_sonuc['depo_stok'] > depo_stok_threshold).sum()
-                po_sonuc.loc[po_sonuc['depo_stok'] > depo_stok_threshold, 'po_ihtiyac'] = 0
-                
-                if yuksek_stok_sayisi > 0:
-                    st.info(f"ℹ️ {yuksek_stok_sayisi:,} üründe depo stok > {depo_stok_threshold}, PO sıfırlandı")
-                
-                po_sonuc_pozitif = po_sonuc[po_sonuc['po_ihtiyac'] > 0].copy()
-                
-                for col in ['po_ihtiyac', 'brut_ihtiyac', 'net_ihtiyac', 'toplam_satis', 'toplam_magaza_stok', 'toplam_yol', 'depo_stok', 'toplam_acik_siparis']:
-                    if col in po_sonuc_pozitif.columns:
-                        po_sonuc_pozitif[col] = po_sonuc_pozitif[col].round().astype(int)
+                po_sonuc = po_hesap['po_sonuc']
+                po_sonuc_pozitif = po_hesap['po_sonuc_pozitif']
                 
                 end_time = time.time()
                 
@@ -3138,19 +2619,7 @@ elif menu == "💵 PO Hesaplama":
                 # DEPO BAZINDA ÖZET
                 st.subheader("🏪 Depo Bazında Özet")
                 
-                depo_ozet = po_sonuc_pozitif.groupby('depo_kod').agg({
-                    'po_ihtiyac': 'sum',
-                    'urun_kod': 'nunique'
-                }).reset_index()
-                
-                if 'po_tutar' in po_sonuc_pozitif.columns:
-                    depo_tutar = po_sonuc_pozitif.groupby('depo_kod')['po_tutar'].sum().reset_index()
-                    depo_ozet = depo_ozet.merge(depo_tutar, on='depo_kod', how='left')
-                    depo_ozet.columns = ['Depo Kodu', 'Toplam PO Adet', 'Ürün Sayısı', 'Toplam PO Tutar']
-                else:
-                    depo_ozet.columns = ['Depo Kodu', 'Toplam PO Adet', 'Ürün Sayısı']
-                
-                depo_ozet = depo_ozet.sort_values('Toplam PO Adet', ascending=False)
+                depo_ozet = po_depot_summary(po_sonuc_pozitif)
                 
                 st.dataframe(depo_ozet, use_container_width=True, hide_index=True)
                 
@@ -3189,6 +2658,95 @@ elif menu == "💵 PO Hesaplama":
             st.error(f"❌ Hata: {str(e)}")
             import traceback
             st.code(traceback.format_exc())
+    
+    # PARAMETRE IZGARASI
+    st.markdown("---")
+    st.subheader("🧮 Parametre Izgarası")
+    st.caption(
+        "Depo-ürün tablosu bir kez hazırlanır; her Forward Cover × FC Ek × Depo Stok Eşiği "
+        "kombinasyonu için depo bazında toplam PO adet ve tutarı hesaplanır."
+    )
+    
+    def sayi_listesi(metin):
+        """'4, 5; 6' → [4.0, 5.0, 6.0]"""
+        return [float(x) for x in metin.replace(';', ',').split(',') if x.strip()]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        izgara_fc_metin = st.text_input("Forward Cover değerleri", value="4, 5, 6", key="izgara_fc")
+    with col2:
+        izgara_ek_metin = st.text_input("FC Ek değerleri", value="1, 2, 3", key="izgara_ek")
+    with col3:
+        izgara_esik_metin = st.text_input("Depo Stok Eşikleri", value="999", key="izgara_esik")
+    
+    if st.button("🧮 Izgarayı Hesapla", use_container_width=True):
+        try:
+            izgara_fc = sayi_listesi(izgara_fc_metin)
+            izgara_ek = sayi_listesi(izgara_ek_metin)
+            izgara_esik = sayi_listesi(izgara_esik_metin)
+            if not (izgara_fc and izgara_ek and izgara_esik):
+                st.warning("⚠️ Her parametre için en az bir değer girin")
+                st.stop()
+            
+            with st.spinner("📊 Izgara hesaplanıyor..."):
+                start_time = time.time()
+                
+                po_hazir = prepare_po_table(
+                    st.session_state.anlik_stok_satis,
+                    st.session_state.depo_stok,
+                    st.session_state.magaza_master,
+                    st.session_state.kpi,
+                    st.session_state.cover_segment_matrix,
+                    product_ranges,
+                    store_ranges,
+                    urun_master=st.session_state.urun_master,
+                    po_yasak=st.session_state.po_yasak,
+                    cache=st.session_state.fact_cache
+                )
+                st.session_state.po_izgara = po_parameter_grid(
+                    po_hazir['po_tablo'], izgara_fc, izgara_ek, izgara_esik,
+                    progress=streamlit_progress()
+                )
+                
+                st.success(f"✅ {len(izgara_fc) * len(izgara_ek) * len(izgara_esik):,} nokta "
+                           f"{time.time() - start_time:.2f} sn'de hesaplandı")
+        
+        except ValueError:
+            st.error("❌ Değerler virgülle ayrılmış sayılar olmalı (ör. 4, 5, 6)")
+    
+    if st.session_state.po_izgara is not None:
+        izgara = st.session_state.po_izgara
+        
+        st.write("**Izgara noktası başına toplam:**")
+        st.dataframe(
+            po_grid_summary(izgara).rename(columns={
+                'forward_cover': 'Forward Cover',
+                'fc_ek': 'FC Ek',
+                'depo_stok_esigi': 'Depo Stok Eşiği',
+                'toplam_po_adet': 'Toplam PO Adet',
+                'toplam_po_tutar': 'Toplam PO Tutar',
+                'urun_sayisi': 'Ürün Sayısı'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        izgara_olcu = st.radio("Depo tablosu", ["Toplam PO Adet", "Toplam PO Tutar"], horizontal=True)
+        depo_pivot = izgara.pivot_table(
+            index=['forward_cover', 'fc_ek', 'depo_stok_esigi'],
+            columns='depo_kod',
+            values='toplam_po_adet' if izgara_olcu == "Toplam PO Adet" else 'toplam_po_tutar',
+            aggfunc='sum'
+        )
+        st.dataframe(depo_pivot, use_container_width=True)
+        
+        st.download_button(
+            label="📥 Izgara Sonucu İndir (CSV)",
+            data=izgara.to_csv(index=False, encoding='utf-8-sig'),
+            file_name=f"po_izgara_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
 
 # ============================================
 # 📊 ALIM SİPARİŞ RAPORLARI
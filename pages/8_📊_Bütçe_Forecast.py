@@ -3,9 +3,10 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-from budget_forecast import BudgetForecaster
+from budget_forecast import load_forecaster
+from dataset_store import DEPO_KULLANILABILIR, DatasetStore
 import numpy as np
-import tempfile
+import hashlib
 import os
 import locale
 import json
@@ -290,21 +291,32 @@ uploaded_file = st.sidebar.file_uploader(
     help="2024-2025 verilerini içeren Excel dosyası"
 )
 
-# Veri yükleme
-@st.cache_data
-def load_data(file_path):
-    return BudgetForecaster(file_path)
+# Veri yükleme - işlenmiş veri dosya özetiyle diskte (veri_deposu, Parquet) saklanır
+@st.cache_resource
+def veri_deposu():
+    """Tüm oturumların paylaştığı veri deposu - pyarrow yoksa None"""
+    return DatasetStore() if DEPO_KULLANILABILIR else None
+
+@st.cache_resource(max_entries=3, show_spinner=False)
+def load_data(dosya_ozet, _dosya_bytes, dosya_adi):
+    """Aynı dosya (özet) tekrar gelirse bellekten, oturumlar arası diskten yüklenir"""
+    try:
+        return load_forecaster(_dosya_bytes, depo=veri_deposu(), kaynak=dosya_adi)
+    except OSError:
+        # Depo okunamaz/yazılamazsa Excel'den devam
+        return load_forecaster(_dosya_bytes, kaynak=dosya_adi)
 
 forecaster = None
 if uploaded_file is not None:
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_path = tmp_file.name
+    dosya_bytes = uploaded_file.getvalue()
     
     with st.spinner('Veri yükleniyor...'):
-        forecaster = load_data(tmp_path)
+        forecaster, onbellekten = load_data(
+            hashlib.sha256(dosya_bytes).hexdigest(), dosya_bytes, uploaded_file.name
+        )
     
-    os.unlink(tmp_path)
+    if onbellekten:
+        st.sidebar.caption("♻️ İşlenmiş veri önbellekten yüklendi (Excel ayrıştırılmadı)")
     
     current_file_name = uploaded_file.name
     
@@ -451,31 +463,31 @@ else:
 st.sidebar.markdown("---")
 st.sidebar.subheader("🎯 Bütçe Versiyonu")
 
+# Versiyon başına otomatik etki oranları - hesaplamada üç versiyon birlikte çalışır
+BUTCE_VERSIYONLARI = {
+    "🔴 Çekimser": {'organic_multiplier': 0.0, 'monthly_effect': 0.50, 'maingroup_effect': 0.50, 'organic_growth_rate': 0.10},
+    "🟡 Normal": {'organic_multiplier': 0.5, 'monthly_effect': 1.00, 'maingroup_effect': 1.00, 'organic_growth_rate': 0.15},
+    "🟢 İyimser": {'organic_multiplier': 1.0, 'monthly_effect': 1.20, 'maingroup_effect': 1.20, 'organic_growth_rate': 0.20}
+}
+
 budget_version = st.sidebar.select_slider(
     "Senaryo Seçin",
-    options=["🔴 Çekimser", "🟡 Normal", "🟢 İyimser"],
+    options=list(BUTCE_VERSIYONLARI),
     value=st.session_state.get('budget_version_slider', '🟡 Normal'),
     key="budget_version_slider"
 )
 
 # Otomatik etki oranları
+organic_multiplier = BUTCE_VERSIYONLARI[budget_version]['organic_multiplier']
+monthly_effect = BUTCE_VERSIYONLARI[budget_version]['monthly_effect']
+maingroup_effect = BUTCE_VERSIYONLARI[budget_version]['maingroup_effect']
+organic_growth_rate = BUTCE_VERSIYONLARI[budget_version]['organic_growth_rate']
+
 if budget_version == "🔴 Çekimser":
-    organic_multiplier = 0.0
-    monthly_effect = 0.50  # %50 etki
-    maingroup_effect = 0.50  # %50 etki
-    organic_growth_rate = 0.10  # %10 organik
     st.sidebar.warning("**Çekimser** - Parametreler %50 etki")
 elif budget_version == "🟡 Normal":
-    organic_multiplier = 0.5
-    monthly_effect = 1.00  # %100 etki (tam)
-    maingroup_effect = 1.00  # %100 etki (tam)
-    organic_growth_rate = 0.15  # %15 organik
     st.sidebar.info("**Normal** - Parametreler %100 etki *(Önerilen)*")
 else:
-    organic_multiplier = 1.0
-    monthly_effect = 1.20  # %120 etki (artırımlı)
-    maingroup_effect = 1.20  # %120 etki (artırımlı)
-    organic_growth_rate = 0.20  # %20 organik
     st.sidebar.success("**İyimser** - Parametreler %120 etki")
 
 # GELİŞMİŞ AYARLAR (isteğe bağlı)
@@ -797,37 +809,57 @@ with main_tabs[0]:
                 zero_maingroups = set()
                 zero_lessons = set()
                 
-                # Ay hedefleri - ETKİ ORANI UYGULA
-                monthly_growth_targets = {}
+                # Ay hedefleri - etki oranı versiyon başına aşağıda uygulanır
+                monthly_base_targets = {}
                 for _, row in edited_monthly.iterrows():
                     month = int(row['Ay'])
                     value = str(row['Hedef (%)']).strip()
                     
                     if value == '*':
                         zero_months.add(month)
-                        monthly_growth_targets[month] = -999
+                        monthly_base_targets[month] = None
                     else:
                         try:
-                            # Etki oranı uygula
-                            monthly_growth_targets[month] = float(value) / 100 * monthly_effect
+                            monthly_base_targets[month] = float(value) / 100
                         except:
-                            monthly_growth_targets[month] = 0.20 * monthly_effect
+                            monthly_base_targets[month] = 0.20
                 
-                # Ana grup - ETKİ ORANI UYGULA
-                maingroup_growth_targets = {}
+                # Ana grup
+                maingroup_base_targets = {}
                 for _, row in edited_maingroup.iterrows():
                     maingroup = row['Ana Grup']
                     value = str(row['Hedef (%)']).strip()
                     
                     if value == '*':
                         zero_maingroups.add(maingroup)
-                        maingroup_growth_targets[maingroup] = -999
+                        maingroup_base_targets[maingroup] = None
                     else:
                         try:
-                            # Etki oranı uygula
-                            maingroup_growth_targets[maingroup] = float(value) / 100 * maingroup_effect
+                            maingroup_base_targets[maingroup] = float(value) / 100
                         except:
-                            maingroup_growth_targets[maingroup] = 0.20 * maingroup_effect
+                            maingroup_base_targets[maingroup] = 0.20
+                
+                def apply_effect(base_targets, effect):
+                    """Hedeflere ETKİ ORANI UYGULA (* = -999, etkiden bağımsız)"""
+                    return {k: -999 if v is None else v * effect for k, v in base_targets.items()}
+                
+                # Üç versiyon - seçili versiyonda özel ayarlar geçerli
+                versions = []
+                for version_name, version_params in BUTCE_VERSIYONLARI.items():
+                    if version_name == budget_version:
+                        version_params = {
+                            'organic_multiplier': organic_multiplier,
+                            'monthly_effect': monthly_effect,
+                            'maingroup_effect': maingroup_effect,
+                            'organic_growth_rate': organic_growth_rate
+                        }
+                    versions.append({
+                        'Version': version_name,
+                        'organic_multiplier': version_params['organic_multiplier'],
+                        'organic_growth_rate': version_params['organic_growth_rate'],
+                        'monthly_growth_targets': apply_effect(monthly_base_targets, version_params['monthly_effect']),
+                        'maingroup_growth_targets': apply_effect(maingroup_base_targets, version_params['maingroup_effect'])
+                    })
                 
                 # Alınan dersler
                 lessons_learned_dict = {}
@@ -864,18 +896,16 @@ with main_tabs[0]:
                     print(f"DEBUG 2: organic_growth_rate = {organic_growth_rate}")
                     print(f"DEBUG 3: budget_version = {budget_version}")
                     
-                    full_data = forecaster.get_full_data_with_forecast(
+                    # Üç versiyon tek geçişte (Version kolonlu uzun tablo)
+                    full_data = forecaster.get_full_data_with_versions(
+                        versions,
                         growth_param=general_growth,
                         margin_improvement=margin_improvement,
                         stock_change_pct=stock_change_pct,
-                        monthly_growth_targets=monthly_growth_targets,
-                        maingroup_growth_targets=maingroup_growth_targets,
                         lessons_learned=lessons_learned_dict,
                         inflation_adjustment=inflation_adjustment,
-                        organic_multiplier=organic_multiplier,
                         price_change_matrix=price_change_dict,
-                        inflation_rate=inflation_future / 100,
-                        organic_growth_rate=organic_growth_rate
+                        inflation_rate=inflation_future / 100
                     )
                     
                 except Exception as e:
@@ -899,13 +929,26 @@ with main_tabs[0]:
                                  (full_data['Month'] == month),
                                  ['Quantity', 'Sales', 'GrossProfit', 'Stock', 'COGS']] = 0
                 
-                summary = forecaster.get_summary_stats(full_data)
+                # Versiyon özetleri - seçili versiyon detay sekmelerini besler
+                version_summaries = {}
+                for version_name, version_data in full_data.groupby('Version', sort=False):
+                    version_summaries[version_name] = forecaster.get_summary_stats(version_data)
+                
+                version_monthly = full_data[full_data['Year'] == 2026].groupby(
+                    ['Version', 'Month'], sort=False
+                )['Sales'].sum().reset_index()
+                
+                full_data = full_data[full_data['Version'] == budget_version].drop(columns='Version').reset_index(drop=True)
+                summary = version_summaries[budget_version]
                 quality_metrics = forecaster.get_forecast_quality_metrics(full_data)
                 
                 st.session_state.forecast_result = {
                     'full_data': full_data,
                     'summary': summary,
-                    'quality_metrics': quality_metrics
+                    'quality_metrics': quality_metrics,
+                    'version': budget_version,
+                    'version_summaries': version_summaries,
+                    'version_monthly': version_monthly
                 }
                 
                 st.success("✅ Tahmin başarıyla hesaplandı! Parametreler kaydedildi. 'Tahmin Sonuçları' sekmesine geçin.")
@@ -967,8 +1010,59 @@ with main_tabs[1]:
         comparison_df = pd.DataFrame(comparison_data)
         st.dataframe(comparison_df, use_container_width=True, hide_index=True)
         
-        st.markdown("---")
+        # Versiyon karşılaştırması (üç versiyon aynı hesaplamada)
+        version_summaries = st.session_state.forecast_result.get('version_summaries')
+        if version_summaries:
+            st.markdown("---")
+            st.markdown("### 🎯 Bütçe Versiyonları (2026)")
+            st.caption(f"Detaylar seçili versiyon için: {st.session_state.forecast_result['version']}")
+            
+            version_cols = st.columns(len(version_summaries))
+            for col, (version_name, version_summary) in zip(version_cols, version_summaries.items()):
+                with col:
+                    v_sales = version_summary[2026]['Total_Sales']
+                    v_sales_2025 = version_summary[2025]['Total_Sales']
+                    v_growth = ((v_sales - v_sales_2025) / v_sales_2025 * 100) if v_sales_2025 > 0 else 0
+                    st.metric(version_name, format_currency(v_sales), f"%{v_growth:.1f}")
+            
+            version_data = []
+            for version_name, version_summary in version_summaries.items():
+                version_data.append({
+                    'Versiyon': version_name,
+                    'Satış': format_currency(version_summary[2026]['Total_Sales']),
+                    'Brüt Kar': format_currency(version_summary[2026]['Total_GrossProfit']),
+                    'Brüt Marj %': f"{version_summary[2026]['Avg_GrossMargin%']:.1f}%",
+                    'Ort. Stok': format_currency(version_summary[2026]['Avg_Stock']),
+                    'Stok/SMM (hafta)': f"{version_summary[2026]['Avg_Stock_COGS_Weekly']:.1f}"
+                })
+            st.dataframe(pd.DataFrame(version_data), use_container_width=True, hide_index=True)
+            
+            version_monthly = st.session_state.forecast_result['version_monthly']
+            version_colors = {'🔴 Çekimser': '#d62728', '🟡 Normal': '#ffbf00', '🟢 İyimser': '#2ca02c'}
+            
+            fig = go.Figure()
+            for version_name in version_summaries:
+                v_data = version_monthly[version_monthly['Version'] == version_name]
+                fig.add_trace(go.Scatter(
+                    x=v_data['Month'],
+                    y=v_data['Sales'],
+                    mode='lines+markers',
+                    name=version_name,
+                    line=dict(width=3, color=version_colors.get(version_name)),
+                    marker=dict(size=8)
+                ))
+            
+            fig.update_layout(
+                title="2026 Aylık Satış - Versiyon Karşılaştırması",
+                xaxis_title="Ay",
+                yaxis_title="Satış (₺)",
+                hovermode='x unified',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
         
+        st.markdown("---")
+
         # Alt sekmeler
         result_tabs = st.tabs(["📊 Aylık Trend", "🎯 Ana Grup Performans", "📅 Yıllık Detay", "📈 Kalite Metrikleri"])
         
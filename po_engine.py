@@ -0,0 +1,1615 @@
+"""
+📋 Sevkiyat / PO Hesaplama Motoru
+Thorius AR4U Platform
+Streamlit'ten bağımsız mağaza sevkiyatı (📐 Hesaplama) ve alım siparişi (💵 PO Hesaplama)
+
+İlerleme bildirimi sevkiyat_engine ile aynı protokolü kullanır:
+progress(mesaj, seviye='info', oran=None)
+"""
+import codecs
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from sevkiyat_engine import DepotStockLedger, hash_frame, no_progress
+
+try:
+    import pyarrow  # noqa: F401 - pd.read_csv(engine='pyarrow') için
+    PYARROW_VAR = True
+except ImportError:
+    PYARROW_VAR = False
+
+
+# -------------------------------
+# VERİ TANIMLARI
+# -------------------------------
+
+# Veri tanımları (yükleme sayfası ve toplu çalıştırma ortak kullanır)
+# dtypes: 'kod' → kırpılmış string kategorili kolon (mağaza/ürün/depo kodları),
+# 'int32' → tam sayıysa int32 (ondalıklıysa float64 kalır).
+# Listelenmeyen kolonlar okunduğu gibi kalır - tutarlar (ciro, smm, iftutar) bilerek
+# listelenmez: float32 ~7 anlamlı basamak tutar, milyonluk toplamlarda kuruş kaybolur.
+VERI_TANIMLARI = {
+    'urun_master': {
+        'name': 'Ürün Master',
+        'required': True,
+        'columns': ['urun_kod', 'satici_kod', 'kategori_kod', 'umg', 'mg', 'marka_kod',
+                   'klasman_kod', 'nitelik', 'durum', 'ithal', 'olcu_birimi', 'koli_ici', 'paket_ici'],
+        'dtypes': {'urun_kod': 'kod', 'satici_kod': 'kod', 'kategori_kod': 'kod', 'umg': 'kod', 'mg': 'kod',
+                   'marka_kod': 'kod', 'klasman_kod': 'kod', 'nitelik': 'kod', 'durum': 'kod',
+                   'olcu_birimi': 'kod', 'koli_ici': 'int32', 'paket_ici': 'int32'},
+        'state_key': 'urun_master',
+        'icon': '📦',
+        'modules': ['Sevkiyat', 'PO', 'Prepack']
+    },
+    'magaza_master': {
+        'name': 'Mağaza Master',
+        'required': True,
+        'columns': ['magaza_kod', 'il', 'bolge', 'tip', 'adres_kod', 'sm', 'bs', 'depo_kod'],
+        'dtypes': {'magaza_kod': 'kod', 'il': 'kod', 'bolge': 'kod', 'tip': 'kod', 'adres_kod': 'kod',
+                   'sm': 'int32', 'bs': 'kod', 'depo_kod': 'kod'},
+        'state_key': 'magaza_master',
+        'icon': '🏪',
+        'modules': ['Sevkiyat', 'PO']
+    },
+    'depo_stok': {
+        'name': 'Depo Stok',
+        'required': True,
+        'columns': ['depo_kod', 'urun_kod', 'stok'],
+        'dtypes': {'depo_kod': 'kod', 'urun_kod': 'kod', 'stok': 'int32'},
+        'state_key': 'depo_stok',
+        'icon': '📦',
+        'modules': ['Sevkiyat', 'PO']
+    },
+    'anlik_stok_satis': {
+        'name': 'Anlık Stok/Satış',
+        'required': True,
+        'columns': ['magaza_kod', 'urun_kod', 'stok', 'yol', 'satis', 'ciro', 'smm'],
+        'dtypes': {'magaza_kod': 'kod', 'urun_kod': 'kod', 'stok': 'int32', 'yol': 'int32', 'satis': 'int32'},
+        'state_key': 'anlik_stok_satis',
+        'icon': '📊',
+        'modules': ['Sevkiyat', 'PO']
+    },
+    'kpi': {
+        'name': 'KPI',
+        'required': True,
+        'columns': ['mg_id', 'min_deger', 'max_deger', 'forward_cover'],
+        'dtypes': {'mg_id': 'kod', 'min_deger': 'int32', 'max_deger': 'int32'},
+        'state_key': 'kpi',
+        'icon': '🎯',
+        'modules': ['Sevkiyat', 'PO']
+    },
+    'yasak_master': {
+        'name': 'Yasak',
+        'required': False,
+        'columns': ['urun_kod', 'magaza_kod', 'yasak_durum'],
+        'dtypes': {'urun_kod': 'kod', 'magaza_kod': 'kod', 'yasak_durum': 'kod'},
+        'state_key': 'yasak_master',
+        'icon': '🚫',
+        'modules': ['Sevkiyat']
+    },
+    'haftalik_trend': {
+        'name': 'Haftalık Trend',
+        'required': False,
+        'columns': ['klasman_kod', 'marka_kod', 'yil', 'hafta', 'stok', 'satis', 'ciro', 'smm', 'iftutar'],
+        'dtypes': {'klasman_kod': 'kod', 'marka_kod': 'kod', 'yil': 'int32', 'hafta': 'int32', 'stok': 'int32',
+                   'satis': 'int32'},
+        'state_key': 'haftalik_trend',
+        'icon': '📈',
+        'modules': ['Sevkiyat']
+    },
+    'po_yasak': {
+        'name': 'PO Yasak',
+        'required': False,
+        'columns': ['urun_kodu', 'yasak_durum', 'acik_siparis'],
+        'dtypes': {'urun_kodu': 'kod', 'yasak_durum': 'int32', 'acik_siparis': 'int32'},
+        'state_key': 'po_yasak',
+        'icon': '🚫',
+        'modules': ['PO']
+    },
+    'po_detay_kpi': {
+        'name': 'PO Detay KPI',
+        'required': False,
+        'columns': ['marka_kod', 'mg_kod', 'cover_hedef', 'bkar_hedef'],
+        'dtypes': {'marka_kod': 'kod', 'mg_kod': 'kod'},
+        'state_key': 'po_detay_kpi',
+        'icon': '🎯',
+        'modules': ['PO']
+    }
+}
+
+# Yüklemede sayısala zorlanan kolonlar
+SAYISAL_KOLONLAR = {
+    'anlik_stok_satis': ['stok', 'yol', 'satis', 'ciro', 'smm'],
+    'depo_stok': ['stok'],
+    'kpi': ['min_deger', 'max_deger', 'forward_cover']
+}
+
+# Varsayılan segment aralıkları (stok/satış oranı)
+VARSAYILAN_SEGMENT_ARALIKLARI = [(0, 4), (5, 8), (9, 12), (12, 15), (15, 20), (20, float('inf'))]
+
+# Varsayılan ihtiyaç türü önceliği (🔢 Sıralama kaydedilmemişse)
+VARSAYILAN_DURUM_SIRASI = ['RPT', 'Initial', 'Min']
+
+
+# -------------------------------
+# CSV OKUMA / TEMİZLEME
+# -------------------------------
+
+# Ayraç / kodlama tespiti için okunan baş kısım
+KOKLAMA_BAYT = 64 * 1024
+
+# Ayraç adayları (eşitlikte sıra önceliği - eski varsayılan ';' önce)
+AYRAC_ADAYLARI = [';', ',', '\t', '|']
+
+
+def _kaynak_baytlari(kaynak):
+    """Dosya yolu, bayt veya dosya benzeri nesneden (UploadedFile dahil) ham içerik"""
+    if isinstance(kaynak, (bytes, bytearray)):
+        return bytes(kaynak)
+    if isinstance(kaynak, (str, os.PathLike)):
+        with open(kaynak, 'rb') as f:
+            return f.read()
+    if hasattr(kaynak, 'getvalue'):
+        return kaynak.getvalue()
+    kaynak.seek(0)
+    return kaynak.read()
+
+
+def sniff_csv(ornek):
+    """
+    İlk birkaç KB'tan ayraç ve kodlama tespiti
+
+    Kodlama: BOM varsa utf-8-sig, UTF-8 çözülüyorsa utf-8, değilse cp1254
+    (Türkçe Windows/Excel çıktısı). Ayraç: başlık satırında en çok geçen aday.
+
+    Returns:
+        (str, str): ayraç, kodlama
+    """
+    if ornek.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        try:
+            # Artımlı çözücü örneğin sonunda bölünmüş çok baytlı karakteri bekletir
+            codecs.getincrementaldecoder('utf-8')().decode(ornek, final=False)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'cp1254'
+
+    metin = ornek.decode(encoding, errors='replace')
+    baslik = metin.lstrip('\ufeff').splitlines()[0] if metin.strip() else ''
+    sayilar = [baslik.count(aday) for aday in AYRAC_ADAYLARI]
+    ayrac = AYRAC_ADAYLARI[int(np.argmax(sayilar))] if max(sayilar, default=0) > 0 else ';'
+    return ayrac, encoding
+
+
+def parse_dtypes(key):
+    """Okuma anında verilecek dtype'lar - tanımdaki kod kolonları kategori olarak ayrıştırılır"""
+    tipler = VERI_TANIMLARI.get(key, {}).get('dtypes', {})
+    return {kolon: 'category' for kolon, tip in tipler.items() if tip == 'kod'}
+
+
+def read_csv_fast(kaynak, sep=None, encoding=None, dtype=None):
+    """
+    Ayraç/kodlama koklanarak tek geçişte CSV oku (pyarrow varsa pyarrow motoru)
+
+    dtype: {kolon: tip} - dosyada olmayan kolonlar yok sayılır
+
+    Returns:
+        (DataFrame, str, str): df, ayraç, kodlama
+    """
+    veri = _kaynak_baytlari(kaynak)
+    koklanan_sep, koklanan_encoding = sniff_csv(veri[:KOKLAMA_BAYT])
+    sep = sep or koklanan_sep
+    encoding = encoding or koklanan_encoding
+
+    if PYARROW_VAR:
+        try:
+            df = pd.read_csv(io.BytesIO(veri), sep=sep, encoding=encoding, dtype=dtype, engine='pyarrow')
+            return df, sep, encoding
+        except (ValueError, TypeError, KeyError):
+            # pyarrow'un desteklemediği içerik/seçenek - C motoruna düş
+            pass
+
+    df = pd.read_csv(io.BytesIO(veri), sep=sep, encoding=encoding, dtype=dtype,
+                     quoting=1, on_bad_lines='warn')
+    return df, sep, encoding
+
+
+def _oku_ve_olc(ad, kaynak, sep, dtype=None):
+    baslangic = time.perf_counter()
+    try:
+        df, ayrac, encoding = read_csv_fast(kaynak, sep=sep, dtype=dtype)
+        hata = None
+    except Exception as e:
+        df, ayrac, encoding, hata = None, sep, None, str(e)
+    return {
+        'ad': ad,
+        'df': df,
+        'sep': ayrac,
+        'encoding': encoding,
+        'satir': 0 if df is None else len(df),
+        'sure_sn': time.perf_counter() - baslangic,
+        'hata': hata
+    }
+
+
+def ingest_csv_files(dosyalar, sep=None, max_workers=None, progress=None):
+    """
+    Birden çok CSV'yi eşzamanlı oku (iş parçacığı havuzu)
+
+    Ayrıştırma C/pyarrow kodunda GIL'i bıraktığından iş parçacıkları yeterli;
+    süreç havuzu DataFrame'leri geri taşırken kopyalama maliyeti eklerdi.
+
+    Args:
+        dosyalar: [(ad, kaynak)] veya [(ad, kaynak, dtype)] - kaynak yol, bayt
+            veya dosya benzeri nesne; dtype genelde parse_dtypes(veri_anahtarı)
+        sep: Sabit ayraç (None = her dosya için koklanır)
+
+    Returns:
+        list: Girdi sırasında [{'ad', 'df', 'sep', 'encoding', 'satir', 'sure_sn', 'hata'}]
+            (okunamayan dosyada df None, hata mesajı dolu)
+    """
+    progress = progress or no_progress
+    dosyalar = list(dosyalar)
+    if not dosyalar:
+        return []
+
+    isci = max_workers or min(len(dosyalar), os.cpu_count() or 1)
+    sonuclar = [None] * len(dosyalar)
+    with ThreadPoolExecutor(max_workers=max(1, isci)) as havuz:
+        futures = {
+            havuz.submit(_oku_ve_olc, *dosya[:2], sep, *dosya[2:]): i
+            for i, dosya in enumerate(dosyalar)
+        }
+        for tamamlanan, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            sonuclar[i] = future.result()
+            progress(f"📄 {sonuclar[i]['ad']} okundu", oran=tamamlanan / len(dosyalar))
+
+    return sonuclar
+
+
+def match_dataset_key(filename):
+    """
+    Dosya adından veri tanımı anahtarını bul
+
+    Önce dosya adı (uzantısız) birebir anahtar ile eşleşir; böylece
+    'po_detay_kpi.csv' 'kpi', 'po_yasak.csv' 'yasak_master' ile karışmaz.
+    Sonra eski kural: anahtar veya tanım adı dosya adının içinde geçiyorsa.
+    """
+    filename = filename.lower()
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if stem in VERI_TANIMLARI:
+        return stem
+
+    for key, definition in VERI_TANIMLARI.items():
+        if key in filename or definition['name'].lower().replace(' ', '_') in filename:
+            return key
+    return None
+
+
+def missing_dataset_columns(key, df):
+    """Tanımda olup DataFrame'de olmayan kolonlar (set)"""
+    return set(VERI_TANIMLARI[key]['columns']) - set(df.columns)
+
+
+def code_column(seri):
+    """
+    Kod kolonu string anahtar olarak - string kategorili kolon olduğu gibi döner
+
+    Yüklemede kategoriye çevrilen kodlarda milyonlarca satırı yeniden
+    string'e çevirmek gerekmez; diğer tipler eskisi gibi astype(str).
+    """
+    if isinstance(seri.dtype, pd.CategoricalDtype):
+        if pd.api.types.is_string_dtype(seri.cat.categories) or len(seri.cat.categories) == 0:
+            return seri
+        return seri.cat.rename_categories(seri.cat.categories.astype(str))
+    return seri.astype(str)
+
+
+def map_codes(seri, eslesme, varsayilan):
+    """
+    seri.astype(str).map(eslesme).fillna(varsayilan) - kategorik kolonda
+    eşleme satırlar yerine kategoriler üzerinde bir kez yapılır
+    """
+    if not isinstance(seri.dtype, pd.CategoricalDtype):
+        return seri.astype(str).map(eslesme).fillna(varsayilan)
+
+    kategoriler = seri.cat.categories.astype(str)
+    degerler = np.append(kategoriler.map(eslesme).to_series().fillna(varsayilan).to_numpy(), varsayilan)
+    # Boş kod (-1) son eleman olan varsayılanı alır
+    return pd.Series(degerler[seri.cat.codes.to_numpy()], index=seri.index)
+
+
+def _kod_kategorisi(seri):
+    """Kolonu kırpılmış string kategorili kolona çevir (boş değerler boş kalır)"""
+    if not isinstance(seri.dtype, pd.CategoricalDtype):
+        seri = seri.astype('category')
+
+    kategoriler = seri.cat.categories
+    temiz = kategoriler.astype(str).str.strip()
+    if temiz.equals(kategoriler):
+        return seri
+
+    # Kırpma sonrası çakışan kategoriler ('A ' ve 'A') tek koda iner
+    yeni_kod, tekiller = pd.factorize(temiz)
+    kodlar = seri.cat.codes.to_numpy()
+    kodlar = np.where(kodlar >= 0, yeni_kod[kodlar], -1)
+    return pd.Series(pd.Categorical.from_codes(kodlar, categories=tekiller), index=seri.index, name=seri.name)
+
+
+def _sayi_kolonu(seri, tip):
+    """
+    Sayısal kolonu küçült - int32 sadece değerler tam sayı ve aralık içindeyse
+    (aksi halde kolon olduğu gibi kalır, bilgi kaybı olmaz)
+    """
+    if not pd.api.types.is_numeric_dtype(seri) or pd.api.types.is_bool_dtype(seri):
+        return seri
+    if seri.hasnans:
+        return seri
+    degerler = seri.to_numpy()
+    if len(degerler) == 0:
+        return seri.astype(np.int32)
+    sinir = np.iinfo(np.int32)
+    if degerler.min() < sinir.min or degerler.max() > sinir.max:
+        return seri
+    if degerler.dtype.kind == 'f' and not np.array_equal(degerler, np.floor(degerler)):
+        return seri
+    return seri.astype(np.int32)
+
+
+def clean_dataset(key, df):
+    """
+    Tanımdaki kolonları al, string kolonları kırp, sayısal kolonları zorla;
+    ardından tanımdaki dtypes'a göre kodları kategoriye çevir, sayıları küçült
+    """
+    df_clean = df[VERI_TANIMLARI[key]['columns']].copy()
+    tipler = VERI_TANIMLARI[key].get('dtypes', {})
+
+    # String kolonları temizle
+    string_columns = df_clean.select_dtypes(include=['object']).columns
+    for col in string_columns:
+        df_clean[col] = df_clean[col].str.strip() if df_clean[col].dtype == 'object' else df_clean[col]
+
+    # Sayısal kolonları zorla (özel dosyalar için)
+    for col in SAYISAL_KOLONLAR.get(key, []):
+        if col in df_clean.columns:
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+
+    # Bellek: kodlar kategori, adet kolonları int32 (tutarlar float64 kalır)
+    for col, tip in tipler.items():
+        if col not in df_clean.columns:
+            continue
+        if tip == 'kod':
+            df_clean[col] = _kod_kategorisi(df_clean[col])
+        else:
+            df_clean[col] = _sayi_kolonu(df_clean[col], tip)
+
+    return df_clean
+
+
+def _kolon_tipi(parcalar, kolon):
+    """Parçalardaki kolonun ortak NumPy tipi (sayısal değilse object)"""
+    tipler = [p[kolon].dtype for p in parcalar]
+    if all(isinstance(t, np.dtype) and t.kind in 'biuf' for t in tipler):
+        return np.result_type(*tipler)
+    return np.dtype(object)
+
+
+def merge_parts(parcalar, anahtar=('magaza_kod', 'urun_kod'), progress=None):
+    """
+    Parçaları tek seferde birleştir; aynı anahtarda son gelen satır kalır
+
+    Anahtar kolonları parçalar geldikçe büyüyen kategori indeksleriyle tam
+    sayıya kodlanır; tekrar kontrolü birleşik kod üzerinde tek hash geçişidir.
+    Sonuç kolonları son boyutta bir kez ayrılır ve her parça kopyalandıktan
+    sonra listeden bırakılır - tepe bellek ≈ sonuç + bir parça.
+    Sonuç, concat + drop_duplicates(keep='last') ile aynıdır (index dahil);
+    tüm parçalarda kategorik olan anahtar kolonları kategorik kalır. Eksik
+    anahtar değerleri (NaN/None) drop_duplicates'taki gibi tek bir değer sayılır.
+
+    Args:
+        parcalar: Aynı kolonlu DataFrame listesi - liste tüketilir (elemanlar None olur)
+
+    Returns:
+        (DataFrame, list): birleşik veri, parça başına
+            [{'parca', 'satir', 'ezilen', 'ezen'}] - ezilen: sonraki bir satırla
+            değişen satırlar, ezen: önceki bir satırın yerine geçen satırlar
+    """
+    progress = progress or no_progress
+    anahtar = list(anahtar)
+    if not parcalar:
+        return None, []
+
+    kolonlar = list(parcalar[0].columns)
+    kolon_tipleri = {kolon: _kolon_tipi(parcalar, kolon) for kolon in kolonlar if kolon not in anahtar}
+    kategorik = {
+        kolon: all(isinstance(p[kolon].dtype, pd.CategoricalDtype) for p in parcalar)
+        for kolon in anahtar
+    }
+    satir_sayilari = np.array([len(p) for p in parcalar])
+    sinirlar = np.r_[0, np.cumsum(satir_sayilari)]
+
+    # Anahtar kodlama: parça geldikçe yeni değerler kategori indeksine eklenir
+    # Kod 0 eksik değer (NaN/None) yuvası; kategori j'nin kodu j + 1
+    # Kategorik anahtarda ilk parçanın kategorileriyle başlanır (ortak kategoriler korunur)
+    kategoriler = {
+        kolon: pd.Index(parcalar[0][kolon].cat.categories.to_numpy(dtype=object) if kategorik[kolon] else [],
+                        dtype=object)
+        for kolon in anahtar
+    }
+    kodlar = {kolon: np.empty(sinirlar[-1], dtype=np.int64) for kolon in anahtar}
+    for i, parca in enumerate(parcalar):
+        for kolon in anahtar:
+            # Parça içinde factorize, sadece tekil değerler çalışan indekse eşlenir
+            parca_kod, tekiller = pd.factorize(parca[kolon])
+            tekiller = tekiller.to_numpy(dtype=object)
+            eslesme = kategoriler[kolon].get_indexer(tekiller)
+            if (eslesme < 0).any():
+                yeni = tekiller[eslesme < 0]
+                eslesme[eslesme < 0] = np.arange(len(kategoriler[kolon]), len(kategoriler[kolon]) + len(yeni))
+                kategoriler[kolon] = kategoriler[kolon].append(pd.Index(yeni, dtype=object))
+            # factorize eksik değere -1 verir → eslesme'nin başına eklenen 0 (NaN yuvası)
+            kodlar[kolon][sinirlar[i]:sinirlar[i + 1]] = np.r_[0, eslesme + 1][parca_kod + 1]
+
+    birlesik_kod = np.ravel_multi_index(
+        [kodlar[kolon] for kolon in anahtar], [len(kategoriler[kolon]) + 1 for kolon in anahtar]
+    )
+    # Tek hash geçişi: anahtar başına son pozisyon ve tekrar sayısı
+    grup, tekil = pd.factorize(birlesik_kod)
+    del birlesik_kod
+    sira = np.arange(len(grup))
+    son_pozisyon = np.full(len(tekil), -1, dtype=np.int64)
+    np.maximum.at(son_pozisyon, grup, sira)
+    kalan = son_pozisyon[grup] == sira
+    ezen = kalan & (np.bincount(grup, minlength=len(tekil)) > 1)[grup]
+    del grup, sira, son_pozisyon
+
+    rapor = []
+    for i in range(len(parcalar)):
+        dilim = slice(sinirlar[i], sinirlar[i + 1])
+        rapor.append({
+            'parca': i + 1,
+            'satir': int(satir_sayilari[i]),
+            'ezilen': int((~kalan[dilim]).sum()),
+            'ezen': int(ezen[dilim].sum())
+        })
+
+    # Sonuç kolonları son boyutta; anahtarlar kategori indeksinden geri açılır
+    # (kategorik olmayan anahtarda eksik değerler aşağıda parçadaki orijinal değerle doldurulur)
+    kalan_pozisyon = np.flatnonzero(kalan)
+    sonuc = {
+        kolon: (pd.Categorical.from_codes(kodlar[kolon][kalan] - 1,
+                                          categories=kategoriler[kolon].astype(parcalar[0][kolon].cat.categories.dtype))
+                if kategorik[kolon] else np.r_[[None], kategoriler[kolon].to_numpy()][kodlar[kolon][kalan]])
+        for kolon in anahtar
+    }
+    # Kategorik olmayan anahtar parçalardaki ortak tipini korur (object dizisinden str çıkarımı yapılmaz)
+    anahtar_tipleri = {
+        kolon: parcalar[0][kolon].dtype for kolon in anahtar
+        if not kategorik[kolon] and all(p[kolon].dtype == parcalar[0][kolon].dtype for p in parcalar)
+    }
+    eksik_anahtar = {
+        kolon: kodlar[kolon] == 0 for kolon in anahtar
+        if not kategorik[kolon] and (kodlar[kolon][kalan] == 0).any()
+    }
+    del kodlar
+    for kolon, tip in kolon_tipleri.items():
+        sonuc[kolon] = np.empty(len(kalan_pozisyon), dtype=tip)
+
+    hedef_baslangic = 0
+    for i in range(len(parcalar)):
+        secili = kalan[sinirlar[i]:sinirlar[i + 1]]
+        adet = int(secili.sum())
+        for kolon, tip in kolon_tipleri.items():
+            degerler = parcalar[i][kolon].to_numpy(dtype=tip if tip.kind != 'O' else None)
+            sonuc[kolon][hedef_baslangic:hedef_baslangic + adet] = degerler[secili]
+        for kolon, eksik in eksik_anahtar.items():
+            bos = eksik[sinirlar[i]:sinirlar[i + 1]][secili]
+            if bos.any():
+                degerler = parcalar[i][kolon].to_numpy(dtype=object)[secili]
+                sonuc[kolon][hedef_baslangic:hedef_baslangic + adet][bos] = degerler[bos]
+        hedef_baslangic += adet
+        parcalar[i] = None
+        progress(f"🔗 Parça {i + 1}/{len(parcalar)} birleştirildi", oran=(i + 1) / len(parcalar))
+
+    index = pd.RangeIndex(len(kalan)) if kalan.all() else pd.Index(kalan_pozisyon)
+    for kolon, tip in anahtar_tipleri.items():
+        sonuc[kolon] = pd.Series(sonuc[kolon], index=index, dtype=tip)
+    df = pd.DataFrame(sonuc, index=index, columns=kolonlar)
+    return df, rapor
+
+
+def load_dataset_dir(klasor, progress=None):
+    """
+    Klasördeki CSV'leri veri tanımlarına göre oku ve temizle
+
+    Returns:
+        dict: {veri_anahtarı: DataFrame} - eşleşmeyen veya eksik kolonlu dosyalar atlanır
+    """
+    progress = progress or no_progress
+    veriler = {}
+
+    eslesen = []
+    for dosya in sorted(os.listdir(klasor)):
+        if not dosya.lower().endswith('.csv'):
+            continue
+
+        key = match_dataset_key(dosya)
+        if key is None:
+            progress(f"❌ {dosya}: Eşleştirilemedi", 'warning')
+            continue
+        eslesen.append((key, dosya))
+
+    okunan = ingest_csv_files([
+        (dosya, os.path.join(klasor, dosya), parse_dtypes(key)) for key, dosya in eslesen
+    ])
+
+    for (key, dosya), sonuc in zip(eslesen, okunan):
+        if sonuc['hata']:
+            progress(f"❌ {dosya}: {sonuc['hata']}", 'warning')
+            continue
+
+        eksik = missing_dataset_columns(key, sonuc['df'])
+        if eksik:
+            progress(f"❌ {dosya}: Eksik kolon: {', '.join(sorted(eksik)[:3])}", 'warning')
+            continue
+
+        veriler[key] = clean_dataset(key, sonuc['df'])
+        progress(f"✅ {dosya} → {VERI_TANIMLARI[key]['name']}: {len(veriler[key]):,} satır "
+                 f"({sonuc['sure_sn']:.2f} sn)")
+
+    return veriler
+
+
+# -------------------------------
+# SEGMENTASYON
+# -------------------------------
+
+def segment_labels(ranges):
+    """[(min, max)] aralıklarından '0-4', '20-inf' gibi etiketler"""
+    return [f"{int(r[0])}-{int(r[1]) if r[1] != float('inf') else 'inf'}" for r in ranges]
+
+
+def sort_segments(segments):
+    """Segment etiketlerini başlangıç değerine göre sırala"""
+    def get_sort_key(seg):
+        try:
+            return int(seg.split('-')[0])
+        except:
+            return 9999
+    return sorted(segments, key=get_sort_key)
+
+
+def _stok_satis_segmenti(oran, ranges):
+    return pd.cut(
+        oran,
+        bins=[r[0] for r in ranges] + [ranges[-1][1]],
+        labels=segment_labels(ranges),
+        include_lowest=True
+    )
+
+
+def build_segment_maps(anlik_stok_satis, product_ranges=None, store_ranges=None):
+    """
+    Stok/satış oranına göre ürün ve mağaza segment haritaları
+    (🫧 Segmentasyon sayfasının kaydettiği urun_segment_map / magaza_segment_map)
+    """
+    product_ranges = product_ranges or VARSAYILAN_SEGMENT_ARALIKLARI
+    store_ranges = store_ranges or VARSAYILAN_SEGMENT_ARALIKLARI
+
+    urun_agg = anlik_stok_satis.groupby('urun_kod', observed=True).agg({'stok': 'sum', 'satis': 'sum'})
+    urun_segment = _stok_satis_segmenti(urun_agg['stok'] / urun_agg['satis'].replace(0, 1), product_ranges)
+
+    magaza_agg = anlik_stok_satis.groupby('magaza_kod', observed=True).agg({'stok': 'sum', 'satis': 'sum'})
+    magaza_segment = _stok_satis_segmenti(magaza_agg['stok'] / magaza_agg['satis'].replace(0, 1), store_ranges)
+
+    return urun_segment.to_dict(), magaza_segment.to_dict()
+
+
+def default_cover_segment_matrix(product_ranges=None, store_ranges=None):
+    """PO genleştirme matrisinin varsayılanı (ürün segment başlangıcına göre)"""
+    product_ranges = product_ranges or VARSAYILAN_SEGMENT_ARALIKLARI
+    store_ranges = store_ranges or VARSAYILAN_SEGMENT_ARALIKLARI
+
+    cover_segments_sorted = sort_segments(segment_labels(product_ranges))
+    store_segments_sorted = sort_segments(segment_labels(store_ranges))
+
+    default_matrix = pd.DataFrame(1.0, index=cover_segments_sorted, columns=store_segments_sorted)
+
+    for prod_seg in cover_segments_sorted:
+        prod_start = int(prod_seg.split('-')[0])
+        if prod_start < 5:
+            default_matrix.loc[prod_seg, :] = 1.2
+        elif prod_start < 10:
+            default_matrix.loc[prod_seg, :] = 1.1
+        elif prod_start < 15:
+            default_matrix.loc[prod_seg, :] = 1.05
+        else:
+            default_matrix.loc[prod_seg, :] = 0.75
+
+    return default_matrix
+
+
+class SegmentMatrixStore:
+    """
+    Mağaza segmenti × ürün segmenti katsayı matrislerinin tam sayı kodlu deposu
+
+    Matrisler (index: mağaza segmenti, kolon: ürün segmenti) ortak segment
+    etiketlerine hizalanıp tek bir (matris, mağaza, ürün) dizisinde tutulur.
+    Her eksende son konum "bulunamadı" yeridir ve varsayılan değeri taşır;
+    bilinmeyen segmentlerin kategori kodu -1 olduğundan doğrudan oraya düşer.
+    Matriste olmayan veya boş hücreler de varsayılanı alır (eski merge + fillna).
+    """
+
+    def __init__(self, matrisler, varsayilanlar):
+        """
+        Args:
+            matrisler: {kolon: DataFrame} - sıra gather çıktısının satır sırasıdır
+            varsayilanlar: {kolon: varsayılan değer}
+        """
+        self.kolonlar = list(matrisler)
+        self.magaza_segmentleri = pd.Index(pd.unique(np.concatenate(
+            [m.index.astype(str).to_numpy() for m in matrisler.values()]
+        )))
+        self.urun_segmentleri = pd.Index(pd.unique(np.concatenate(
+            [m.columns.astype(str).to_numpy() for m in matrisler.values()]
+        )))
+
+        self._degerler = np.empty(
+            (len(self.kolonlar), len(self.magaza_segmentleri) + 1, len(self.urun_segmentleri) + 1)
+        )
+        for i, kolon in enumerate(self.kolonlar):
+            matris = matrisler[kolon].copy()
+            matris.index = matris.index.astype(str)
+            matris.columns = matris.columns.astype(str)
+            matris = matris[~matris.index.duplicated(keep='last')]
+            matris = matris.loc[:, ~matris.columns.duplicated(keep='last')]
+
+            hizali = matris.reindex(index=self.magaza_segmentleri, columns=self.urun_segmentleri)
+            degerler = np.full(self._degerler.shape[1:], float(varsayilanlar[kolon]))
+            degerler[:-1, :-1] = hizali.to_numpy(dtype=float)
+            self._degerler[i] = np.where(np.isnan(degerler), float(varsayilanlar[kolon]), degerler)
+
+    def codes(self, magaza_segment, urun_segment):
+        """Segment etiketlerinin tam sayı kodları (bilinmeyen -1)"""
+        magaza_kod = pd.Categorical(np.asarray(magaza_segment, dtype=str), categories=self.magaza_segmentleri).codes
+        urun_kod = pd.Categorical(np.asarray(urun_segment, dtype=str), categories=self.urun_segmentleri).codes
+        return magaza_kod, urun_kod
+
+    def gather(self, magaza_segment, urun_segment):
+        """Tüm katsayılar tek indekslemeyle: (len(kolonlar), satır) dizisi"""
+        magaza_kod, urun_kod = self.codes(magaza_segment, urun_segment)
+        return self._degerler[:, magaza_kod, urun_kod]
+
+
+# -------------------------------
+# ORTAK ZENGİNLEŞTİRİLMİŞ VERİ
+# -------------------------------
+
+def depot_codes(seri):
+    """
+    Depo kodu kategorik string anahtar - 📐 Hesaplama ve 💵 PO aynı tipi kullanır
+    Tam sayı değerli float kolonlar '1.0' değil '1' olur; boş değerler boş kalır
+    """
+    dolu = seri.dropna()
+    if pd.api.types.is_float_dtype(seri) and np.array_equal(dolu, np.floor(dolu)):
+        seri = seri.astype('Int64')
+    kodlar = code_column(seri)
+    if not isinstance(kodlar.dtype, pd.CategoricalDtype):
+        kodlar = kodlar.where(seri.notna()).astype('category')
+    return kodlar
+
+
+def _sol_kategorisine(sag, kolon, sol):
+    """
+    Sağ tablonun anahtarını sol kolonun kategorilerine çevir - merge kodlar
+    üzerinden yapılır ve anahtar kategorik kalır. Solda olmayan değerler
+    left join'de zaten eşleşmeyeceği için atılır.
+    """
+    if not isinstance(sol.dtype, pd.CategoricalDtype):
+        return sag
+    yeni = code_column(sag[kolon]).astype(sol.dtype)
+    maske = yeni.notna() | sag[kolon].isna()
+    sag = sag[maske].copy()
+    sag[kolon] = yeni[maske]
+    return sag
+
+
+def build_fact_table(anlik_stok_satis, magaza_master, urun_master=None, kpi=None, progress=None):
+    """
+    📐 Hesaplama ve 💵 PO Hesaplama'nın ortak zenginleştirilmiş tablosu
+
+    anlik_stok_satis satırları + mg (urun_master, yoksa '0') + KPI min_deger /
+    max_deger / fc_kpi (mg → mg_id) + depo_kod (magaza_master, eşleşmeyen veya 0 → '1').
+    Kodlar kategorik string.
+    """
+    progress = progress or no_progress
+
+    df = anlik_stok_satis.copy()
+    df['urun_kod'] = code_column(df['urun_kod'])
+    df['magaza_kod'] = code_column(df['magaza_kod'])
+
+    # MG (ürün master)
+    if urun_master is not None and 'mg' in urun_master.columns:
+        urun_m = urun_master[['urun_kod', 'mg']].copy()
+        urun_m['urun_kod'] = code_column(urun_m['urun_kod'])
+        urun_m['mg'] = urun_m['mg'].astype(object).fillna('0').astype(str).astype('category')
+        df = df.merge(_sol_kategorisine(urun_m, 'urun_kod', df['urun_kod']), on='urun_kod', how='left')
+        if df['mg'].hasnans:
+            if '0' not in df['mg'].cat.categories:
+                df['mg'] = df['mg'].cat.add_categories('0')
+            df['mg'] = df['mg'].fillna('0')
+    else:
+        df['mg'] = pd.Series('0', index=df.index, dtype='category')
+
+    # KPI (mg → mg_id)
+    if kpi is not None and not kpi.empty and 'mg_id' in kpi.columns:
+        df['min_deger'], df['max_deger'] = kpi_limits(df['mg'], kpi)
+        df['fc_kpi'] = kpi_forward_cover(df['mg'], kpi)
+    else:
+        df['min_deger'] = 0.0
+        df['max_deger'] = 999999.0
+        df['fc_kpi'] = np.nan
+
+    # Depo kodu (mağaza master)
+    if 'depo_kod' in magaza_master.columns:
+        magaza_m = magaza_master[['magaza_kod', 'depo_kod']].copy()
+        magaza_m['magaza_kod'] = code_column(magaza_m['magaza_kod'])
+        magaza_m['depo_kod'] = depot_codes(magaza_m['depo_kod'])
+        df = df.merge(_sol_kategorisine(magaza_m, 'magaza_kod', df['magaza_kod']), on='magaza_kod', how='left')
+
+        # Depo kodu 0 da eşleşmemiş sayılır (default '1')
+        if '0' in df['depo_kod'].cat.categories:
+            df['depo_kod'] = df['depo_kod'].cat.remove_categories('0')
+
+        eksik_depo = int(df['depo_kod'].isna().sum())
+        if eksik_depo > 0:
+            progress(f"⚠️ {eksik_depo:,} satırda depo kodu bulunamadı veya 0 (default '1' atanacak)", 'warning')
+            if '1' not in df['depo_kod'].cat.categories:
+                df['depo_kod'] = df['depo_kod'].cat.add_categories('1')
+            df['depo_kod'] = df['depo_kod'].fillna('1')
+    else:
+        df['depo_kod'] = pd.Series('1', index=df.index, dtype='category')
+
+    return df
+
+
+def fact_table_key(anlik_stok_satis, magaza_master, urun_master=None, kpi=None):
+    """Zenginleştirilmiş tablo önbellek anahtarı: kaynak verilerin içerik özeti"""
+    ozet = hashlib.sha256()
+    for ad, df in [('anlik_stok_satis', anlik_stok_satis), ('magaza_master', magaza_master),
+                   ('urun_master', urun_master), ('kpi', kpi)]:
+        ozet.update(ad.encode())
+        ozet.update(hash_frame(df).encode() if df is not None else b'-')
+    return ozet.hexdigest()
+
+
+def enriched_fact_table(anlik_stok_satis, magaza_master, urun_master=None, kpi=None,
+                        cache=None, progress=None):
+    """
+    build_fact_table + önbellek (sevkiyat_engine.PreprocessingCache)
+
+    Anahtar kaynak verilerin içerik özeti olduğundan herhangi bir kaynak
+    değişince tablo yeniden kurulur; aynı veriyle önce 📐 Hesaplama sonra
+    💵 PO çalışınca birleştirmeler bir kez yapılır. Dönen tablo önbellekle
+    paylaşılır - değiştirilecekse kopyalanmalı.
+    """
+    progress = progress or no_progress
+    if cache is None:
+        return build_fact_table(anlik_stok_satis, magaza_master, urun_master, kpi, progress=progress)
+
+    anahtar = fact_table_key(anlik_stok_satis, magaza_master, urun_master, kpi)
+    fact = cache.get(anahtar)
+    if fact is None:
+        fact = build_fact_table(anlik_stok_satis, magaza_master, urun_master, kpi, progress=progress)
+        cache.put(anahtar, fact)
+    else:
+        progress("♻️ Zenginleştirilmiş veri önbellekten alındı (depo/mg/KPI birleştirmeleri atlandı)")
+    return fact
+
+
+# -------------------------------
+# 📐 MAĞAZA SEVKİYAT HESABI
+# -------------------------------
+
+def allocate_in_priority_order(grup, ihtiyac, stok):
+    """
+    Satırlar öncelik sırasındayken greedy ilk gelen dağıtım: her satır
+    (grubunun) kalan stoğundan min(ihtiyaç, kalan) alır, stok ≤ 0 ise 0.
+
+    Gruplar (depo, ürün) içinde öncelik sırasına göre numaralanır (gruplu
+    kümülatif sayım) ve her adımda tüm grupların aynı sıradaki satırı birlikte
+    düşülür. Kalan stok, satır satır döngüdeki ((stok - i1) - i2) - ... ile
+    aynı sırada çıkarıldığından ondalıklı ihtiyaçlarda da sonuç bit bit aynıdır.
+    Adım sayısı, stoğu bitmemiş en uzun grubun satır sayısıdır.
+
+    Args:
+        grup: Satır başına grup anahtarı (ör. defter pozisyonu, -1 = stok yok)
+        ihtiyac: Satır başına ihtiyaç
+        stok: Satır başına grubun başlangıç stoğu
+
+    Returns:
+        np.ndarray: Satır başına sevkiyat
+    """
+    n = len(grup)
+    sevk = np.zeros(n, dtype=float)
+    if n == 0:
+        return sevk
+
+    # Grup içi sıra no: kararlı sıralama öncelik sırasını korur
+    sira = np.argsort(grup, kind='stable')
+    grup_sirali = grup[sira]
+    yeni_grup = np.r_[True, grup_sirali[1:] != grup_sirali[:-1]]
+    grup_no = np.cumsum(yeni_grup) - 1
+    grup_baslangic = np.flatnonzero(yeni_grup)
+    grup_ici_sira = np.arange(n) - grup_baslangic[grup_no]
+
+    kalan = np.asarray(stok, dtype=float)[sira][grup_baslangic]
+    kalan[grup_sirali[grup_baslangic] < 0] = 0
+
+    # Satırları grup içi sıraya göre diz - her adım bir dilim
+    adim_sirasi = np.argsort(grup_ici_sira, kind='stable')
+    adim_sinir = np.searchsorted(grup_ici_sira[adim_sirasi], np.arange(grup_ici_sira.max() + 2))
+    satir_sirali = sira[adim_sirasi]
+    grup_adim = grup_no[adim_sirasi]
+    ihtiyac = np.asarray(ihtiyac, dtype=float)
+
+    for k in range(len(adim_sinir) - 1):
+        dilim = slice(adim_sinir[k], adim_sinir[k + 1])
+        g = grup_adim[dilim]
+        aktif = kalan[g] > 0
+        if not aktif.any():
+            # Bu sıradaki hiçbir grupta stok kalmadı - sonrakiler de 0 alır
+            if not (kalan > 0).any():
+                break
+            continue
+        g = g[aktif]
+        satir = satir_sirali[dilim][aktif]
+        ayrilan = np.minimum(ihtiyac[satir], kalan[g])
+        sevk[satir] = ayrilan
+        kalan[g] -= ayrilan
+
+    return sevk
+
+
+def priority_rank(urun_segment, durum, oncelik_siralama=None):
+    """
+    Satır başına dağıtım önceliği (1 = ilk) - ürün segmenti × ihtiyaç türü
+
+    oncelik_siralama {segment: ['RPT', 'Initial', 'Min']} sırasından segment ×
+    durum öncelik tablosu kurulur ve tek gather ile okunur. Kayıtsız segmentler
+    varsayılan sırayı, bilinmeyen durumlar en son önceliği (4) alır.
+    """
+    durum_kod = pd.Categorical(durum, categories=VARSAYILAN_DURUM_SIRASI).codes
+    varsayilan = np.arange(1, len(VARSAYILAN_DURUM_SIRASI) + 1)
+
+    if not oncelik_siralama:
+        oncelik = varsayilan[np.maximum(durum_kod, 0)]
+    else:
+        segment = pd.Categorical(urun_segment)
+        # Son satır varsayılan sıra: segmenti olmayan satırların kodu -1
+        tablo = np.tile(varsayilan, (len(segment.categories) + 1, 1))
+        for i, seg in enumerate(segment.categories):
+            sira = oncelik_siralama.get(seg)
+            if sira:
+                tablo[i] = [sira.index(d) + 1 if d in sira else len(varsayilan) + 1
+                            for d in VARSAYILAN_DURUM_SIRASI]
+        oncelik = tablo[segment.codes, np.maximum(durum_kod, 0)]
+
+    return np.where(durum_kod >= 0, oncelik, len(varsayilan) + 1)
+
+
+def kpi_limits(mg, kpi_df):
+    """
+    Satır başına KPI min/max değerleri (mg → mg_id eşlemesi)
+
+    Tekrar eden mg_id'de son satır geçerlidir; KPI'da olmayan mg ve boş
+    değerler 0 / 999999 alır.
+
+    Returns:
+        (np.ndarray, np.ndarray): min_deger, max_deger
+    """
+    kpi_map = kpi_df.assign(mg_id=kpi_df['mg_id'].astype(str)).drop_duplicates('mg_id', keep='last')
+    kpi_map = kpi_map.set_index('mg_id')
+
+    limitler = []
+    for kolon, varsayilan in [('min_deger', 0.0), ('max_deger', 999999.0)]:
+        if kolon in kpi_map.columns:
+            degerler = pd.to_numeric(kpi_map[kolon], errors='coerce').fillna(varsayilan)
+        else:
+            degerler = pd.Series(varsayilan, index=kpi_map.index)
+        limitler.append(map_codes(mg, degerler.to_dict(), varsayilan).to_numpy(dtype=float))
+    return tuple(limitler)
+
+
+def kpi_forward_cover(mg, kpi_df):
+    """Satır başına KPI forward_cover (mg → mg_id, son satır geçerli; yoksa NaN)"""
+    if 'forward_cover' not in kpi_df.columns:
+        return np.full(len(mg), np.nan)
+    kpi_map = kpi_df.assign(mg_id=kpi_df['mg_id'].astype(str)).drop_duplicates('mg_id', keep='last')
+    degerler = pd.to_numeric(kpi_map.set_index('mg_id')['forward_cover'], errors='coerce')
+    return map_codes(mg, degerler.to_dict(), np.nan).to_numpy(dtype=float)
+
+
+def classify_need(ihtiyac, rpt_ihtiyac, min_ihtiyac, initial_ihtiyac):
+    """
+    İhtiyacın hangi türden geldiği (Yok / RPT / Initial / Min)
+
+    Eşitlikte öncelik RPT → Initial (pozitifse) → Min; hiçbiri tutmazsa RPT.
+    """
+    ihtiyac = np.asarray(ihtiyac, dtype=float)
+    initial_ihtiyac = np.asarray(initial_ihtiyac, dtype=float)
+    durum = np.select(
+        [
+            ihtiyac == 0,
+            ihtiyac == np.asarray(rpt_ihtiyac, dtype=float),
+            (ihtiyac == initial_ihtiyac) & (initial_ihtiyac > 0),
+            ihtiyac == np.asarray(min_ihtiyac, dtype=float)
+        ],
+        ['Yok', 'RPT', 'Initial', 'Min'],
+        default='RPT'
+    )
+    return pd.Series(durum, index=getattr(rpt_ihtiyac, 'index', None))
+
+
+def calculate_store_shipments(anlik_stok_satis, depo_stok, magaza_master, kpi,
+                              urun_master=None, yasak_master=None,
+                              urun_segment_map=None, magaza_segment_map=None,
+                              genlestirme_orani=None, sisme_orani=None,
+                              min_oran=None, initial_matris=None,
+                              oncelik_siralama=None, cache=None, progress=None):
+    """
+    Mağaza-ürün bazında ihtiyaç (MAX yaklaşımı) ve depo stoğundan sevkiyat
+
+    Depo stoğu önce oncelik_siralama'daki (🔢 Sıralama) segment × ihtiyaç türü
+    sırasına, eşitlikte büyük ihtiyaca göre dağıtılır. None ise tüm segmentlerde
+    RPT → Initial → Min. cache verilirse depo/mg/KPI birleştirmeleri 💵 PO ile
+    ortak enriched_fact_table önbelleğinden gelir.
+
+    Returns:
+        dict: final (pozitif ihtiyaç yoksa None), df (zenginleştirilmiş veri),
+            depo_df, yeni_urunler
+    """
+    progress = progress or no_progress
+
+    # ============================================
+    # 1. VERİ HAZIRLA
+    # ============================================
+    progress("📂 Veriler hazırlanıyor...")
+
+    # Mağaza-ürün satırları + mg, KPI limitleri ve depo kodu (💵 PO ile ortak tablo)
+    df = enriched_fact_table(
+        anlik_stok_satis, magaza_master, urun_master, kpi, cache=cache, progress=progress
+    ).drop(columns='fc_kpi')
+
+    depo_df = depo_stok.copy()
+    depo_df['urun_kod'] = code_column(depo_df['urun_kod'])
+    depo_df['depo_kod'] = depot_codes(depo_df['depo_kod'])
+
+    kpi_df = kpi.copy()
+
+    progress(f"✅ Anlık stok/satış: {len(df):,} satır", 'write')
+    progress(f"✅ Depo stok: {len(depo_df):,} satır", 'write')
+
+    # ============================================
+    # 2. YENİ ÜRÜNLER
+    # ============================================
+    depo_sum = depo_df.groupby('urun_kod', observed=True)['stok'].sum()
+    yeni_adaylar = depo_sum[depo_sum > 300].index.tolist()
+
+    urun_magaza_count = df[df['urun_kod'].isin(yeni_adaylar)].groupby('urun_kod', observed=True)['magaza_kod'].nunique()
+    total_magaza = df['magaza_kod'].nunique()
+    yeni_urunler = urun_magaza_count[urun_magaza_count < total_magaza * 0.5].index.tolist()
+
+    progress(f"✅ Yeni ürün adayı: {len(yeni_urunler):,}", 'write')
+
+    # ============================================
+    # 3. SEGMENTASYON - VERİ TİPİ UYUMLU
+    # ============================================
+    if urun_segment_map and magaza_segment_map:
+        # String key'li dictionary oluştur
+        urun_seg_map_str = {str(k): str(v) for k, v in urun_segment_map.items()}
+        magaza_seg_map_str = {str(k): str(v) for k, v in magaza_segment_map.items()}
+
+        # String anahtarla map yap (kategorik kolonda kategori başına bir kez)
+        df['urun_segment'] = map_codes(df['urun_kod'], urun_seg_map_str, '0-4')
+        df['magaza_segment'] = map_codes(df['magaza_kod'], magaza_seg_map_str, '0-4')
+
+        urun_eslesen = (df['urun_segment'] != '0-4').sum()
+        magaza_eslesen = (df['magaza_segment'] != '0-4').sum()
+        progress(f"📊 Segment eşleşme: Ürün {urun_eslesen}/{len(df)} | Mağaza {magaza_eslesen}/{len(df)}")
+    else:
+        df['urun_segment'] = '0-4'
+        df['magaza_segment'] = '0-4'
+        progress("⚠️ Segment map bulunamadı, default '0-4' kullanılıyor", 'warning')
+
+    # ============================================
+    # 4. KPI VE MG BİLGİLERİ
+    # ============================================
+    # mg, min_deger / max_deger enriched_fact_table'dan gelir
+    default_fc = kpi_df['forward_cover'].mean() if 'forward_cover' in kpi_df.columns else 7.0
+
+    # ============================================
+    # 5. DEPO KODU EKLEMESİ
+    # ============================================
+    # depo_kod enriched_fact_table'dan gelir (eşleşmeyen mağazalar '1')
+    progress("✅ Depo kodları eklendi", 'write')
+
+    # ============================================
+    # 6. MATRİS DEĞERLERİ
+    # ============================================
+    matris_varsayilanlari = {
+        'genlestirme': 1.0,
+        'sisme': 0.5,
+        'min_oran': 1.0,
+        'initial_katsayi': 1.0
+    }
+    for kolon, varsayilan in matris_varsayilanlari.items():
+        df[kolon] = varsayilan
+
+    all_matrices_exist = all([
+        genlestirme_orani is not None,
+        sisme_orani is not None,
+        min_oran is not None,
+        initial_matris is not None
+    ])
+
+    if all_matrices_exist:
+        progress("🔄 Matris değerleri uygulanıyor...")
+
+        # Segmentler bir kez kodlanır, dört katsayı tek gather ile okunur
+        matris_deposu = SegmentMatrixStore({
+            'genlestirme': genlestirme_orani,
+            'sisme': sisme_orani,
+            'min_oran': min_oran,
+            'initial_katsayi': initial_matris
+        }, matris_varsayilanlari)
+        katsayilar = matris_deposu.gather(df['magaza_segment'], df['urun_segment'])
+
+        df = df.reset_index(drop=True)
+        for kolon, degerler in zip(matris_deposu.kolonlar, katsayilar):
+            df[kolon] = degerler
+
+        progress("✅ Matris değerleri uygulandı!", 'success')
+
+    # ============================================
+    # 7. İHTİYAÇ HESAPLA - MAX YAKLAŞIMI ✅
+    # ============================================
+    progress("📊 İhtiyaçlar hesaplanıyor (MAX yaklaşımı)...")
+
+    # Her ürün-mağaza için 3 farklı ihtiyaç hesapla
+    df['rpt_ihtiyac'] = (
+        default_fc * df['satis'] * df['genlestirme']
+    ) - (df['stok'] + df['yol'])
+
+    df['min_ihtiyac'] = (
+        df['min_oran'] * df['min_deger']
+    ) - (df['stok'] + df['yol'])
+
+    # Initial ihtiyacı (sadece yeni ürünler için)
+    df['initial_ihtiyac'] = 0.0
+    if yeni_urunler:
+        yeni_mask = df['urun_kod'].isin(yeni_urunler)
+        df.loc[yeni_mask, 'initial_ihtiyac'] = (
+            df.loc[yeni_mask, 'min_deger'] * df.loc[yeni_mask, 'initial_katsayi']
+        ) - (df.loc[yeni_mask, 'stok'] + df.loc[yeni_mask, 'yol'])
+
+    # Negatif değerleri sıfırla
+    df['rpt_ihtiyac'] = df['rpt_ihtiyac'].clip(lower=0)
+    df['min_ihtiyac'] = df['min_ihtiyac'].clip(lower=0)
+    df['initial_ihtiyac'] = df['initial_ihtiyac'].clip(lower=0)
+
+    # ✅ MAX'I AL - TEK İHTİYAÇ
+    df['ihtiyac'] = df[['rpt_ihtiyac', 'min_ihtiyac', 'initial_ihtiyac']].max(axis=1)
+
+    # Hangi türden geldiğini belirle
+    df['durum'] = classify_need(
+        df['ihtiyac'], df['rpt_ihtiyac'], df['min_ihtiyac'], df['initial_ihtiyac']
+    )
+
+    progress("✅ İhtiyaçlar hesaplandı (MAX yaklaşımı)", 'success')
+
+    # ============================================
+    # 8. YASAK KONTROL
+    # ============================================
+    if (yasak_master is not None and
+        'urun_kod' in yasak_master.columns and
+        'magaza_kod' in yasak_master.columns):
+
+        yasak = yasak_master.copy()
+        yasak['urun_kod'] = code_column(yasak['urun_kod'])
+        yasak['magaza_kod'] = code_column(yasak['magaza_kod'])
+
+        if 'yasak_durum' in yasak.columns:
+            df = df.merge(
+                yasak[['urun_kod', 'magaza_kod', 'yasak_durum']],
+                on=['urun_kod', 'magaza_kod'], how='left'
+            )
+            df.loc[df['yasak_durum'] == 'Yasak', 'ihtiyac'] = 0
+            df.drop('yasak_durum', axis=1, inplace=True, errors='ignore')
+
+    # ============================================
+    # 9. DEPO STOK DAĞITIMI
+    # ============================================
+    progress("🚀 Depo stok dağıtımı yapılıyor...")
+
+    # Sadece pozitif ihtiyaçları al
+    result = df[df['ihtiyac'] > 0].copy()
+    progress(f"Pozitif ihtiyaç sayısı: {len(result):,}", 'write')
+
+    sonuc = {'final': None, 'df': df, 'depo_df': depo_df, 'yeni_urunler': yeni_urunler}
+
+    if len(result) == 0:
+        progress("⚠️ Hiç pozitif ihtiyaç bulunamadı!", 'warning')
+        return sonuc
+
+    # Öncelik sıralaması: ürün segmenti × durum (🔢 Sıralama)
+    result['durum_oncelik'] = priority_rank(result['urun_segment'], result['durum'], oncelik_siralama)
+    result = result.sort_values(['durum_oncelik', 'ihtiyac'], ascending=[True, False])
+    result = result.reset_index(drop=True)
+
+    # Depo stok defteri oluştur (depo_kod, urun_kod) -> stok
+    depo_stok_ledger = DepotStockLedger(
+        depo_df, depo_col='depo_kod', urun_col='urun_kod', stok_col='stok'
+    )
+
+    # Satırların defterdeki yerleri ve başlangıç stokları (olmayan anahtar: -1, stok 0)
+    pozisyon = depo_stok_ledger.positions(
+        result['depo_kod'].to_numpy(dtype=str), result['urun_kod'].to_numpy(dtype=str)
+    )
+    sevkiyat_array = allocate_in_priority_order(
+        pozisyon, result['ihtiyac'].to_numpy(dtype=float), depo_stok_ledger.stock_at(pozisyon)
+    )
+
+    progress(f"🚀 Dağıtım: {len(result):,}/{len(result):,}", oran=1.0)
+
+    result['sevkiyat_miktari'] = sevkiyat_array
+    result['stok_yoklugu_satis_kaybi'] = result['ihtiyac'] - result['sevkiyat_miktari']
+
+    # Temizlik
+    result.drop('durum_oncelik', axis=1, inplace=True, errors='ignore')
+
+    progress("✅ Depo stok dağıtımı tamamlandı!", 'success')
+
+    # ============================================
+    # 10. SONUÇ HAZIRLA
+    # ============================================
+    final_columns = [
+        'magaza_kod', 'urun_kod', 'magaza_segment', 'urun_segment', 'durum',
+        'stok', 'yol', 'satis', 'ihtiyac', 'sevkiyat_miktari', 'depo_kod', 'stok_yoklugu_satis_kaybi'
+    ]
+
+    available_columns = [col for col in final_columns if col in result.columns]
+    final = result[available_columns].copy()
+
+    final = final.rename(columns={
+        'ihtiyac': 'ihtiyac_miktari'
+    })
+
+    # Integer dönüşüm
+    for col in ['stok', 'yol', 'satis', 'ihtiyac_miktari', 'sevkiyat_miktari', 'stok_yoklugu_satis_kaybi']:
+        if col in final.columns:
+            final[col] = final[col].round().fillna(0).astype(int)
+
+    # Kodlar düz string - raporlar ve indirmeler kategori beklemez
+    for col in ['magaza_kod', 'urun_kod', 'depo_kod']:
+        if col in final.columns and isinstance(final[col].dtype, pd.CategoricalDtype):
+            final[col] = final[col].astype(str)
+
+    # Sıra numaraları
+    final.insert(0, 'sira_no', range(1, len(final) + 1))
+    final.insert(1, 'oncelik', range(1, len(final) + 1))
+
+    sonuc['final'] = final
+    return sonuc
+
+
+def sap_export(final):
+    """SAP dosyası: sadece sevkiyatı olan satırlar"""
+    sap_data = final[['magaza_kod', 'urun_kod', 'depo_kod', 'sevkiyat_miktari']].copy()
+    return sap_data[sap_data['sevkiyat_miktari'] > 0]
+
+
+# -------------------------------
+# 💵 PO (ALIM SİPARİŞ) HESABI
+# -------------------------------
+
+def prepare_po_table(anlik_stok_satis, depo_stok, magaza_master, kpi,
+                     cover_segment_matrix, product_ranges, store_ranges,
+                     urun_master=None, po_yasak=None, cache=None, progress=None):
+    """
+    PO hesabının parametreden bağımsız kısmı: birleştirmeler, segmentasyon ve
+    depo-ürün toplamı (forward_cover / fc_ek / depo_stok_threshold kullanılmaz)
+
+    po_tablo'daki fc_kpi boşsa forward_cover parametresi geçerlidir.
+
+    Returns:
+        dict: po_tablo (depo-ürün toplamları), df (mağaza-ürün satırları)
+    """
+    progress = progress or no_progress
+
+    cover_segments_sorted = sort_segments(segment_labels(product_ranges))
+    store_segments_sorted = sort_segments(segment_labels(store_ranges))
+
+    # 1. VERİLERİ HAZIRLA
+    anlik_df = anlik_stok_satis.copy()
+    depo_df = depo_stok.copy()
+    kpi_df = kpi.copy()
+    cover_matrix = cover_segment_matrix.copy() if cover_segment_matrix is not None else None
+
+    # Veri tiplerini düzelt (kategorik kodlar olduğu gibi kalır)
+    anlik_df['urun_kod'] = code_column(anlik_df['urun_kod'])
+    anlik_df['magaza_kod'] = code_column(anlik_df['magaza_kod'])
+    depo_df['urun_kod'] = code_column(depo_df['urun_kod'])
+    depo_df['depo_kod'] = depot_codes(depo_df['depo_kod'])
+
+    # 2. MAĞAZA-DEPO EŞLEŞTİRMESİ (mg ve KPI ile birlikte - 📐 Hesaplama ile ortak tablo)
+    progress("🔗 Mağaza-Depo eşleştirmesi yapılıyor...")
+
+    df = enriched_fact_table(
+        anlik_stok_satis, magaza_master, urun_master, kpi, cache=cache, progress=progress
+    ).drop(columns='max_deger')
+
+    progress(f"✅ Mağaza-Depo eşleşmesi: {len(df):,} satır", 'write')
+
+    # 3. DEPO STOK EKLE
+    progress("📦 Depo stokları ekleniyor...")
+
+    depo_stok_map = depo_df.groupby(['depo_kod', 'urun_kod'], observed=True)['stok'].sum().reset_index()
+    depo_stok_map.columns = ['depo_kod', 'urun_kod', 'depo_stok']
+    for kolon in ['depo_kod', 'urun_kod']:
+        depo_stok_map = _sol_kategorisine(depo_stok_map, kolon, df[kolon])
+
+    df = df.merge(
+        depo_stok_map,
+        on=['depo_kod', 'urun_kod'],
+        how='left'
+    )
+    df['depo_stok'] = df['depo_stok'].fillna(0)
+
+    progress("✅ Depo stokları eklendi", 'write')
+
+    # 4. KPI'DAN MIN DEĞER VE FORWARD COVER EKLE
+    progress("📋 KPI değerleri ekleniyor...")
+
+    # KPI sadece ürün master'dan mg geldiğinde uygulanır - aksi halde
+    # fc_kpi boş kalır ve forward_cover parametresi kullanılır
+    if not (urun_master is not None and 'mg' in urun_master.columns and 'mg_id' in kpi_df.columns):
+        df['min_deger'] = 0
+        df['fc_kpi'] = np.nan
+
+    progress("✅ KPI değerleri eklendi", 'write')
+
+    # 5. PO YASAK KONTROLÜ
+    if po_yasak is not None:
+        progress("🚫 PO Yasak kontrolü yapılıyor...")
+
+        po_yasak = po_yasak.copy()
+        po_yasak['urun_kodu'] = po_yasak['urun_kodu'].astype(str)
+
+        df = df.merge(
+            po_yasak[['urun_kodu', 'yasak_durum', 'acik_siparis']],
+            left_on='urun_kod',
+            right_on='urun_kodu',
+            how='left'
+        )
+
+        df['yasak_durum'] = df['yasak_durum'].fillna(0)
+        df['acik_siparis'] = df['acik_siparis'].fillna(0)
+
+        yasak_sayisi = (df['yasak_durum'] == 1).sum()
+        df = df[df['yasak_durum'] != 1]
+
+        if yasak_sayisi > 0:
+            progress(f"⚠️ {yasak_sayisi:,} yasak satır çıkarıldı", 'warning')
+
+        progress("✅ PO Yasak kontrolü tamamlandı", 'write')
+    else:
+        df['acik_siparis'] = 0
+
+    # 6. SEGMENTASYON VE GENLEŞTİRME KATSAYISI
+    progress("📊 Segment ve genleştirme katsayıları hesaplanıyor...")
+
+    # Ürün bazında toplam stok/satış
+    urun_agg = anlik_df.groupby('urun_kod', observed=True).agg({
+        'stok': 'sum',
+        'satis': 'sum'
+    }).reset_index()
+    urun_agg['urun_stok_satis'] = urun_agg['stok'] / urun_agg['satis'].replace(0, 1)
+
+    # Mağaza bazında toplam stok/satış
+    magaza_agg = anlik_df.groupby('magaza_kod', observed=True).agg({
+        'stok': 'sum',
+        'satis': 'sum'
+    }).reset_index()
+    magaza_agg['magaza_stok_satis'] = magaza_agg['stok'] / magaza_agg['satis'].replace(0, 1)
+
+    # Ürün segment ataması
+    urun_agg['urun_segment'] = pd.cut(
+        urun_agg['urun_stok_satis'],
+        bins=[r[0] for r in product_ranges] + [product_ranges[-1][1]],
+        labels=cover_segments_sorted,
+        include_lowest=True
+    ).astype(str)
+
+    # Mağaza segment ataması
+    magaza_agg['magaza_segment'] = pd.cut(
+        magaza_agg['magaza_stok_satis'],
+        bins=[r[0] for r in store_ranges] + [store_ranges[-1][1]],
+        labels=store_segments_sorted,
+        include_lowest=True
+    ).astype(str)
+
+    # Ana dataframe'e segment bilgilerini ekle
+    df = df.merge(
+        urun_agg[['urun_kod', 'urun_segment']],
+        on='urun_kod',
+        how='left'
+    )
+    df['urun_segment'] = df['urun_segment'].fillna('0-4')
+
+    df = df.merge(
+        magaza_agg[['magaza_kod', 'magaza_segment']],
+        on='magaza_kod',
+        how='left'
+    )
+    df['magaza_segment'] = df['magaza_segment'].fillna('0-4')
+
+    # Genleştirme katsayısını matristen al
+    if isinstance(cover_matrix, pd.DataFrame) and len(cover_matrix.columns) > 1:
+        matrix_long = cover_matrix.stack().reset_index()
+        matrix_long.columns = ['urun_segment', 'magaza_segment', 'genlestirme_katsayisi']
+        matrix_long['urun_segment'] = matrix_long['urun_segment'].astype(str)
+        matrix_long['magaza_segment'] = matrix_long['magaza_segment'].astype(str)
+
+        df = df.merge(
+            matrix_long,
+            on=['urun_segment', 'magaza_segment'],
+            how='left'
+        )
+        df['genlestirme_katsayisi'] = df['genlestirme_katsayisi'].fillna(1.0)
+    else:
+        df['genlestirme_katsayisi'] = 1.0
+
+    progress("✅ Genleştirme katsayıları eklendi", 'write')
+
+    # 7. DEPO-ÜRÜN BAZINDA GRUPLA
+    progress("📊 Depo-Ürün bazında gruplama...")
+
+    # SMM bilgisini kontrol et
+    if 'smm' not in df.columns:
+        df['smm'] = 0
+
+    po_tablo = df.groupby(['depo_kod', 'urun_kod'], observed=True).agg({
+        'satis': 'sum',
+        'stok': 'sum',
+        'yol': 'sum',
+        'depo_stok': 'first',
+        'min_deger': 'first',
+        'acik_siparis': 'sum',
+        'fc_kpi': 'first',
+        'genlestirme_katsayisi': 'first',
+        'smm': 'first',
+        'magaza_kod': 'nunique'
+    }).reset_index()
+
+    po_tablo.columns = [
+        'depo_kod', 'urun_kod', 'toplam_satis', 'toplam_magaza_stok',
+        'toplam_yol', 'depo_stok', 'min_deger', 'toplam_acik_siparis',
+        'fc_kpi', 'genlestirme', 'smm', 'magaza_sayisi'
+    ]
+
+    # Kodlar düz string - raporlar ve indirmeler kategori beklemez
+    for col in ['depo_kod', 'urun_kod']:
+        if isinstance(po_tablo[col].dtype, pd.CategoricalDtype):
+            po_tablo[col] = po_tablo[col].astype(str)
+
+    return {'po_tablo': po_tablo, 'df': df}
+
+
+def evaluate_purchase_orders(po_tablo, forward_cover=5.0, fc_ek=2, depo_stok_threshold=999,
+                             progress=None):
+    """
+    prepare_po_table çıktısından tek parametre noktası için PO ihtiyacı
+
+    Returns:
+        dict: po_sonuc (tüm depo-ürünler), po_sonuc_pozitif (PO > 0, tam sayı)
+    """
+    progress = progress or no_progress
+
+    po_sonuc = po_tablo.rename(columns={'fc_kpi': 'forward_cover'})
+    po_sonuc['forward_cover'] = po_sonuc['forward_cover'].fillna(forward_cover)
+
+    # Brüt ihtiyaç (TOPLAM bazında)
+    po_sonuc['brut_ihtiyac'] = (
+        (po_sonuc['forward_cover'] + fc_ek) *
+        po_sonuc['toplam_satis'] *
+        po_sonuc['genlestirme']
+    )
+
+    # Net ihtiyaç = Brüt - Mağaza Stok - Yol - Depo Stok - Açık Sipariş
+    po_sonuc['net_ihtiyac'] = (
+        po_sonuc['brut_ihtiyac'] -
+        po_sonuc['toplam_magaza_stok'] -
+        po_sonuc['toplam_yol'] -
+        po_sonuc['depo_stok'] -
+        po_sonuc['toplam_acik_siparis']
+    )
+
+    # Min kontrolü (toplam mağaza stoku < min ise)
+    po_sonuc['min_ihtiyac'] = np.where(
+        po_sonuc['min_deger'] > po_sonuc['toplam_magaza_stok'],
+        po_sonuc['min_deger'] - po_sonuc['toplam_magaza_stok'],
+        0
+    )
+
+    # PO ihtiyacı
+    po_sonuc['po_ihtiyac'] = np.maximum(po_sonuc['net_ihtiyac'], po_sonuc['min_ihtiyac'])
+    po_sonuc['po_ihtiyac'] = po_sonuc['po_ihtiyac'].clip(lower=0)
+
+    progress(f"✅ PO ihtiyacı hesaplandı: {len(po_sonuc):,} depo-ürün kombinasyonu", 'write')
+
+    # DEPO STOK EŞİĞİ KONTROLÜ
+    yuksek_stok_sayisi = (po_sonuc['depo_stok'] > depo_stok_threshold).sum()
+    po_sonuc.loc[po_sonuc['depo_stok'] > depo_stok_threshold, 'po_ihtiyac'] = 0
+
+    if yuksek_stok_sayisi > 0:
+        progress(f"ℹ️ {yuksek_stok_sayisi:,} üründe depo stok > {depo_stok_threshold}, PO sıfırlandı")
+
+    po_sonuc_pozitif = po_sonuc[po_sonuc['po_ihtiyac'] > 0].copy()
+
+    for col in ['po_ihtiyac', 'brut_ihtiyac', 'net_ihtiyac', 'toplam_satis', 'toplam_magaza_stok', 'toplam_yol', 'depo_stok', 'toplam_acik_siparis']:
+        if col in po_sonuc_pozitif.columns:
+            po_sonuc_pozitif[col] = po_sonuc_pozitif[col].round().astype(int)
+
+    return {'po_sonuc': po_sonuc, 'po_sonuc_pozitif': po_sonuc_pozitif}
+
+
+def calculate_purchase_orders(anlik_stok_satis, depo_stok, magaza_master, kpi,
+                              cover_segment_matrix, product_ranges, store_ranges,
+                              forward_cover=5.0, fc_ek=2, depo_stok_threshold=999,
+                              urun_master=None, po_yasak=None, cache=None, progress=None):
+    """
+    Depo-ürün bazında PO ihtiyacı (prepare_po_table + evaluate_purchase_orders)
+
+    cache verilirse depo/mg/KPI birleştirmeleri 📐 Hesaplama ile ortak
+    enriched_fact_table önbelleğinden gelir.
+
+    Returns:
+        dict: po_sonuc (tüm depo-ürünler), po_sonuc_pozitif (PO > 0, tam sayı), df
+    """
+    progress = progress or no_progress
+
+    hazir = prepare_po_table(
+        anlik_stok_satis, depo_stok, magaza_master, kpi,
+        cover_segment_matrix, product_ranges, store_ranges,
+        urun_master=urun_master, po_yasak=po_yasak, cache=cache, progress=progress
+    )
+
+    df = hazir['df']
+    df['forward_cover_final'] = df['fc_kpi'].fillna(forward_cover)
+    kpi_fc_count = (df['forward_cover_final'] != forward_cover).sum()
+    if kpi_fc_count > 0:
+        progress(f"ℹ️ {kpi_fc_count:,} satır için KPI'dan FC alındı")
+    df = df.drop(columns='fc_kpi')
+
+    sonuc = evaluate_purchase_orders(
+        hazir['po_tablo'], forward_cover, fc_ek, depo_stok_threshold, progress=progress
+    )
+    return {**sonuc, 'df': df}
+
+
+def po_parameter_grid(po_tablo, forward_covers, fc_ekler, depo_stok_esikleri, progress=None):
+    """
+    PO parametre ızgarası: prepare_po_table çıktısı bir kez kurulur, her
+    (forward_cover, fc_ek, depo_stok_esigi) noktası numpy yayınlamasıyla hesaplanır
+
+    Sonuçlar evaluate_purchase_orders + po_depot_summary ile aynıdır
+    (adet = yuvarlanmış PO, tutar = adet × smm).
+
+    Returns:
+        DataFrame: forward_cover, fc_ek, depo_stok_esigi, depo_kod, toplam_po_adet,
+            toplam_po_tutar, urun_sayisi - nokta × depo başına bir satır
+    """
+    progress = progress or no_progress
+
+    fc_degerleri = np.asarray(forward_covers, dtype=float)
+    ek_degerleri = np.asarray(fc_ekler, dtype=float)
+    esikler = np.asarray(depo_stok_esikleri, dtype=float)
+    kolonlar = ['forward_cover', 'fc_ek', 'depo_stok_esigi', 'depo_kod',
+                'toplam_po_adet', 'toplam_po_tutar', 'urun_sayisi']
+    if po_tablo.empty or not (len(fc_degerleri) and len(ek_degerleri) and len(esikler)):
+        return pd.DataFrame(columns=kolonlar)
+
+    # Satırları depoya göre sırala - depo toplamları np.add.reduceat ile tek geçişte
+    depo_no, depolar = pd.factorize(po_tablo['depo_kod'], sort=True)
+    sira = np.argsort(depo_no, kind='stable')
+    baslangic = np.searchsorted(depo_no[sira], np.arange(len(depolar)))
+
+    def kolon(ad):
+        return po_tablo[ad].to_numpy(dtype=float)[sira]
+
+    satis = kolon('toplam_satis')
+    genlestirme = kolon('genlestirme')
+    magaza_stok = kolon('toplam_magaza_stok')
+    yol = kolon('toplam_yol')
+    depo_stok = kolon('depo_stok')
+    acik = kolon('toplam_acik_siparis')
+    fc_kpi = kolon('fc_kpi')
+    smm = np.nan_to_num(kolon('smm'))
+
+    # Parametreden bağımsız kısımlar bir kez
+    min_deger = kolon('min_deger')
+    min_ihtiyac = np.where(min_deger > magaza_stok, min_deger - magaza_stok, 0)
+    esik_disi = depo_stok[None, :] <= esikler[:, None]          # (T, m)
+    kpi_yok = np.isnan(fc_kpi)
+
+    nokta_sayisi = len(fc_degerleri) * len(ek_degerleri) * len(esikler)
+    adet = np.empty((len(fc_degerleri), len(ek_degerleri), len(esikler), len(depolar)))
+    tutar = np.empty_like(adet)
+    urun_sayisi = np.empty(adet.shape, dtype=np.int64)
+
+    # forward_cover başına (E, T, m) blok - bellek fc_ek × eşik × satır ile sınırlı
+    for i, fc in enumerate(fc_degerleri):
+        fc_satir = np.where(kpi_yok, fc, fc_kpi)
+        brut = (fc_satir[None, :] + ek_degerleri[:, None]) * satis * genlestirme   # (E, m)
+        net = brut - magaza_stok - yol - depo_stok - acik
+        po = np.maximum(net, min_ihtiyac).clip(min=0)
+        po = np.where(esik_disi[None, :, :], po[:, None, :], 0)                      # (E, T, m)
+
+        pozitif = po > 0
+        po_adet = np.where(pozitif, np.round(po), 0)
+        adet[i] = np.add.reduceat(po_adet, baslangic, axis=-1)
+        tutar[i] = np.add.reduceat(po_adet * smm, baslangic, axis=-1)
+        urun_sayisi[i] = np.add.reduceat(pozitif, baslangic, axis=-1)
+
+        progress(f"🧮 Izgara: forward_cover={fc:g}", oran=(i + 1) / len(fc_degerleri))
+
+    fc_ekseni, ek_ekseni, esik_ekseni, depo_ekseni = np.meshgrid(
+        fc_degerleri, ek_degerleri, esikler, np.arange(len(depolar)), indexing='ij'
+    )
+    sonuc = pd.DataFrame({
+        'forward_cover': fc_ekseni.ravel(),
+        'fc_ek': ek_ekseni.ravel(),
+        'depo_stok_esigi': esik_ekseni.ravel(),
+        'depo_kod': np.asarray(depolar, dtype=object)[depo_ekseni.ravel()],
+        'toplam_po_adet': adet.ravel().astype(np.int64),
+        'toplam_po_tutar': tutar.ravel(),
+        'urun_sayisi': urun_sayisi.ravel()
+    })
+
+    progress(f"✅ Izgara hesaplandı: {nokta_sayisi:,} nokta × {len(depolar):,} depo", 'write')
+    return sonuc
+
+
+def po_grid_summary(izgara):
+    """Izgara noktası başına toplamlar (tüm depolar)"""
+    return izgara.groupby(['forward_cover', 'fc_ek', 'depo_stok_esigi'], as_index=False).agg(
+        toplam_po_adet=('toplam_po_adet', 'sum'),
+        toplam_po_tutar=('toplam_po_tutar', 'sum'),
+        urun_sayisi=('urun_sayisi', 'sum')
+    )
+
+
+def po_depot_summary(po_sonuc_pozitif):
+    """Depo bazında PO özeti (po_tutar kolonu varsa tutar da eklenir)"""
+    depo_ozet = po_sonuc_pozitif.groupby('depo_kod').agg({
+        'po_ihtiyac': 'sum',
+        'urun_kod': 'nunique'
+    }).reset_index()
+
+    if 'po_tutar' in po_sonuc_pozitif.columns:
+        depo_tutar = po_sonuc_pozitif.groupby('depo_kod')['po_tutar'].sum().reset_index()
+        depo_ozet = depo_ozet.merge(depo_tutar, on='depo_kod', how='left')
+        depo_ozet.columns = ['Depo Kodu', 'Toplam PO Adet', 'Ürün Sayısı', 'Toplam PO Tutar']
+    else:
+        depo_ozet.columns = ['Depo Kodu', 'Toplam PO Adet', 'Ürün Sayısı']
+
+    return depo_ozet.sort_values('Toplam PO Adet', ascending=False)
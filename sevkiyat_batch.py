@@ -0,0 +1,282 @@
+"""
+🚚 Sevkiyat Toplu Çalıştırma (CLI)
+Thorius AR4U Platform
+Streamlit olmadan, bir klasördeki CSV'lerden sevkiyat / PO çıktıları üretir
+
+Kullanım:
+    python sevkiyat_batch.py sevkiyat <veri_klasoru> <cikti_klasoru>
+    python sevkiyat_batch.py po <veri_klasoru> <cikti_klasoru> --forward-cover 5 --fc-ek 2
+    python sevkiyat_batch.py po-izgara <veri_klasoru> <cikti_klasoru> --forward-cover 4 5 6 --fc-ek 1 2
+    python sevkiyat_batch.py ml <veri_klasoru> <cikti_klasoru> --hedef-hafta 4
+    python sevkiyat_batch.py senaryo <veri_klasoru> <cikti_klasoru> --senaryolar senaryolar.json
+
+Modlar:
+    sevkiyat  📐 Hesaplama (urun_master, magaza_master, depo_stok, anlik_stok_satis, kpi
+              + opsiyonel yasak_master) → sap_sevkiyat_detay.csv, sevkiyat_tam_detay.csv
+    po        💵 PO Hesaplama (aynı dosyalar + opsiyonel po_yasak)
+              → po_ihtiyac.csv, po_depo_ozet.csv
+    po-izgara 💵 po dosyaları + forward cover / fc ek / depo stok eşiği değer listeleri
+              → po_izgara.csv (nokta × depo), po_izgara_ozet.csv (nokta başına toplam)
+    ml        🚢 Sevkiyat ML Modül (Sevkiyat.csv, Depo_Stok.csv + opsiyonel Urunler,
+              Magazalar, Cover, KPI) → sevkiyat_planı.csv, alim_siparis_ihtiyaci.csv
+    senaryo   🧪 ml dosyaları + [{ad, hedef_hafta, min_adet, maks_adet, carpan_matrisi}]
+              JSON senaryo listesi → senaryo_karsilastirma.csv
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+from po_engine import (
+    VARSAYILAN_SEGMENT_ARALIKLARI, load_dataset_dir, build_segment_maps,
+    default_cover_segment_matrix, calculate_store_shipments, sap_export,
+    calculate_purchase_orders, po_depot_summary,
+    prepare_po_table, po_parameter_grid, po_grid_summary
+)
+from sevkiyat_engine import (
+    VARSAYILAN_COVER_GRUPLARI, VARSAYILAN_CARPAN_MATRISI, read_csv_advanced,
+    run_shipment_calculation, compute_purchase_need, run_scenario_sweep
+)
+
+
+# -------------------------------
+# YARDIMCI FONKSİYONLAR
+# -------------------------------
+
+def stderr_progress(mesaj, seviye='info', oran=None):
+    """İlerleme mesajlarını stderr'e yaz (ara oranları atla)"""
+    if oran is not None and 0 < oran < 1:
+        return
+    print(mesaj, file=sys.stderr, flush=True)
+
+
+def _zorunlu_kontrol(veriler, anahtarlar):
+    eksik = [k for k in anahtarlar if k not in veriler]
+    if eksik:
+        raise SystemExit(f"❌ Eksik veriler: {', '.join(eksik)}")
+
+
+def _csv_yaz(df, cikti_klasoru, dosya_adi):
+    yol = os.path.join(cikti_klasoru, dosya_adi)
+    df.to_csv(yol, index=False, encoding='utf-8-sig')
+    print(f"📥 {yol}: {len(df):,} satır", file=sys.stderr)
+
+
+def _json_oku(yol):
+    if not yol:
+        return None
+    with open(yol, encoding='utf-8') as f:
+        return json.load(f)
+
+
+# -------------------------------
+# MODLAR
+# -------------------------------
+
+def run_sevkiyat(args):
+    veriler = load_dataset_dir(args.veri_klasoru, progress=stderr_progress)
+    _zorunlu_kontrol(veriler, ['urun_master', 'magaza_master', 'depo_stok', 'anlik_stok_satis', 'kpi'])
+
+    # Segmentasyon sayfasının varsayılan aralıklarıyla segment haritaları
+    urun_segment_map, magaza_segment_map = build_segment_maps(veriler['anlik_stok_satis'])
+
+    hesap = calculate_store_shipments(
+        veriler['anlik_stok_satis'],
+        veriler['depo_stok'],
+        veriler['magaza_master'],
+        veriler['kpi'],
+        urun_master=veriler.get('urun_master'),
+        yasak_master=veriler.get('yasak_master'),
+        urun_segment_map=urun_segment_map,
+        magaza_segment_map=magaza_segment_map,
+        oncelik_siralama=_json_oku(args.oncelik_siralama),
+        progress=stderr_progress
+    )
+    if hesap['final'] is None:
+        return 1
+
+    _csv_yaz(sap_export(hesap['final']), args.cikti_klasoru, 'sap_sevkiyat_detay.csv')
+    _csv_yaz(hesap['final'], args.cikti_klasoru, 'sevkiyat_tam_detay.csv')
+    return 0
+
+
+def run_po(args):
+    veriler = load_dataset_dir(args.veri_klasoru, progress=stderr_progress)
+    _zorunlu_kontrol(veriler, ['anlik_stok_satis', 'depo_stok', 'kpi', 'magaza_master'])
+
+    hesap = calculate_purchase_orders(
+        veriler['anlik_stok_satis'],
+        veriler['depo_stok'],
+        veriler['magaza_master'],
+        veriler['kpi'],
+        default_cover_segment_matrix(),
+        VARSAYILAN_SEGMENT_ARALIKLARI,
+        VARSAYILAN_SEGMENT_ARALIKLARI,
+        forward_cover=args.forward_cover,
+        fc_ek=args.fc_ek,
+        depo_stok_threshold=args.depo_stok_esigi,
+        urun_master=veriler.get('urun_master'),
+        po_yasak=veriler.get('po_yasak'),
+        progress=stderr_progress
+    )
+    po_sonuc_pozitif = hesap['po_sonuc_pozitif']
+    po_sonuc_pozitif['po_tutar'] = po_sonuc_pozitif['po_ihtiyac'] * po_sonuc_pozitif['smm']
+
+    _csv_yaz(po_sonuc_pozitif, args.cikti_klasoru, 'po_ihtiyac.csv')
+    _csv_yaz(po_depot_summary(po_sonuc_pozitif), args.cikti_klasoru, 'po_depo_ozet.csv')
+    return 0
+
+
+def run_po_izgara(args):
+    veriler = load_dataset_dir(args.veri_klasoru, progress=stderr_progress)
+    _zorunlu_kontrol(veriler, ['anlik_stok_satis', 'depo_stok', 'kpi', 'magaza_master'])
+
+    hazir = prepare_po_table(
+        veriler['anlik_stok_satis'],
+        veriler['depo_stok'],
+        veriler['magaza_master'],
+        veriler['kpi'],
+        default_cover_segment_matrix(),
+        VARSAYILAN_SEGMENT_ARALIKLARI,
+        VARSAYILAN_SEGMENT_ARALIKLARI,
+        urun_master=veriler.get('urun_master'),
+        po_yasak=veriler.get('po_yasak'),
+        progress=stderr_progress
+    )
+    izgara = po_parameter_grid(
+        hazir['po_tablo'], args.forward_cover, args.fc_ek, args.depo_stok_esigi,
+        progress=stderr_progress
+    )
+
+    ozet = po_grid_summary(izgara)
+    print(ozet.to_string(index=False), file=sys.stderr)
+    _csv_yaz(izgara, args.cikti_klasoru, 'po_izgara.csv')
+    _csv_yaz(ozet, args.cikti_klasoru, 'po_izgara_ozet.csv')
+    return 0
+
+
+def _ml_dosyalari(veri_klasoru):
+    file_data = {}
+    for dosya in sorted(os.listdir(veri_klasoru)):
+        if dosya.lower().endswith('.csv'):
+            with open(os.path.join(veri_klasoru, dosya), 'rb') as f:
+                file_data[dosya] = read_csv_advanced(io.BytesIO(f.read()))
+    return file_data
+
+
+def run_ml(args):
+    file_data = _ml_dosyalari(args.veri_klasoru)
+
+    params = {
+        'hedef_hafta': args.hedef_hafta,
+        'min_adet': args.min_adet,
+        'maks_adet': args.maks_adet
+    }
+    cover_gruplari = _json_oku(args.cover_gruplari) or VARSAYILAN_COVER_GRUPLARI
+    carpan_matrisi = _json_oku(args.carpan_matrisi) or VARSAYILAN_CARPAN_MATRISI
+
+    sonuc = run_shipment_calculation(
+        file_data, params, cover_gruplari, carpan_matrisi,
+        progress=stderr_progress, max_workers=args.max_workers
+    )
+    if sonuc['total_sevk'].empty:
+        print("⚠️ Hiç sevkiyat kaydı oluşturulamadı!", file=sys.stderr)
+        return 1
+
+    print(f"   - Toplam sevkiyat: {sonuc['toplam_sevk']:,} adet", file=sys.stderr)
+    print(f"   - Min tamamlama (Tur2): {sonuc['min_tamamlama']:,} adet", file=sys.stderr)
+    _csv_yaz(sonuc['total_sevk'], args.cikti_klasoru, 'sevkiyat_planı.csv')
+
+    alim_ihtiyaci = compute_purchase_need(
+        sonuc['sevk_df_result'], sonuc['original_sevkiyat_df'], sonuc['depo_stok_ledger'],
+        urunler_df=sonuc['urunler_df'], progress=stderr_progress
+    )
+    if not alim_ihtiyaci.empty:
+        _csv_yaz(alim_ihtiyaci, args.cikti_klasoru, 'alim_siparis_ihtiyaci.csv')
+    return 0
+
+
+def run_senaryo(args):
+    file_data = _ml_dosyalari(args.veri_klasoru)
+    cover_gruplari = _json_oku(args.cover_gruplari) or VARSAYILAN_COVER_GRUPLARI
+
+    # Eksik alanlar ml modunun varsayılanlarıyla doldurulur
+    varsayilan = {
+        'hedef_hafta': 4, 'min_adet': 3, 'maks_adet': 20,
+        'carpan_matrisi': VARSAYILAN_CARPAN_MATRISI
+    }
+    senaryolar = [
+        {**varsayilan, 'ad': f"Senaryo {i + 1}", **senaryo}
+        for i, senaryo in enumerate(_json_oku(args.senaryolar))
+    ]
+
+    tablo = run_scenario_sweep(
+        file_data, senaryolar, cover_gruplari,
+        progress=stderr_progress, max_workers=args.max_workers
+    )
+    print(tablo.to_string(index=False), file=sys.stderr)
+    _csv_yaz(tablo, args.cikti_klasoru, 'senaryo_karsilastirma.csv')
+    return 0
+
+
+# -------------------------------
+# ANA PROGRAM
+# -------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sevkiyat / PO toplu hesaplama")
+    alt = parser.add_subparsers(dest='mod', required=True)
+
+    def ortak(p):
+        p.add_argument('veri_klasoru', help="Girdi CSV klasörü")
+        p.add_argument('cikti_klasoru', help="Çıktı klasörü (yoksa oluşturulur)")
+
+    p = alt.add_parser('sevkiyat', help="📐 Hesaplama")
+    ortak(p)
+    p.add_argument('--oncelik-siralama', help="{ürün_segmenti: ['RPT', 'Initial', 'Min']} JSON dosyası")
+    p.set_defaults(func=run_sevkiyat)
+
+    p = alt.add_parser('po', help="💵 PO Hesaplama")
+    ortak(p)
+    p.add_argument('--forward-cover', type=float, default=5.0)
+    p.add_argument('--fc-ek', type=int, default=2)
+    p.add_argument('--depo-stok-esigi', type=int, default=999)
+    p.set_defaults(func=run_po)
+
+    p = alt.add_parser('po-izgara', help="💵 PO parametre ızgarası")
+    ortak(p)
+    p.add_argument('--forward-cover', type=float, nargs='+', default=[5.0])
+    p.add_argument('--fc-ek', type=int, nargs='+', default=[2])
+    p.add_argument('--depo-stok-esigi', type=int, nargs='+', default=[999])
+    p.set_defaults(func=run_po_izgara)
+
+    p = alt.add_parser('ml', help="🚢 Sevkiyat ML Modül")
+    ortak(p)
+    p.add_argument('--hedef-hafta', type=int, default=4)
+    p.add_argument('--min-adet', type=int, default=3)
+    p.add_argument('--maks-adet', type=int, default=20)
+    p.add_argument('--cover-gruplari', help="[{min, max, etiket}] JSON dosyası")
+    p.add_argument('--carpan-matrisi', help="{mağaza_grubu: {ürün_grubu: çarpan}} JSON dosyası")
+    p.add_argument('--max-workers', type=int, default=None)
+    p.set_defaults(func=run_ml)
+
+    p = alt.add_parser('senaryo', help="🧪 Senaryo karşılaştırma")
+    ortak(p)
+    p.add_argument('--senaryolar', required=True, help="Senaryo listesi JSON dosyası")
+    p.add_argument('--cover-gruplari', help="[{min, max, etiket}] JSON dosyası")
+    p.add_argument('--max-workers', type=int, default=None)
+    p.set_defaults(func=run_senaryo)
+
+    args = parser.parse_args(argv)
+    os.makedirs(args.cikti_klasoru, exist_ok=True)
+
+    baslangic = time.time()
+    kod = args.func(args)
+    print(f"⏱️ {time.time() - baslangic:.2f} sn", file=sys.stderr)
+    return kod
+
+
+if __name__ == '__main__':
+    sys.exit(main())
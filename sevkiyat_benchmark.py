@@ -0,0 +1,282 @@
+"""
+⏱️ Sevkiyat / PO Ölçekleme Benchmark'ı
+Thorius AR4U Platform
+Sentetik veriyle (synthetic_data) dağıtım motorlarının aşama bazında süre,
+tepe bellek (RSS) ve satır/sn ölçümü - sonuçlar JSON rapora yazılır
+
+Kullanım:
+    python sevkiyat_benchmark.py --olcek xs s m --cikti rapor.json
+    python sevkiyat_benchmark.py --olcek xs --karsilastir onceki.json --tolerans 0.25
+
+Aşamalar:
+    ml_sevkiyat       🚢 run_shipment_calculation (ön işleme + matris dağıtımı)
+    ml_alim_ihtiyaci  🚢 compute_purchase_need
+    po_sevkiyat       📋 calculate_store_shipments (📐 Hesaplama depo dağıtımı)
+    po_hesaplama      📋 calculate_purchase_orders (💵 PO Hesaplama)
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from po_engine import (
+    VARSAYILAN_SEGMENT_ARALIKLARI, build_segment_maps, default_cover_segment_matrix,
+    calculate_store_shipments, calculate_purchase_orders
+)
+from sevkiyat_engine import (
+    VARSAYILAN_COVER_GRUPLARI, VARSAYILAN_CARPAN_MATRISI,
+    run_shipment_calculation, compute_purchase_need
+)
+from synthetic_data import generate_ml_dataset, generate_po_dataset
+
+
+# Ölçek tanımları: (mağaza, ürün, çeşit yoğunluğu)
+# Yoğunluk büyüdükçe düşer - 2k × 100k tam matris 200M satır olurdu
+OLCEKLER = {
+    'xs': {'magaza_sayisi': 100, 'urun_sayisi': 1_000, 'yogunluk': 0.25},
+    's': {'magaza_sayisi': 250, 'urun_sayisi': 5_000, 'yogunluk': 0.20},
+    'm': {'magaza_sayisi': 500, 'urun_sayisi': 20_000, 'yogunluk': 0.10},
+    'l': {'magaza_sayisi': 1_000, 'urun_sayisi': 50_000, 'yogunluk': 0.05},
+    'xl': {'magaza_sayisi': 2_000, 'urun_sayisi': 100_000, 'yogunluk': 0.05}
+}
+
+ASAMALAR = ['ml_sevkiyat', 'ml_alim_ihtiyaci', 'po_sevkiyat', 'po_hesaplama']
+
+ML_PARAMS = {'hedef_hafta': 4, 'min_adet': 3, 'maks_adet': 20}
+
+
+# -------------------------------
+# BELLEK ÖLÇÜMÜ
+# -------------------------------
+
+def _rss_mb():
+    """Anlık RSS (MB) - Linux'ta /proc, diğerlerinde süreç tepe değeri"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        tepe = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS byte, Linux KB döndürür
+        return tepe / 2 ** 20 if sys.platform == 'darwin' else tepe / 2 ** 10
+
+
+class RssSampler:
+    """Arka plan iş parçacığıyla RSS örnekle, aşama boyunca tepe değeri tut"""
+
+    def __init__(self, aralik_sn=0.01):
+        self.aralik_sn = aralik_sn
+        self.baslangic_mb = 0.0
+        self.tepe_mb = 0.0
+        self._dur = threading.Event()
+        self._is = None
+
+    def _calis(self):
+        while not self._dur.wait(self.aralik_sn):
+            self.tepe_mb = max(self.tepe_mb, _rss_mb())
+
+    def __enter__(self):
+        self.baslangic_mb = self.tepe_mb = _rss_mb()
+        self._dur.clear()
+        self._is = threading.Thread(target=self._calis, daemon=True)
+        self._is.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._dur.set()
+        self._is.join()
+        self.tepe_mb = max(self.tepe_mb, _rss_mb())
+        return False
+
+
+def olc(asama, fonksiyon, satir_sayisi, tekrar=1):
+    """
+    Fonksiyonu tekrar sayısı kadar çalıştır; (son sonuç, ölçüm dict'i) döndür
+    Süre en iyi (minimum) çalıştırmadır - küçük ölçeklerde gürültüyü azaltır
+    """
+    sure = float('inf')
+    with RssSampler() as rss:
+        for _ in range(max(1, tekrar)):
+            baslangic = time.perf_counter()
+            sonuc = fonksiyon()
+            sure = min(sure, time.perf_counter() - baslangic)
+
+    return sonuc, {
+        'asama': asama,
+        'satir_sayisi': int(satir_sayisi),
+        'sure_sn': round(sure, 4),
+        'peak_rss_mb': round(rss.tepe_mb, 1),
+        'rss_artis_mb': round(rss.tepe_mb - rss.baslangic_mb, 1),
+        'satir_per_sn': round(satir_sayisi / sure, 1) if sure > 0 else None
+    }
+
+
+# -------------------------------
+# AŞAMALAR
+# -------------------------------
+
+def benchmark_scale(olcek_adi, magaza_sayisi, urun_sayisi, yogunluk,
+                    asamalar=ASAMALAR, seed=42, tekrar=1, max_workers=None, log=print):
+    """Bir ölçek için seçili aşamaları çalıştır - ölçüm listesi döndür"""
+    olcumler = []
+    etiket = {
+        'olcek': olcek_adi,
+        'magaza_sayisi': magaza_sayisi,
+        'urun_sayisi': urun_sayisi,
+        'yogunluk': yogunluk
+    }
+
+    def kaydet(olcum):
+        olcum = {**etiket, **olcum}
+        olcumler.append(olcum)
+        log(f"  {olcum['asama']:<17} {olcum['sure_sn']:>9.3f} sn  "
+            f"{olcum['peak_rss_mb']:>8.1f} MB  {olcum['satir_per_sn'] or 0:>12,.0f} satır/sn")
+
+    if any(a.startswith('ml_') for a in asamalar):
+        file_data = generate_ml_dataset(magaza_sayisi, urun_sayisi, yogunluk=yogunluk, seed=seed)
+        satir = len(file_data['Sevkiyat.csv'])
+        log(f"[{olcek_adi}] Sevkiyat ML: {satir:,} satır")
+
+        sonuc, olcum = olc('ml_sevkiyat', lambda: run_shipment_calculation(
+            file_data, ML_PARAMS, VARSAYILAN_COVER_GRUPLARI, VARSAYILAN_CARPAN_MATRISI,
+            max_workers=max_workers
+        ), satir, tekrar)
+        olcum['toplam_sevk'] = int(sonuc['toplam_sevk'])
+        if 'ml_sevkiyat' in asamalar:
+            kaydet(olcum)
+
+        if 'ml_alim_ihtiyaci' in asamalar:
+            _, olcum = olc('ml_alim_ihtiyaci', lambda: compute_purchase_need(
+                sonuc['sevk_df_result'], sonuc['original_sevkiyat_df'], sonuc['depo_stok_ledger']
+            ), satir, tekrar)
+            kaydet(olcum)
+        del file_data, sonuc
+
+    if any(a.startswith('po_') for a in asamalar):
+        veriler = generate_po_dataset(magaza_sayisi, urun_sayisi, yogunluk=yogunluk, seed=seed)
+        satir = len(veriler['anlik_stok_satis'])
+        log(f"[{olcek_adi}] PO asistanı: {satir:,} satır")
+
+        if 'po_sevkiyat' in asamalar:
+            urun_map, magaza_map = build_segment_maps(veriler['anlik_stok_satis'])
+            sonuc, olcum = olc('po_sevkiyat', lambda: calculate_store_shipments(
+                veriler['anlik_stok_satis'], veriler['depo_stok'],
+                veriler['magaza_master'], veriler['kpi'],
+                urun_master=veriler['urun_master'],
+                urun_segment_map=urun_map, magaza_segment_map=magaza_map
+            ), satir, tekrar)
+            if sonuc['final'] is not None:
+                olcum['toplam_sevk'] = int(sonuc['final']['sevkiyat_miktari'].sum())
+            kaydet(olcum)
+            del sonuc
+
+        if 'po_hesaplama' in asamalar:
+            sonuc, olcum = olc('po_hesaplama', lambda: calculate_purchase_orders(
+                veriler['anlik_stok_satis'], veriler['depo_stok'],
+                veriler['magaza_master'], veriler['kpi'],
+                default_cover_segment_matrix(),
+                VARSAYILAN_SEGMENT_ARALIKLARI, VARSAYILAN_SEGMENT_ARALIKLARI,
+                urun_master=veriler['urun_master']
+            ), satir, tekrar)
+            olcum['toplam_po'] = int(sonuc['po_sonuc_pozitif']['po_ihtiyac'].sum())
+            kaydet(olcum)
+            del sonuc
+
+    return olcumler
+
+
+# -------------------------------
+# RAPOR / KARŞILAŞTIRMA
+# -------------------------------
+
+def ortam_bilgisi():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_sayisi': os.cpu_count()
+    }
+
+
+def compare_reports(onceki, yeni, tolerans=0.2):
+    """
+    Aynı (ölçek, aşama) için süre artışı tolerans oranını aşan ölçümler
+
+    Returns:
+        list: [{'olcek', 'asama', 'onceki_sn', 'yeni_sn', 'oran'}]
+    """
+    onceki_map = {(o['olcek'], o['asama']): o for o in onceki['sonuclar']}
+    gerilemeler = []
+    for o in yeni['sonuclar']:
+        eski = onceki_map.get((o['olcek'], o['asama']))
+        if not eski or not eski['sure_sn']:
+            continue
+        oran = o['sure_sn'] / eski['sure_sn']
+        if oran > 1 + tolerans:
+            gerilemeler.append({
+                'olcek': o['olcek'],
+                'asama': o['asama'],
+                'onceki_sn': eski['sure_sn'],
+                'yeni_sn': o['sure_sn'],
+                'oran': round(oran, 2)
+            })
+    return gerilemeler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sevkiyat / PO ölçekleme benchmark'ı")
+    parser.add_argument('--olcek', nargs='+', default=['xs', 's'], choices=list(OLCEKLER))
+    parser.add_argument('--asama', nargs='+', default=ASAMALAR, choices=ASAMALAR)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tekrar', type=int, default=1, help="Aşama başına çalıştırma (en iyi süre)")
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--cikti', default='benchmark_rapor.json', help="JSON rapor yolu")
+    parser.add_argument('--karsilastir', help="Önceki JSON rapor - gerileme kontrolü")
+    parser.add_argument('--tolerans', type=float, default=0.2,
+                        help="İzin verilen süre artışı oranı (0.2 = %%20)")
+    args = parser.parse_args(argv)
+
+    def log(mesaj):
+        print(mesaj, file=sys.stderr, flush=True)
+
+    sonuclar = []
+    for olcek_adi in args.olcek:
+        sonuclar.extend(benchmark_scale(
+            olcek_adi, **OLCEKLER[olcek_adi],
+            asamalar=args.asama, seed=args.seed, tekrar=args.tekrar, max_workers=args.max_workers, log=log
+        ))
+
+    rapor = {
+        'olusturma': datetime.now().isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'tekrar': args.tekrar,
+        'ortam': ortam_bilgisi(),
+        'sonuclar': sonuclar
+    }
+    with open(args.cikti, 'w', encoding='utf-8') as f:
+        json.dump(rapor, f, ensure_ascii=False, indent=2)
+    log(f"📄 Rapor: {args.cikti}")
+
+    if args.karsilastir:
+        with open(args.karsilastir, encoding='utf-8') as f:
+            onceki = json.load(f)
+        gerilemeler = compare_reports(onceki, rapor, args.tolerans)
+        for g in gerilemeler:
+            log(f"⚠️ Gerileme [{g['olcek']}] {g['asama']}: "
+                f"{g['onceki_sn']:.3f} → {g['yeni_sn']:.3f} sn (×{g['oran']})")
+        if gerilemeler:
+            return 1
+        log("✅ Gerileme yok")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1321 @@
+"""
+🚢 Sevkiyat Motoru - Vektörel Dağıtım
+Thorius AR4U Platform
+Streamlit'ten bağımsız sevkiyat dağıtım fonksiyonları
+
+İlerleme bildirimi: uzun süren fonksiyonlar progress(mesaj, seviye='info', oran=None)
+geri çağrısını alır. seviye 'info' | 'success' | 'warning' | 'write' olabilir;
+oran (0-1) verilirse mesaj bir ilerleme çubuğu durumudur.
+"""
+import hashlib
+import io
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Varsayılan cover grupları
+VARSAYILAN_COVER_GRUPLARI = [
+    {"min": 0, "max": 4, "etiket": "0-4"},
+    {"min": 5, "max": 8, "etiket": "5-8"},
+    {"min": 9, "max": 12, "etiket": "9-12"},
+    {"min": 13, "max": 20, "etiket": "13-20"},
+    {"min": 21, "max": 999, "etiket": "20+"}
+]
+
+# Varsayılan sevkiyat matrisi (mağaza grubu → ürün grubu → çarpan)
+VARSAYILAN_CARPAN_MATRISI = {
+    "0-4": {"0-4": 1.2, "5-8": 1.1, "9-12": 1.0, "13-20": 1.0, "20+": 0.9},
+    "5-8": {"0-4": 1.1, "5-8": 1.0, "9-12": 1.0, "13-20": 0.9, "20+": 0.8},
+    "9-12": {"0-4": 1.0, "5-8": 1.0, "9-12": 0.9, "13-20": 0.8, "20+": 0.7},
+    "13-20": {"0-4": 1.0, "5-8": 0.9, "9-12": 0.8, "13-20": 0, "20+": 0},
+    "20+": {"0-4": 1.0, "5-8": 0.9, "9-12": 0.8, "13-20": 0, "20+": 0}
+}
+
+# Hiçbir cover grubuna düşmeyen değerlerin etiketi
+VARSAYILAN_COVER_GRUBU = "20+"
+
+# Tur 2 (min tamamlama) için cover eşiği: mağaza VE ürün cover bu değerin
+# üstündeyse satır min tamamlamaya girmez
+TUR2_COVER_ESIGI = 12
+
+# Bu satır sayısının altında paralel dağıtım yerine tek süreç kullanılır
+# (vektörel çekirdek hızlı; küçük girdide süreç başlatma maliyeti baskın)
+PARALEL_MIN_SATIR = 1_000_000
+
+# sevk_listesi kolon sırası (eski dict anahtar sırası ile aynı)
+SEVK_KOLONLARI = [
+    'depo_id', 'magaza_id', 'urun_id', 'klasmankod', 'tur',
+    'magaza_cover_grubu', 'urun_cover_grubu',
+    'ihtiyac', 'ihtiyac_carpanli', 'carpan', 'yolda', 'sevk_miktar',
+    'haftalik_satis', 'mevcut_stok', 'cover', 'urun_cover',
+    'min_adet', 'maks_adet', 'hedef_hafta'
+]
+
+
+# -------------------------------
+# YARDIMCI FONKSİYONLAR
+# -------------------------------
+
+def no_progress(mesaj, seviye='info', oran=None):
+    """Varsayılan ilerleme geri çağrısı - hiçbir şey yapmaz"""
+    return None
+
+
+def read_csv_advanced(uploaded_file):
+    """Gelişmiş CSV okuma fonksiyonu (yüklenen dosya veya BytesIO)"""
+    try:
+        uploaded_file.seek(0)
+        return pd.read_csv(uploaded_file, encoding='utf-8')
+    except:
+        try:
+            uploaded_file.seek(0)
+            return pd.read_csv(uploaded_file, encoding='iso-8859-9')
+        except:
+            content = uploaded_file.getvalue().decode('utf-8', errors='ignore')
+            delimiters = [',', ';', '\t', '|']
+            for delimiter in delimiters:
+                try:
+                    df = pd.read_csv(io.StringIO(content), delimiter=delimiter)
+                    if len(df.columns) > 1:
+                        return df
+                except:
+                    continue
+            return pd.read_csv(io.StringIO(content), delimiter=',')
+
+
+def normalize_columns(df):
+    """Kolon isimlerini standardize et"""
+    if df.empty:
+        return df
+    df.columns = df.columns.str.strip().str.lower()
+    df.columns = df.columns.str.replace('[^a-z0-9_]', '_', regex=True)
+    return df
+
+
+def get_cover_group_labels(cover_gruplari):
+    """Cover grup etiketlerini min değerine göre sıralı ve tekil döndür"""
+    etiketler = []
+    for grup in sorted(cover_gruplari, key=lambda x: x['min']):
+        if grup['etiket'] not in etiketler:
+            etiketler.append(grup['etiket'])
+    return etiketler
+
+
+def build_carpan_array(etiketler, carpan_matrisi):
+    """Çarpan matrisini (mağaza grubu × ürün grubu) NumPy dizisine çevir"""
+    carpan_matrisi = carpan_matrisi or {}
+    carpan_arr = np.ones((len(etiketler), len(etiketler)), dtype=float)
+
+    for i, magaza_grubu in enumerate(etiketler):
+        for j, urun_grubu in enumerate(etiketler):
+            try:
+                carpan_arr[i, j] = float(carpan_matrisi.get(magaza_grubu, {}).get(urun_grubu, 1.0))
+            except:
+                carpan_arr[i, j] = 1.0
+
+    return carpan_arr
+
+
+def assign_cover_groups(cover_values, cover_gruplari, varsayilan=VARSAYILAN_COVER_GRUBU):
+    """
+    Cover değerlerini grup etiketlerine TOPLU ata (kategorik çıktı)
+
+    Kurallar satır bazlı eski fonksiyonla aynı: min <= cover <= max (iki uç
+    dahil), listede ilk eşleşen grup kazanır, eşleşmeyen / sayısal olmayan
+    değerler varsayılan etikete düşer. Aralıklar çakışmıyorsa sıralı alt
+    sınır dizisinde tek searchsorted yeterli; çakışıyorsa grup sayısı kadar
+    vektörel maske uygulanır.
+    """
+    seri = cover_values if isinstance(cover_values, pd.Series) else pd.Series(cover_values)
+    degerler = pd.to_numeric(seri, errors='coerce').to_numpy(dtype=float)
+
+    kategoriler = get_cover_group_labels(cover_gruplari)
+    if varsayilan not in kategoriler:
+        kategoriler.append(varsayilan)
+    kod_haritasi = {etiket: i for i, etiket in enumerate(kategoriler)}
+
+    kodlar = np.full(len(degerler), kod_haritasi[varsayilan], dtype=np.int64)
+    gruplar = list(cover_gruplari)
+
+    if gruplar:
+        alt = np.array([float(g['min']) for g in gruplar])
+        ust = np.array([float(g['max']) for g in gruplar])
+        grup_kodu = np.array([kod_haritasi[g['etiket']] for g in gruplar], dtype=np.int64)
+
+        sira = np.argsort(alt, kind='stable')
+        alt_sirali, ust_sirali = alt[sira], ust[sira]
+
+        if np.all(ust_sirali[:-1] < alt_sirali[1:]):
+            # Çakışmasız aralıklar: adayı alt sınırdan bul, üst sınırı kontrol et
+            aday = np.searchsorted(alt_sirali, degerler, side='right') - 1
+            aday_guvenli = np.clip(aday, 0, None)
+            isabet = (aday >= 0) & (degerler <= ust_sirali[aday_guvenli])
+            kodlar[isabet] = grup_kodu[sira][aday_guvenli[isabet]]
+        else:
+            # Çakışan aralıklar: sondan başa yaz ki listede ilk eşleşen kalsın
+            for i in reversed(range(len(gruplar))):
+                isabet = (degerler >= alt[i]) & (degerler <= ust[i])
+                kodlar[isabet] = grup_kodu[i]
+
+    return pd.Series(
+        pd.Categorical.from_codes(kodlar, categories=kategoriler),
+        index=seri.index, name=seri.name
+    )
+
+
+def compute_urun_cover(haftalik_satis, mevcut_stok):
+    """
+    Ürün cover'ını kolon bazında hesapla - YOLDA STOĞU ÇIKARMA
+
+    Satış <= 0 ise 999, stok <= 0 ise 0, aksi halde stok / satış (2 hane).
+    Yuvarlama Python round() ile birebir: np.round sadece tam yarım
+    durumlarda farklı olabildiği için o satırlar ayrıca düzeltilir.
+    """
+    satis = np.asarray(haftalik_satis, dtype=float)
+    stok = np.asarray(mevcut_stok, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        oran = stok / satis
+        kaba = oran * 100
+        yarim = np.abs(kaba - np.floor(kaba) - 0.5) < 1e-6
+    yuvarlanmis = np.round(oran, 2)
+
+    if yarim.any():
+        yuvarlanmis[yarim] = [round(float(x), 2) for x in oran[yarim]]
+
+    return np.where(satis <= 0, 999.0, np.where(stok <= 0, 0.0, yuvarlanmis))
+
+
+def _sevk_kapasitesi(miktar, maks_adet):
+    """int(min(miktar, stok, maks)) kuralının stoktan bağımsız kısmı (tam sayı üst sınır)"""
+    # NaN maks_adet eski min() davranışında olduğu gibi sınır koymaz
+    sinir = np.floor(np.fmin(miktar, maks_adet))
+    kapasite = np.where(miktar > 0, sinir, 0)
+    return np.clip(kapasite, 0, None).astype(np.int64)
+
+
+# -------------------------------
+# HAZIRLIK
+# -------------------------------
+
+def _etiket_oncelik(etiketler, oncelik):
+    """Etiket kolonunu öncelik sırasına çevir (kategorikte sadece kategoriler eşlenir)"""
+    if isinstance(etiketler.dtype, pd.CategoricalDtype):
+        kategori_oncelik = np.append(
+            pd.Series(etiketler.cat.categories).map(oncelik).to_numpy(dtype=float), np.nan
+        )
+        return pd.Series(kategori_oncelik[etiketler.cat.codes.to_numpy()], index=etiketler.index)
+    return etiketler.map(oncelik)
+
+
+def prepare_allocation_frame(df_filtered, cover_gruplari):
+    """
+    Dağıtım satırlarını öncelik sırasına göre BİR KEZ sırala
+
+    Sıra: depo_id, urun_id, mağaza grubu önceliği, ürün grubu önceliği,
+    urun_cover (artan), haftalik_satis (azalan). Eşitlikler orijinal satır
+    sırasıyla çözülür (eski döngüdeki df_sorted ile aynı).
+    """
+    etiketler = get_cover_group_labels(cover_gruplari)
+    oncelik = {etiket: i for i, etiket in reversed(list(enumerate(etiketler)))}
+
+    df = df_filtered.copy()
+    df['_magaza_oncelik'] = _etiket_oncelik(df['magaza_cover_grubu'], oncelik)
+    df['_urun_oncelik'] = _etiket_oncelik(df['urun_cover_grubu'], oncelik)
+
+    # Grup listesinde olmayan etiketler ve boş depo/ürün anahtarları hiç işlenmiyordu
+    df = df.dropna(subset=['depo_id', 'urun_id', '_magaza_oncelik', '_urun_oncelik'])
+    df['_magaza_oncelik'] = df['_magaza_oncelik'].astype(np.int64)
+    df['_urun_oncelik'] = df['_urun_oncelik'].astype(np.int64)
+
+    df = df.sort_values(
+        by=['depo_id', 'urun_id', '_magaza_oncelik', '_urun_oncelik', 'urun_cover', 'haftalik_satis'],
+        ascending=[True, True, True, True, True, False]
+    )
+    df['_grup_no'] = df.groupby(['depo_id', 'urun_id'], sort=False).ngroup()
+
+    return df.reset_index(drop=True), etiketler
+
+
+# -------------------------------
+# DEPO STOK DEFTERİ
+# -------------------------------
+
+class DepotStockLedger:
+    """
+    Depo stok defteri - (depo, ürün) anahtarına göre BİR KEZ toplanmış stok
+
+    Tekil rezervasyonlar O(1) sözlük erişimiyle, toplu okuma/yazmalar hash
+    indeks (MultiIndex.get_indexer) ile yapılır. Aynı anahtarın tekrar eden
+    satırları toplanır.
+    """
+
+    def __init__(self, depo_stok_df, depo_col='depo_id', urun_col='urun_id', stok_col='depo_stok'):
+        """Depo stok tablosundan defteri oluştur"""
+        self.depo_col = depo_col
+        self.urun_col = urun_col
+        self.stok_col = stok_col
+        self._tam_sayi = False
+
+        if depo_stok_df is None or depo_stok_df.empty:
+            self._index = pd.MultiIndex.from_arrays([[], []], names=[depo_col, urun_col])
+            self._stok = np.zeros(0, dtype=float)
+        else:
+            stok = pd.to_numeric(depo_stok_df[stok_col], errors='coerce').fillna(0)
+            self._tam_sayi = pd.api.types.is_integer_dtype(stok)
+            toplam = stok.groupby([depo_stok_df[depo_col], depo_stok_df[urun_col]], sort=False, observed=True).sum()
+            toplam.index.names = [depo_col, urun_col]
+            self._index = toplam.index
+            self._stok = toplam.to_numpy(dtype=float).copy()
+
+        self._pozisyon = None
+
+    def __len__(self):
+        return len(self._stok)
+
+    def __contains__(self, key):
+        return self._position(key) >= 0
+
+    def _position(self, key):
+        """Tekil anahtarın dizideki yeri (yoksa -1)"""
+        if self._pozisyon is None:
+            self._pozisyon = {key: i for i, key in enumerate(self._index)}
+        return self._pozisyon.get(key, -1)
+
+    # ---------- Tekil işlemler ----------
+
+    def get(self, depo, urun, default=0.0):
+        """Anahtarın mevcut stoğu"""
+        pos = self._position((depo, urun))
+        return self._stok[pos] if pos >= 0 else default
+
+    def reserve(self, depo, urun, miktar):
+        """Stok yettiği kadar rezerve et ve düş; rezerve edilen miktarı döndür"""
+        pos = self._position((depo, urun))
+        if pos < 0 or self._stok[pos] <= 0:
+            return 0
+        ayrilan = min(miktar, self._stok[pos])
+        self._stok[pos] -= ayrilan
+        return ayrilan
+
+    def decrement(self, depo, urun, miktar):
+        """Anahtarın stoğunu koşulsuz düş"""
+        pos = self._position((depo, urun))
+        if pos < 0:
+            raise KeyError((depo, urun))
+        self._stok[pos] -= miktar
+
+    # ---------- Toplu işlemler ----------
+
+    def positions(self, depo_values, urun_values):
+        """Anahtar dizilerinin defterdeki yerleri (yoksa -1)"""
+        anahtarlar = pd.MultiIndex.from_arrays([np.asarray(depo_values), np.asarray(urun_values)])
+        return self._index.get_indexer(anahtarlar)
+
+    def lookup(self, depo_values, urun_values):
+        """Anahtar dizileri için stok değerleri (olmayanlar 0)"""
+        return self.stock_at(self.positions(depo_values, urun_values))
+
+    def stock_at(self, positions):
+        """Yerleri verilen anahtarların stoğu (-1 olanlar 0)"""
+        positions = np.asarray(positions)
+        return np.where(positions >= 0, self._stok[positions], 0.0) if len(self._stok) else np.zeros(len(positions))
+
+    def consume(self, positions, miktarlar):
+        """Yerleri verilen anahtarlardan toplu düşüm (tekrar eden yerler toplanır)"""
+        positions = np.asarray(positions)
+        gecerli = positions >= 0
+        np.subtract.at(self._stok, positions[gecerli], np.asarray(miktarlar, dtype=float)[gecerli])
+
+    def set_stock(self, positions, degerler):
+        """Yerleri verilen anahtarların stoğunu doğrudan yaz"""
+        positions = np.asarray(positions)
+        gecerli = positions >= 0
+        self._stok[positions[gecerli]] = np.asarray(degerler, dtype=float)[gecerli]
+
+    def total(self):
+        """Defterdeki toplam stok"""
+        return self._stok.sum()
+
+    def to_frame(self):
+        """Defteri depo stok DataFrame'ine geri çevir"""
+        df = self._index.to_frame(index=False)
+        stok = self._stok
+        if self._tam_sayi and np.all(np.mod(stok, 1) == 0):
+            stok = stok.astype(np.int64)
+        df[self.stok_col] = stok
+        return df
+
+    def copy(self):
+        """Bağımsız bir kopya"""
+        kopya = DepotStockLedger.__new__(DepotStockLedger)
+        kopya.__dict__.update(self.__dict__)
+        kopya._stok = self._stok.copy()
+        return kopya
+
+
+# -------------------------------
+# SEVKİYAT SONUÇ TAMPONU
+# -------------------------------
+
+class ShipmentResultBuffer:
+    """
+    Sevkiyat sonuç tamponu - satır başına dict yerine tipli NumPy kolonları
+
+    Sadece kaynak satır indeksi (hazır çerçevede), sevk_miktar, tur ve carpan
+    tutulur; diğer kolonlar gerektiğinde kaynak çerçeveden indeksle eklenir.
+    Kapasite doldukça iki katına çıkar.
+    """
+
+    def __init__(self, kapasite=1024):
+        kapasite = max(int(kapasite), 1)
+        self._satir = np.empty(kapasite, dtype=np.int64)
+        self._sevk = np.empty(kapasite, dtype=np.int64)
+        self._tur = np.empty(kapasite, dtype=np.int8)
+        self._carpan = np.empty(kapasite, dtype=np.float64)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self, gereken):
+        kapasite = len(self._satir)
+        if gereken <= kapasite:
+            return
+        while kapasite < gereken:
+            kapasite *= 2
+        for ad in ('_satir', '_sevk', '_tur', '_carpan'):
+            eski = getattr(self, ad)
+            yeni = np.empty(kapasite, dtype=eski.dtype)
+            yeni[:self._n] = eski[:self._n]
+            setattr(self, ad, yeni)
+
+    def extend(self, satir, tur, sevk_miktar, carpan):
+        """Bir sevkiyat bloğunu sona ekle"""
+        adet = len(satir)
+        self._grow(self._n + adet)
+        bitis = self._n + adet
+        self._satir[self._n:bitis] = satir
+        self._tur[self._n:bitis] = tur
+        self._sevk[self._n:bitis] = sevk_miktar
+        self._carpan[self._n:bitis] = carpan
+        self._n = bitis
+
+    def reorder(self, sira):
+        """Kayıtları verilen permütasyona göre yeniden diz"""
+        for ad in ('_satir', '_sevk', '_tur', '_carpan'):
+            dizi = getattr(self, ad)
+            dizi[:self._n] = dizi[:self._n][sira]
+
+    @property
+    def satir(self):
+        return self._satir[:self._n]
+
+    @property
+    def tur(self):
+        return self._tur[:self._n]
+
+    @property
+    def sevk_miktar(self):
+        return self._sevk[:self._n]
+
+    @property
+    def carpan(self):
+        return self._carpan[:self._n]
+
+    def total(self, tur=None):
+        """Toplam sevkiyat (tur verilirse sadece o tur)"""
+        if tur is None:
+            return int(self.sevk_miktar.sum())
+        return int(self.sevk_miktar[self.tur == tur].sum())
+
+
+# -------------------------------
+# DAĞITIM
+# -------------------------------
+
+def _dagitim_dizileri(hazir_df, carpan_arr):
+    """Dağıtım çekirdeğinin kullandığı kolonları NumPy dizilerine çevir"""
+    magaza_oncelik = hazir_df['_magaza_oncelik'].to_numpy()
+    urun_oncelik = hazir_df['_urun_oncelik'].to_numpy()
+    return {
+        'magaza_oncelik': magaza_oncelik,
+        'urun_oncelik': urun_oncelik,
+        'grup_no': hazir_df['_grup_no'].to_numpy(),
+        'carpan': carpan_arr[magaza_oncelik, urun_oncelik],
+        'ihtiyac': hazir_df['ihtiyac'].to_numpy(dtype=float),
+        'maks_adet': hazir_df['maks_adet'].to_numpy(dtype=float),
+        'min_adet': hazir_df['min_adet'].to_numpy(dtype=float),
+        'cover': hazir_df['cover'].to_numpy(dtype=float),
+        'urun_cover': hazir_df['urun_cover'].to_numpy(dtype=float),
+        'mevcut': hazir_df['mevcut_stok'].to_numpy(dtype=float) + hazir_df['yolda'].to_numpy(dtype=float),
+    }
+
+
+def _dagitim_cekirdegi(diziler, grup_stok):
+    """
+    Tek bir satır bloğu için greedy dağıtım (grup_no 0..len(grup_stok)-1)
+
+    Returns:
+        satir, tur, sevk: Pozitif sevkiyatlar (bloğa göre satır indeksi)
+        dagitilan: Grup başına dağıtılan toplam
+    """
+    n = len(diziler['grup_no'])
+    magaza_oncelik = diziler['magaza_oncelik']
+    urun_oncelik = diziler['urun_oncelik']
+    grup_no = diziler['grup_no']
+    carpan = diziler['carpan']
+    maks_adet = diziler['maks_adet']
+
+    # TUR 1: İhtiyaç bazlı kapasite
+    kapasite1 = _sevk_kapasitesi(diziler['ihtiyac'] * carpan, maks_adet)
+
+    # TUR 2: Min stok tamamlama kapasitesi (düşük cover olanlar için)
+    eksik_min = np.fmax(0, diziler['min_adet'] - diziler['mevcut'])
+    tur2_uygun = ~((diziler['cover'] >= TUR2_COVER_ESIGI) & (diziler['urun_cover'] >= TUR2_COVER_ESIGI))
+    kapasite2 = np.where(tur2_uygun, _sevk_kapasitesi(eksik_min * carpan, maks_adet), 0)
+
+    # Talep dizisi: her satır için Tur 1 ve Tur 2 olmak üzere iki kayıt
+    satir = np.concatenate([np.arange(n), np.arange(n)])
+    tur = np.repeat(np.array([1, 2], dtype=np.int64), n)
+    kapasite = np.concatenate([kapasite1, kapasite2])
+
+    # Stoktan düşme sırası: grup, mağaza grubu, ürün grubu, tur, satır
+    sira = np.lexsort((satir, tur, urun_oncelik[satir], magaza_oncelik[satir], grup_no[satir]))
+    satir, tur, kapasite = satir[sira], tur[sira], kapasite[sira]
+    talep_grubu = grup_no[satir]
+
+    # Gruplu kümülatif toplam ile greedy dağıtım
+    onceki = np.cumsum(kapasite) - kapasite
+    grup_baslangic = np.flatnonzero(np.r_[True, talep_grubu[1:] != talep_grubu[:-1]])
+    onceki -= np.repeat(onceki[grup_baslangic], np.diff(np.r_[grup_baslangic, len(talep_grubu)]))
+
+    stok = grup_stok[talep_grubu]
+    sevk = np.clip(stok - onceki, 0, kapasite)
+
+    dagitilan = np.bincount(talep_grubu, weights=sevk, minlength=len(grup_stok)).astype(np.int64)
+
+    pozitif = sevk > 0
+    return satir[pozitif], tur[pozitif], sevk[pozitif], dagitilan
+
+
+def _grup_stoklari(hazir_df, ledger):
+    """Her depo-ürün grubu için defter pozisyonu ve (tam sayıya kesilmiş) stok"""
+    anahtarlar = hazir_df.loc[hazir_df['_grup_no'].drop_duplicates().index, ['depo_id', 'urun_id']]
+    grup_pozisyon = ledger.positions(anahtarlar['depo_id'], anahtarlar['urun_id'])
+    grup_stok = np.trunc(ledger.lookup(anahtarlar['depo_id'], anahtarlar['urun_id'])).astype(np.int64)
+    return grup_pozisyon, grup_stok
+
+
+def _sonuc_sirala(tampon, diziler):
+    """Tamponu eski sevk_listesi sırasına diz (mağaza grubu, ürün grubu, depo-ürün, tur, satır)"""
+    satir = tampon.satir
+    tampon.reorder(np.lexsort((satir, tampon.tur, diziler['grup_no'][satir],
+                               diziler['urun_oncelik'][satir], diziler['magaza_oncelik'][satir])))
+
+
+def allocate_shipments(hazir_df, ledger, etiketler, carpan_matrisi):
+    """
+    Greedy Tur 1 / Tur 2 dağıtımını gruplu kümülatif toplam ile hesapla
+
+    Her (depo, ürün) için talepler şu sırayla stoktan düşer:
+    mağaza grubu → ürün grubu → tur (1 ihtiyaç, 2 min tamamlama) → satır sırası.
+    Sıralı döngüde her satır min(kapasite, kalan_stok) aldığı için
+    sevk = clip(stok - önceki_kapasiteler_toplamı, 0, kapasite) olur.
+
+    Dağıtılan miktarlar ledger (DepotStockLedger) üzerinden düşülür.
+
+    Returns:
+        tampon: ShipmentResultBuffer (eski sevk_listesi sırasında); kolonlar
+            shipment_frame / summarize_shipments ile hazir_df'ten eklenir
+    """
+    tampon = ShipmentResultBuffer()
+    if hazir_df.empty:
+        return tampon
+
+    diziler = _dagitim_dizileri(hazir_df, build_carpan_array(etiketler, carpan_matrisi))
+    grup_pozisyon, grup_stok = _grup_stoklari(hazir_df, ledger)
+
+    satir, tur, sevk, dagitilan = _dagitim_cekirdegi(diziler, grup_stok)
+    tampon.extend(satir, tur, sevk, diziler['carpan'][satir])
+    _sonuc_sirala(tampon, diziler)
+
+    # Kalan depo stoklarını yaz (sadece stoğu pozitif olan gruplar işleniyordu)
+    islenen = grup_stok > 0
+    ledger.set_stock(grup_pozisyon[islenen], (grup_stok - dagitilan)[islenen])
+
+    return tampon
+
+
+# -------------------------------
+# PARALEL (DEPO BAZLI) DAĞITIM
+# -------------------------------
+
+def _depo_parcasi_dagit(depo_id, diziler, grup_stok):
+    """Tek depo bloğunu dağıt (süreç havuzunda çalışır)"""
+    baslangic = time.perf_counter()
+    satir, tur, sevk, dagitilan = _dagitim_cekirdegi(diziler, grup_stok)
+    return depo_id, satir, tur, sevk, dagitilan, time.perf_counter() - baslangic
+
+
+def allocate_shipments_parallel(hazir_df, ledger, etiketler, carpan_matrisi,
+                                max_workers=None, min_satir=PARALEL_MIN_SATIR):
+    """
+    allocate_shipments ile aynı sonucu depo bazında süreç havuzunda hesapla
+
+    Depolar stok paylaşmadığı için (tüm durum depo_id, urun_id anahtarlı)
+    hazır çerçeve depo bloklarına bölünür. Sonuçlar tamamlanma sırasından
+    bağımsız olarak depo sırasıyla birleştirilir ve eski sevk_listesi
+    sırasına dizilir. min_satir altındaki girdiler ya da tek depo/tek
+    çekirdek durumunda bloklar aynı süreçte sırayla çalıştırılır.
+
+    Returns:
+        tampon: ShipmentResultBuffer (allocate_shipments ile aynı)
+        depo_sureleri: Depo bazında satır, sevkiyat ve süre (sn) tablosu
+    """
+    sure_kolonlari = ['depo_id', 'satir_sayisi', 'sevk_satiri', 'sevk_miktar', 'sure_sn']
+    tampon = ShipmentResultBuffer()
+    if hazir_df.empty:
+        return tampon, pd.DataFrame(columns=sure_kolonlari)
+
+    diziler = _dagitim_dizileri(hazir_df, build_carpan_array(etiketler, carpan_matrisi))
+    grup_pozisyon, grup_stok = _grup_stoklari(hazir_df, ledger)
+
+    # hazir_df depo_id ile başlayarak sıralı: her depo ardışık bir blok
+    depo = hazir_df['depo_id'].to_numpy()
+    sinirlar = np.r_[0, np.flatnonzero(depo[1:] != depo[:-1]) + 1, len(depo)]
+    grup_no = diziler['grup_no']
+
+    parcalar = []
+    for bas, son in zip(sinirlar[:-1], sinirlar[1:]):
+        g_bas, g_son = grup_no[bas], grup_no[son - 1] + 1
+        parca = {k: v[bas:son] for k, v in diziler.items()}
+        parca['grup_no'] = parca['grup_no'] - g_bas
+        parcalar.append((bas, depo[bas], parca, grup_stok[g_bas:g_son]))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(parcalar))
+
+    if max_workers <= 1 or len(hazir_df) < min_satir:
+        sonuclar = [_depo_parcasi_dagit(d, p, g) for _, d, p, g in parcalar]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            sonuclar = list(executor.map(
+                _depo_parcasi_dagit,
+                [d for _, d, _, _ in parcalar],
+                [p for _, _, p, _ in parcalar],
+                [g for _, _, _, g in parcalar]
+            ))
+
+    # Depo sırasıyla birleştir: blok satır indekslerini global satıra çevir
+    dagitilanlar, sureler = [], []
+    for (bas, _, parca, _), (depo_id, satir, tur, sevk, dagitilan, sure) in zip(parcalar, sonuclar):
+        tampon.extend(satir + bas, tur, sevk, parca['carpan'][satir])
+        dagitilanlar.append(dagitilan)
+        sureler.append({
+            'depo_id': depo_id,
+            'satir_sayisi': len(parca['grup_no']),
+            'sevk_satiri': len(sevk),
+            'sevk_miktar': int(sevk.sum()),
+            'sure_sn': round(sure, 4)
+        })
+
+    dagitilan = np.concatenate(dagitilanlar)
+    islenen = grup_stok > 0
+    ledger.set_stock(grup_pozisyon[islenen], (grup_stok - dagitilan)[islenen])
+
+    _sonuc_sirala(tampon, diziler)
+    return tampon, pd.DataFrame(sureler, columns=sure_kolonlari)
+
+
+# -------------------------------
+# SONUÇ ÇERÇEVELERİ
+# -------------------------------
+
+# total_sevk: (depo, mağaza, ürün, klasman, cover grupları) bazında özet
+TOPLAM_SEVK_ANAHTARLARI = [
+    'depo_id', 'magaza_id', 'urun_id', 'klasmankod', 'magaza_cover_grubu', 'urun_cover_grubu'
+]
+TOPLAM_SEVK_ILK_KOLONLARI = [
+    'yolda', 'haftalik_satis', 'ihtiyac', 'mevcut_stok', 'cover',
+    'urun_cover', 'carpan', 'min_adet', 'maks_adet', 'hedef_hafta', 'tur'
+]
+
+
+def shipment_frame(hazir_df, tampon):
+    """Sonuç tamponundan sevkiyat detay çerçevesini (SEVK_KOLONLARI) kur"""
+    if len(tampon) == 0:
+        return pd.DataFrame(columns=SEVK_KOLONLARI)
+
+    kaynak = hazir_df.iloc[tampon.satir].reset_index(drop=True)
+    carpan = tampon.carpan
+    return pd.DataFrame({
+        'depo_id': kaynak['depo_id'],
+        'magaza_id': kaynak['magaza_id'],
+        'urun_id': kaynak['urun_id'],
+        'klasmankod': kaynak['klasmankod'],
+        'tur': tampon.tur.astype(np.int64),
+        'magaza_cover_grubu': kaynak['magaza_cover_grubu'],
+        'urun_cover_grubu': kaynak['urun_cover_grubu'],
+        'ihtiyac': kaynak['ihtiyac'],
+        'ihtiyac_carpanli': kaynak['ihtiyac'].to_numpy(dtype=float) * carpan,
+        'carpan': carpan,
+        'yolda': kaynak['yolda'],
+        'sevk_miktar': tampon.sevk_miktar,
+        'haftalik_satis': kaynak['haftalik_satis'],
+        'mevcut_stok': kaynak['mevcut_stok'],
+        'cover': kaynak['cover'],
+        'urun_cover': kaynak['urun_cover'],
+        'min_adet': kaynak['min_adet'],
+        'maks_adet': kaynak['maks_adet'],
+        'hedef_hafta': kaynak['hedef_hafta']
+    }, columns=SEVK_KOLONLARI)
+
+
+def summarize_shipments(hazir_df, tampon):
+    """
+    total_sevk özetini detay çerçevesi kurmadan hesapla
+
+    Önce kaynak satır bazında toplanır (her satır en fazla iki kayıt:
+    Tur 1 ve Tur 2), sonra anahtar kolonlarla gruplanır. 'first' kolonları
+    detay listesindeki ilk görünüm sırasına göre alınır.
+    """
+    kolonlar = TOPLAM_SEVK_ANAHTARLARI + ['sevk_miktar'] + TOPLAM_SEVK_ILK_KOLONLARI
+    if len(tampon) == 0:
+        return pd.DataFrame(columns=kolonlar)
+
+    tekil, ilk, ters = np.unique(tampon.satir, return_index=True, return_inverse=True)
+    sevk_toplam = np.bincount(ters, weights=tampon.sevk_miktar, minlength=len(tekil)).astype(np.int64)
+
+    # Satırları detay listesindeki ilk görünüm sırasına koy
+    sira = np.argsort(ilk, kind='stable')
+    ilk = ilk[sira]
+
+    satir_ozet = hazir_df.iloc[tekil[sira]][
+        TOPLAM_SEVK_ANAHTARLARI + [k for k in TOPLAM_SEVK_ILK_KOLONLARI if k not in ('carpan', 'tur')]
+    ].reset_index(drop=True)
+    satir_ozet['sevk_miktar'] = sevk_toplam[sira]
+    satir_ozet['carpan'] = tampon.carpan[ilk]
+    satir_ozet['tur'] = tampon.tur[ilk].astype(np.int64)
+
+    agg = {'sevk_miktar': 'sum'}
+    agg.update({k: 'first' for k in TOPLAM_SEVK_ILK_KOLONLARI})
+    return satir_ozet.groupby(TOPLAM_SEVK_ANAHTARLARI, as_index=False, observed=True).agg(agg)
+
+
+# -------------------------------
+# ANA HESAPLAMA (STREAMLIT'SİZ)
+# -------------------------------
+
+def prepare_shipment_inputs(file_data, params, cover_gruplari, progress=None):
+    """
+    Sevkiyat ML ön işlemesi: normalizasyon, cover/KPI birleştirme, ürün cover,
+    cover grupları, ihtiyaç ve öncelik sıralaması. Çarpan matrisine bağlı değildir.
+
+    Args:
+        file_data: {dosya_adı: DataFrame} - Sevkiyat ve Depo_Stok zorunlu;
+            Urunler, Magazalar, Cover ve KPI opsiyonel (dosya adından eşleşir)
+        params: hedef_hafta, min_adet, maks_adet varsayılanları
+        cover_gruplari: [{'min', 'max', 'etiket'}] listesi
+        progress: İlerleme geri çağrısı (modül başındaki açıklamaya bakın)
+
+    Returns:
+        dict: hazir_df, etiketler, depo_stok_df, original_sevkiyat_df, urunler_df,
+            magazalar_df, pivot_dagilim, parametre_kolonlari (params'tan doldurulan
+            min_adet / maks_adet kolonları - dağıtımda güncel params ile yenilenir)
+    """
+    progress = progress or no_progress
+
+    # Dosyaları yükle
+    sevk_df, depo_stok_df, urunler_df, magazalar_df, cover_df, kpi_df = None, None, None, None, None, None
+    
+    for name, df in file_data.items():
+        name_lower = name.lower()
+        if "sevkiyat" in name_lower:
+            sevk_df = df.copy()
+            progress(f"📊 Sevkiyat dosyası: {len(sevk_df)} satır")
+        elif "depo" in name_lower and "stok" in name_lower:
+            depo_stok_df = df.copy()
+            progress(f"📦 Depo stok dosyası: {len(depo_stok_df)} satır")
+        elif "urun" in name_lower:
+            urunler_df = df.copy()
+            progress(f"🏷️ Ürünler dosyası: {len(urunler_df)} satır")
+        elif "magaza" in name_lower:
+            magazalar_df = df.copy()
+            progress(f"🏪 Mağazalar dosyası: {len(magazalar_df)} satır")
+        elif "cover" in name_lower:
+            cover_df = df.copy()
+            progress(f"📈 Cover dosyası: {len(cover_df)} satır")
+        elif "kpi" in name_lower:
+            kpi_df = df.copy()
+            progress(f"🎯 KPI dosyası: {len(kpi_df)} satır")
+    
+    if sevk_df is None or depo_stok_df is None:
+        raise Exception("Zorunlu dosyalar (Sevkiyat.csv, Depo_Stok.csv) eksik!")
+    
+    # Orijinal sevkiyat df'ini kaydet (alım ihtiyacı için)
+    original_sevkiyat_df = sevk_df.copy()
+    
+    # Kolon normalizasyonu
+    sevk_df = normalize_columns(sevk_df)
+    depo_stok_df = normalize_columns(depo_stok_df)
+    original_sevkiyat_df = normalize_columns(original_sevkiyat_df)
+    
+    # Zorunlu kolon kontrolü
+    required_sevk = ['depo_id', 'urun_id', 'magaza_id', 'haftalik_satis', 'mevcut_stok', 'klasmankod']
+    missing_cols = [col for col in required_sevk if col not in sevk_df.columns]
+    if missing_cols:
+        raise Exception(f"Sevkiyat.csv'de eksik kolonlar: {missing_cols}")
+    
+    # yolda kolonu kontrolü
+    if 'yolda' not in sevk_df.columns:
+        sevk_df['yolda'] = 0
+        original_sevkiyat_df['yolda'] = 0
+        progress("ℹ️ 'yolda' kolonu eklenerek 0 değeri atandı")
+    
+    # VERİ TİPLERİNİ KESİNLİKLE DÖNÜŞTÜR
+    progress("🔄 Veri tipleri kontrol ediliyor...")
+    numeric_cols = ['haftalik_satis', 'mevcut_stok', 'yolda', 'cover', 'hedef_hafta', 'min_adet', 'maks_adet']
+    for col in numeric_cols:
+        if col in sevk_df.columns:
+            sevk_df[col] = pd.to_numeric(sevk_df[col], errors='coerce').fillna(0).astype(float)
+        if col in original_sevkiyat_df.columns:
+            original_sevkiyat_df[col] = pd.to_numeric(original_sevkiyat_df[col], errors='coerce').fillna(0).astype(float)
+    
+    # ÖNEMLİ: Sıfır ve negatif satış değerlerini düzelt
+    sevk_df['haftalik_satis'] = sevk_df['haftalik_satis'].apply(lambda x: max(0.1, x))  # En az 0.1
+    original_sevkiyat_df['haftalik_satis'] = original_sevkiyat_df['haftalik_satis'].apply(lambda x: max(0.1, x))
+    
+    # Cover dosyasını işle
+    if cover_df is not None and not cover_df.empty:
+        cover_df = normalize_columns(cover_df)
+        if 'magaza_id' in cover_df.columns and 'cover' in cover_df.columns:
+            cover_df = cover_df[['magaza_id', 'cover']].drop_duplicates()
+            cover_df['magaza_id'] = cover_df['magaza_id'].astype(str).str.strip()
+            sevk_df['magaza_id'] = sevk_df['magaza_id'].astype(str).str.strip()
+            original_sevkiyat_df['magaza_id'] = original_sevkiyat_df['magaza_id'].astype(str).str.strip()
+            
+            sevk_df = sevk_df.merge(cover_df, on='magaza_id', how='left')
+            original_sevkiyat_df = original_sevkiyat_df.merge(cover_df, on='magaza_id', how='left')
+            progress("✅ Mağaza cover verileri eklendi", 'success')
+        else:
+            progress("⚠️ Cover dosyasında gerekli kolonlar bulunamadı", 'warning')
+            sevk_df['cover'] = 999
+            original_sevkiyat_df['cover'] = 999
+    else:
+        progress("⚠️ Cover dosyası bulunamadı, varsayılan cover=999", 'warning')
+        sevk_df['cover'] = 999
+        original_sevkiyat_df['cover'] = 999
+    
+    # Cover değerlerini temizle
+    sevk_df['cover'] = pd.to_numeric(sevk_df['cover'], errors='coerce').fillna(999)
+    original_sevkiyat_df['cover'] = pd.to_numeric(original_sevkiyat_df['cover'], errors='coerce').fillna(999)
+    
+    # KPI dosyasını işle - EĞER KPI DOSYASI YOKSA PARAMETRELERDEN KULLAN
+    kpi_loaded = False
+    if kpi_df is not None and not kpi_df.empty:
+        kpi_df = normalize_columns(kpi_df)
+        if 'klasmankod' in kpi_df.columns:
+            kpi_df['klasmankod'] = kpi_df['klasmankod'].astype(str).str.strip()
+            sevk_df['klasmankod'] = sevk_df['klasmankod'].astype(str).str.strip()
+            original_sevkiyat_df['klasmankod'] = original_sevkiyat_df['klasmankod'].astype(str).str.strip()
+            
+            kpi_cols = ['klasmankod']
+            for col in ['hedef_hafta', 'min_adet', 'maks_adet']:
+                if col in kpi_df.columns:
+                    kpi_cols.append(col)
+            
+            sevk_df = sevk_df.merge(kpi_df[kpi_cols], on='klasmankod', how='left')
+            original_sevkiyat_df = original_sevkiyat_df.merge(kpi_df[kpi_cols], on='klasmankod', how='left')
+            progress("✅ KPI verileri eklendi (KPI.csv kullanılıyor)", 'success')
+            kpi_loaded = True
+        else:
+            progress("⚠️ KPI dosyasında klasmankod bulunamadı", 'warning')
+    else:
+        progress("⚠️ KPI dosyası bulunamadı, parametrelerden alınan değerler kullanılacak", 'warning')
+    
+    # Eksik KPI değerlerini doldur
+    parametre_kolonlari = [
+        col for col in ['min_adet', 'maks_adet']
+        if not kpi_loaded or col not in sevk_df.columns
+    ]
+    if not kpi_loaded:
+        sevk_df['hedef_hafta'] = params['hedef_hafta']
+        sevk_df['min_adet'] = params['min_adet']
+        sevk_df['maks_adet'] = params['maks_adet']
+        
+        original_sevkiyat_df['hedef_hafta'] = params['hedef_hafta']
+        original_sevkiyat_df['min_adet'] = params['min_adet']
+        original_sevkiyat_df['maks_adet'] = params['maks_adet']
+        progress("ℹ️ Parametrelerden alınan değerler kullanılıyor")
+    else:
+        sevk_df['hedef_hafta'] = sevk_df.get('hedef_hafta', params['hedef_hafta'])
+        sevk_df['min_adet'] = sevk_df.get('min_adet', params['min_adet'])
+        sevk_df['maks_adet'] = sevk_df.get('maks_adet', params['maks_adet'])
+        
+        original_sevkiyat_df['hedef_hafta'] = original_sevkiyat_df.get('hedef_hafta', params['hedef_hafta'])
+        original_sevkiyat_df['min_adet'] = original_sevkiyat_df.get('min_adet', params['min_adet'])
+        original_sevkiyat_df['maks_adet'] = original_sevkiyat_df.get('maks_adet', params['maks_adet'])
+    
+    # YENİ: Ürün cover'ını HATA KONTROLLÜ hesapla - YOLDA STOĞU ÇIKARMA
+    progress("🔄 Ürün cover değerleri hesaplanıyor...")
+    
+    # Kolon bazında tek seferde hesapla - iki df aynı satır sırasında olduğu için paylaşılır
+    urun_cover = compute_urun_cover(sevk_df['haftalik_satis'], sevk_df['mevcut_stok'])
+    sevk_df['urun_cover'] = urun_cover
+    if len(original_sevkiyat_df) == len(sevk_df):
+        original_sevkiyat_df['urun_cover'] = urun_cover
+    else:
+        original_sevkiyat_df['urun_cover'] = compute_urun_cover(
+            original_sevkiyat_df['haftalik_satis'], original_sevkiyat_df['mevcut_stok']
+        )
+    
+    # Cover gruplarını kolon bazında belirle (kategorik)
+    sevk_df['magaza_cover_grubu'] = assign_cover_groups(sevk_df['cover'], cover_gruplari)
+    sevk_df['urun_cover_grubu'] = assign_cover_groups(sevk_df['urun_cover'], cover_gruplari)
+    
+    # Cover 30'dan küçük olanları filtrele
+    df_filtered = sevk_df[sevk_df['cover'] <= 50].copy()
+    progress(f"ℹ️ Mağaza cover ≤ 50 olan {len(df_filtered)} satır işlenecek (toplam: {len(sevk_df)})")
+    
+    # İhtiyaç hesabı - YOLDA STOĞU EKLE (doğru olan bu)
+    df_filtered["ihtiyac"] = (
+        (df_filtered["haftalik_satis"] * df_filtered["hedef_hafta"]) - 
+        (df_filtered["mevcut_stok"] + df_filtered["yolda"])
+    ).clip(lower=0)
+    
+    # Orijinal df'e ihtiyaç ekle - YOLDA STOĞU EKLE (doğru olan bu)
+    original_sevkiyat_df["ihtiyac"] = (
+        (original_sevkiyat_df["haftalik_satis"] * original_sevkiyat_df['hedef_hafta']) - 
+        (original_sevkiyat_df["mevcut_stok"] + original_sevkiyat_df['yolda'])
+    ).clip(lower=0)
+    
+    # Cover gruplarını PARAMETRELERDEN AL
+    cover_gruplari_etiketler = get_cover_group_labels(cover_gruplari)
+    
+    progress(f"ℹ️ Kullanılan cover grupları: {cover_gruplari_etiketler}")
+    progress(f"ℹ️ Toplam {len(cover_gruplari_etiketler) ** 2} kombinasyon işlenecek")
+    
+    # Her kombinasyon için veri sayısı - TÜM GRUPLAR
+    pivot_dagilim = pd.crosstab(
+        df_filtered['magaza_cover_grubu'], df_filtered['urun_cover_grubu']
+    ).reindex(index=cover_gruplari_etiketler, columns=cover_gruplari_etiketler, fill_value=0)
+    pivot_dagilim.index.name = 'Mağaza Grubu'
+    pivot_dagilim.columns.name = 'Ürün Grubu'
+    
+    # YENİ: Vektörel dağıtım - tek sıralama + gruplu kümülatif toplam
+    progress("⏳ Satırlar öncelik sırasına göre sıralanıyor...")
+    hazir_df, cover_gruplari_etiketler = prepare_allocation_frame(df_filtered, cover_gruplari)
+    
+    return {
+        'hazir_df': hazir_df,
+        'etiketler': cover_gruplari_etiketler,
+        'depo_stok_df': depo_stok_df,
+        'original_sevkiyat_df': original_sevkiyat_df,
+        'urunler_df': urunler_df,
+        'magazalar_df': magazalar_df,
+        'pivot_dagilim': pivot_dagilim,
+        'parametre_kolonlari': parametre_kolonlari
+    }
+
+
+def allocate_prepared(hazirlik, params, carpan_matrisi, progress=None, max_workers=None):
+    """
+    Ön işlenmiş veri üzerinde sadece dağıtım (matris / min-maks adet değişiminde
+    yeniden çalışan kısım). hazirlik değiştirilmez - önbellekte paylaşılabilir.
+
+    Returns:
+        dict: sevk_df_result, total_sevk, depo_stok_df, depo_stok_ledger,
+            original_sevkiyat_df, urunler_df, magazalar_df, pivot_dagilim,
+            grup_dagilim, depo_sureleri, toplam_sevk, min_tamamlama, min_yuzde
+    """
+    progress = progress or no_progress
+
+    hazir_df = hazirlik['hazir_df']
+    original_sevkiyat_df = hazirlik['original_sevkiyat_df']
+    cover_gruplari_etiketler = hazirlik['etiketler']
+
+    # Parametreden gelen min/maks adet güncel değerle (assign - önbellekteki çerçeve değişmez)
+    guncel = {col: params[col] for col in hazirlik['parametre_kolonlari']}
+    if guncel:
+        hazir_df = hazir_df.assign(**guncel)
+        original_sevkiyat_df = original_sevkiyat_df.assign(**guncel)
+
+    # Depo stok defteri: (depo, ürün) bazında bir kez toplanır, dağıtım burada düşer
+    depo_stok_ledger = DepotStockLedger(hazirlik['depo_stok_df'])
+    
+    progress(f"⏳ {hazir_df['_grup_no'].nunique():,} depo-ürün grubu için dağıtım yapılıyor...", oran=0.3)
+    sevk_tamponu, depo_sureleri = allocate_shipments_parallel(
+        hazir_df,
+        depo_stok_ledger,
+        cover_gruplari_etiketler,
+        carpan_matrisi,
+        max_workers=max_workers
+    )
+    
+    depo_stok_df = depo_stok_ledger.to_frame()
+    
+    progress("✅ Hesaplama tamamlandı", oran=1.0)
+    
+    # Sonuçları birleştir - kolonlar tampondaki satır indeksiyle hazir_df'ten eklenir
+    sevk_df_result = shipment_frame(hazir_df, sevk_tamponu)
+    if not sevk_df_result.empty:
+        # Grup bazında toplam sevkiyat
+        total_sevk = summarize_shipments(hazir_df, sevk_tamponu)
+        
+        # Min tamamlama (tur2) istatistiklerini hesapla
+        min_tamamlama = sevk_tamponu.total(tur=2)
+        toplam_sevk = sevk_tamponu.total()
+        min_yuzde = (min_tamamlama / toplam_sevk * 100) if toplam_sevk > 0 else 0
+        
+        # Sonuç grup dağılımı - TÜM GRUPLAR
+        grup_dagilim = sevk_df_result.groupby(['magaza_cover_grubu', 'urun_cover_grubu'], observed=True).agg({
+            'sevk_miktar': 'sum',
+            'magaza_id': 'nunique'
+        }).reset_index()
+    else:
+        sevk_df_result = pd.DataFrame()
+        total_sevk = pd.DataFrame()
+        grup_dagilim = pd.DataFrame()
+        min_tamamlama, toplam_sevk, min_yuzde = 0, 0, 0
+    
+    return {
+        'sevk_df_result': sevk_df_result,
+        'total_sevk': total_sevk,
+        'depo_stok_df': depo_stok_df,
+        'depo_stok_ledger': depo_stok_ledger,
+        'original_sevkiyat_df': original_sevkiyat_df,
+        'urunler_df': hazirlik['urunler_df'],
+        'magazalar_df': hazirlik['magazalar_df'],
+        'pivot_dagilim': hazirlik['pivot_dagilim'],
+        'grup_dagilim': grup_dagilim,
+        'depo_sureleri': depo_sureleri,
+        'toplam_sevk': toplam_sevk,
+        'min_tamamlama': min_tamamlama,
+        'min_yuzde': min_yuzde
+    }
+
+
+def run_shipment_calculation(file_data, params, cover_gruplari, carpan_matrisi,
+                             progress=None, max_workers=None, cache=None, file_hashes=None):
+    """
+    Sevkiyat ML hesaplamasının tamamı (Streamlit'siz): ön işleme + dağıtım
+
+    cache (PreprocessingCache) verilirse ön işleme sonucu dosya içeriği, cover
+    grupları ve hedef_hafta ile anahtarlanır; sadece matris veya min/maks adet
+    değişen tekrar çalıştırmalar doğrudan dağıtıma geçer. file_hashes
+    ({dosya_adı: sha256}) yüklenen dosya byte'larından gelir; yoksa
+    DataFrame içeriğinden hesaplanır.
+
+    Returns:
+        dict: allocate_prepared çıktısı + onbellek_isabet
+    """
+    progress = progress or no_progress
+
+    anahtar = None
+    hazirlik = None
+    if cache is not None:
+        anahtar = preprocessing_key(file_data, cover_gruplari, params, file_hashes)
+        hazirlik = cache.get(anahtar)
+        if hazirlik is not None:
+            progress("♻️ Ön işleme önbellekten alındı, sadece dağıtım yapılıyor", 'success')
+
+    onbellek_isabet = hazirlik is not None
+    if hazirlik is None:
+        hazirlik = prepare_shipment_inputs(file_data, params, cover_gruplari, progress=progress)
+        if cache is not None:
+            cache.put(anahtar, hazirlik)
+
+    sonuc = allocate_prepared(hazirlik, params, carpan_matrisi, progress=progress, max_workers=max_workers)
+    sonuc['onbellek_isabet'] = onbellek_isabet
+    return sonuc
+
+
+# -------------------------------
+# SENARYO KARŞILAŞTIRMA
+# -------------------------------
+
+# Karşılaştırma tablosu kolonları
+SENARYO_KOLONLARI = [
+    'senaryo', 'hedef_hafta', 'min_adet', 'maks_adet',
+    'toplam_sevk', 'tur2_sevk', 'tur2_payi', 'toplam_ihtiyac',
+    'karsilanan_ihtiyac', 'doluluk_orani', 'kalan_depo_stok', 'sevk_satiri', 'sure_sn'
+]
+
+
+def _senaryo_dagit(diziler, grup_stok):
+    """Tek senaryo dağıtımı - süreç havuzunda da çalışır (modül seviyesinde)"""
+    baslangic = time.perf_counter()
+    satir, tur, sevk, dagitilan = _dagitim_cekirdegi(diziler, grup_stok)
+    return satir, tur, sevk, dagitilan, time.perf_counter() - baslangic
+
+
+def run_scenario_sweep(file_data, senaryolar, cover_gruplari, progress=None,
+                       cache=None, file_hashes=None, max_workers=None):
+    """
+    Birden çok parametre setini tek ön işleme ile karşılaştır
+
+    Args:
+        senaryolar: [{'ad', 'carpan_matrisi', 'hedef_hafta', 'min_adet', 'maks_adet'}]
+        cache: PreprocessingCache - aynı hedef_hafta'lı senaryolar ön işlemeyi paylaşır
+        max_workers: >1 ise senaryolar süreç havuzunda paralel dağıtılır
+
+    Returns:
+        DataFrame: Senaryo başına toplam sevk, Tur 2 payı, ihtiyaç doluluk oranı
+            (satır bazında min(sevk, ihtiyaç) / ihtiyaç) ve kalan depo stoğu
+    """
+    progress = progress or no_progress
+    cache = cache if cache is not None else PreprocessingCache(max_kayit=len(senaryolar) or 1)
+
+    # Aynı ön işlemeyi kullanan senaryolar için diziler ve grup stokları bir kez
+    hazirliklar = {}
+    gorevler = []
+    for i, senaryo in enumerate(senaryolar):
+        params = {k: senaryo[k] for k in ('hedef_hafta', 'min_adet', 'maks_adet')}
+        anahtar = preprocessing_key(file_data, cover_gruplari, params, file_hashes)
+
+        if anahtar not in hazirliklar:
+            hazirlik = cache.get(anahtar)
+            if hazirlik is None:
+                progress(f"🔄 Ön işleme (hedef hafta={params['hedef_hafta']})...")
+                hazirlik = prepare_shipment_inputs(file_data, params, cover_gruplari)
+                cache.put(anahtar, hazirlik)
+
+            hazir_df = hazirlik['hazir_df']
+            ledger = DepotStockLedger(hazirlik['depo_stok_df'])
+            grup_pozisyon, grup_stok = _grup_stoklari(hazir_df, ledger) if not hazir_df.empty \
+                else (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+            hazirliklar[anahtar] = {
+                'hazirlik': hazirlik,
+                'diziler': _dagitim_dizileri(hazir_df, np.ones((len(hazirlik['etiketler']),) * 2)),
+                'ledger': ledger,
+                'grup_pozisyon': grup_pozisyon,
+                'grup_stok': grup_stok
+            }
+
+        ortak = hazirliklar[anahtar]
+        diziler = dict(ortak['diziler'])
+        diziler['carpan'] = build_carpan_array(
+            ortak['hazirlik']['etiketler'], senaryo.get('carpan_matrisi')
+        )[diziler['magaza_oncelik'], diziler['urun_oncelik']]
+        for col in ortak['hazirlik']['parametre_kolonlari']:
+            diziler[col] = np.full(len(diziler['grup_no']), float(params[col]))
+        gorevler.append((senaryo.get('ad', f"Senaryo {i + 1}"), params, anahtar, diziler))
+
+    # Dağıtımlar: tek süreçte sırayla veya süreç havuzunda paralel
+    if max_workers and max_workers > 1 and len(gorevler) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as havuz:
+            futures = [havuz.submit(_senaryo_dagit, d, hazirliklar[a]['grup_stok']) for _, _, a, d in gorevler]
+            sonuclar = [f.result() for f in futures]
+    else:
+        sonuclar = []
+        for j, (ad, _, anahtar, diziler) in enumerate(gorevler):
+            progress(f"⏳ {ad} dağıtılıyor...", oran=j / len(gorevler))
+            sonuclar.append(_senaryo_dagit(diziler, hazirliklar[anahtar]['grup_stok']))
+    progress("✅ Senaryolar tamamlandı", oran=1.0)
+
+    satirlar = []
+    for (ad, params, anahtar, diziler), (satir, tur, sevk, dagitilan, sure) in zip(gorevler, sonuclar):
+        ortak = hazirliklar[anahtar]
+        ihtiyac = diziler['ihtiyac']
+        satir_sevk = np.bincount(satir, weights=sevk, minlength=len(ihtiyac))
+
+        # Kalan depo stoğu: allocate_shipments ile aynı defter güncellemesi
+        ledger = ortak['ledger'].copy()
+        islenen = ortak['grup_stok'] > 0
+        ledger.set_stock(ortak['grup_pozisyon'][islenen], (ortak['grup_stok'] - dagitilan)[islenen])
+
+        toplam_sevk = int(sevk.sum())
+        tur2_sevk = int(sevk[tur == 2].sum())
+        toplam_ihtiyac = float(ihtiyac.sum())
+        karsilanan = float(np.minimum(satir_sevk, ihtiyac).sum())
+        satirlar.append({
+            'senaryo': ad,
+            **params,
+            'toplam_sevk': toplam_sevk,
+            'tur2_sevk': tur2_sevk,
+            'tur2_payi': round(tur2_sevk / toplam_sevk * 100, 2) if toplam_sevk else 0.0,
+            'toplam_ihtiyac': round(toplam_ihtiyac, 1),
+            'karsilanan_ihtiyac': round(karsilanan, 1),
+            'doluluk_orani': round(karsilanan / toplam_ihtiyac * 100, 2) if toplam_ihtiyac else 0.0,
+            'kalan_depo_stok': float(ledger.total()),
+            'sevk_satiri': int(len(np.unique(satir))),
+            'sure_sn': round(sure, 4)
+        })
+
+    return pd.DataFrame(satirlar, columns=SENARYO_KOLONLARI)
+
+
+# -------------------------------
+# ÖN İŞLEME ÖNBELLEĞİ
+# -------------------------------
+
+def hash_bytes(veri):
+    """Dosya içeriği özeti (sha256)"""
+    return hashlib.sha256(veri).hexdigest()
+
+
+def hash_frame(df):
+    """Byte'ı olmayan DataFrame için içerik özeti (kolonlar + satır hash'leri)"""
+    ozet = hashlib.sha256('|'.join(map(str, df.columns)).encode())
+    ozet.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return ozet.hexdigest()
+
+
+def preprocessing_key(file_data, cover_gruplari, params, file_hashes=None):
+    """
+    Ön işleme önbellek anahtarı: dosya içerikleri + cover grupları + hedef_hafta
+    (çarpan matrisi ve min/maks adet anahtara girmez - sadece dağıtımı etkiler)
+    """
+    file_hashes = file_hashes or {}
+    ozet = hashlib.sha256()
+    for ad in sorted(file_data):
+        ozet.update(ad.encode())
+        ozet.update((file_hashes.get(ad) or hash_frame(file_data[ad])).encode())
+    ozet.update(json.dumps(
+        [{'min': g['min'], 'max': g['max'], 'etiket': g['etiket']} for g in cover_gruplari],
+        sort_keys=True, default=str
+    ).encode())
+    ozet.update(str(params.get('hedef_hafta')).encode())
+    return ozet.hexdigest()
+
+
+class PreprocessingCache:
+    """
+    Ön işleme sonuçları için küçük LRU önbellek (anahtar → prepare_shipment_inputs çıktısı)
+    Büyük çerçeveler tuttuğu için varsayılan 2 kayıt saklar.
+    """
+
+    def __init__(self, max_kayit=2):
+        self.max_kayit = max_kayit
+        self._kayitlar = OrderedDict()
+        self.isabet = 0
+        self.iska = 0
+
+    def get(self, anahtar):
+        hazirlik = self._kayitlar.get(anahtar)
+        if hazirlik is None:
+            self.iska += 1
+            return None
+        self._kayitlar.move_to_end(anahtar)
+        self.isabet += 1
+        return hazirlik
+
+    def put(self, anahtar, hazirlik):
+        self._kayitlar[anahtar] = hazirlik
+        self._kayitlar.move_to_end(anahtar)
+        while len(self._kayitlar) > self.max_kayit:
+            self._kayitlar.popitem(last=False)
+
+    def clear(self):
+        self._kayitlar.clear()
+
+    def __len__(self):
+        return len(self._kayitlar)
+
+    def __contains__(self, anahtar):
+        return anahtar in self._kayitlar
+
+
+# -------------------------------
+# ALIM SİPARİŞ İHTİYACI
+# -------------------------------
+
+def compute_purchase_need(sevk_df, original_sevkiyat_df, depo_stok_df, urunler_df=None, progress=None):
+    """
+    Karşılanamayan ihtiyaçları hesapla - BASİT VERSİYON
+    depo_stok_df: Depo stok DataFrame'i veya dağıtım sonrası DepotStockLedger
+    urunler_df: Opsiyonel ürün listesi (urun_adi için)
+    """
+    progress = progress or no_progress
+
+    if original_sevkiyat_df.empty:
+        return pd.DataFrame()
+    
+    # Orijinal sevkiyat verisini kopyala
+    sevkiyat_df = original_sevkiyat_df.copy()
+    
+    # Sevkiyat miktarını birleştir
+    if not sevk_df.empty and 'sevk_miktar' in sevk_df.columns:
+        sevk_toplam = sevk_df.groupby(['depo_id', 'magaza_id', 'urun_id'])['sevk_miktar'].sum().reset_index()
+        sevkiyat_df = pd.merge(
+            sevkiyat_df,
+            sevk_toplam,
+            on=['depo_id', 'magaza_id', 'urun_id'],
+            how='left'
+        )
+        sevkiyat_df['sevk_miktar'] = sevkiyat_df['sevk_miktar'].fillna(0)
+    else:
+        sevkiyat_df['sevk_miktar'] = 0
+    
+    # İhtiyaç hesapla (eğer yoksa)
+    if 'ihtiyac' not in sevkiyat_df.columns:
+        sevkiyat_df['ihtiyac'] = (
+            (sevkiyat_df['haftalik_satis'] * sevkiyat_df.get('hedef_hafta', 4)) - 
+            (sevkiyat_df['mevcut_stok'] + sevkiyat_df.get('yolda', 0))
+        ).clip(lower=0)
+    
+    # Kalan ihtiyaç = ihtiyaç - sevk_miktar
+    sevkiyat_df["kalan_ihtiyac"] = (sevkiyat_df["ihtiyac"] - sevkiyat_df["sevk_miktar"]).clip(lower=0)
+    
+    # Depo stok bilgilerini ekle - defterden tek hash lookup
+    if isinstance(depo_stok_df, DepotStockLedger):
+        depo_stok_ledger = depo_stok_df
+    else:
+        depo_stok_ledger = DepotStockLedger(depo_stok_df)
+    sevkiyat_df['depo_stok'] = depo_stok_ledger.lookup(sevkiyat_df['depo_id'], sevkiyat_df['urun_id'])
+
+    # Karşılanamayan ve depoda stok olmayanları filtrele
+    alim_siparis_df = sevkiyat_df[
+        (sevkiyat_df["kalan_ihtiyac"] > 0) & (sevkiyat_df["depo_stok"] <= 0)
+    ].copy()
+
+    if alim_siparis_df.empty:
+        progress("ℹ️ Alım ihtiyacı bulunmamaktadır.")
+        return pd.DataFrame()
+
+    # BASİT HESAP: Alım miktarı = kalan ihtiyaç
+    alim_siparis_df['alim_siparis_miktari'] = alim_siparis_df['kalan_ihtiyac']
+
+    # Ürün bazında toplam alım siparişi
+    alim_siparis_toplam = alim_siparis_df.groupby(
+        ["depo_id", "urun_id", "klasmankod"], as_index=False
+    ).agg({
+        'alim_siparis_miktari': 'sum',
+        'kalan_ihtiyac': 'sum',
+        'ihtiyac': 'first',
+        'depo_stok': 'first',
+        'haftalik_satis': 'first'
+    })
+
+    # Ürün adını ekle
+    if urunler_df is not None and not urunler_df.empty:
+        urunler_df = urunler_df.copy()
+        urunler_df['urun_id'] = urunler_df['urun_id'].astype(str).str.strip()
+        alim_siparis_toplam['urun_id'] = alim_siparis_toplam['urun_id'].astype(str).str.strip()
+        if 'urun_adi' in urunler_df.columns:
+            alim_siparis_toplam = pd.merge(
+                alim_siparis_toplam,
+                urunler_df[['urun_id', 'urun_adi']],
+                on='urun_id',
+                how='left'
+            )
+    
+    if 'urun_adi' not in alim_siparis_toplam.columns:
+        alim_siparis_toplam['urun_adi'] = "Ürün " + alim_siparis_toplam['urun_id'].astype(str)
+    
+    # Cover bilgilerini ekle
+    alim_siparis_toplam['toplam_ihtiyac_cover'] = (
+        alim_siparis_toplam['alim_siparis_miktari'] / alim_siparis_toplam['haftalik_satis']
+    ).round(1)
+    
+    # Sıralama
+    alim_siparis_toplam = alim_siparis_toplam.sort_values('alim_siparis_miktari', ascending=False)
+    
+    return alim_siparis_toplam
@@ -0,0 +1,251 @@
+"""
+🧪 Sentetik Perakende Verisi
+Thorius AR4U Platform
+Dokümante şemalara uygun, tohumlu (tekrarlanabilir) test/benchmark verisi
+
+- PO asistanı (📋): urun_master, magaza_master, depo_stok, anlik_stok_satis, kpi
+- Sevkiyat ML Modül (🚢): Sevkiyat.csv, Depo_Stok.csv, Cover.csv, KPI.csv
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Her mağazanın taşıdığı ürün oranı (çeşit yoğunluğu) - büyük ölçeklerde
+# tüm mağaza × ürün kombinasyonu gerçekçi değil ve belleğe sığmaz
+VARSAYILAN_YOGUNLUK = 0.25
+
+# Bir seferde üretilen mağaza sayısı (rastgele maske belleğini sınırlar)
+_MAGAZA_PARCASI = 100
+
+
+# -------------------------------
+# ORTAK İSKELET
+# -------------------------------
+
+def _magaza_urun_ciftleri(rng, magaza_sayisi, urun_sayisi, yogunluk):
+    """Her mağaza için yoğunluk oranında ürün seç - (mağaza_idx, ürün_idx)"""
+    if yogunluk >= 1:
+        return (
+            np.repeat(np.arange(magaza_sayisi), urun_sayisi),
+            np.tile(np.arange(urun_sayisi), magaza_sayisi)
+        )
+
+    magaza_parcalari, urun_parcalari = [], []
+    for bas in range(0, magaza_sayisi, _MAGAZA_PARCASI):
+        son = min(bas + _MAGAZA_PARCASI, magaza_sayisi)
+        maske = rng.random((son - bas, urun_sayisi)) < yogunluk
+        m_idx, u_idx = np.nonzero(maske)
+        magaza_parcalari.append(m_idx + bas)
+        urun_parcalari.append(u_idx)
+    return np.concatenate(magaza_parcalari), np.concatenate(urun_parcalari)
+
+
+def _iskelet(magaza_sayisi, urun_sayisi, depo_sayisi, yogunluk, seed):
+    """Şemalardan bağımsız ortak rastgele yapı (ürün talebi, fiyat, mağaza-depo)"""
+    rng = np.random.default_rng(seed)
+
+    # Ürün talep seviyesi log-normal: az sayıda çok satan, uzun kuyruk
+    urun_talep = rng.lognormal(mean=0.0, sigma=1.0, size=urun_sayisi)
+    urun_fiyat = np.round(rng.uniform(5, 500, size=urun_sayisi), 2)
+    urun_mg = rng.integers(0, 20, size=urun_sayisi)
+    urun_klasman = rng.integers(0, 50, size=urun_sayisi)
+
+    magaza_buyukluk = rng.uniform(0.3, 2.0, size=magaza_sayisi)
+    magaza_depo = rng.integers(1, depo_sayisi + 1, size=magaza_sayisi)
+
+    m_idx, u_idx = _magaza_urun_ciftleri(rng, magaza_sayisi, urun_sayisi, yogunluk)
+
+    # Haftalık satış ~ Poisson(talep × mağaza büyüklüğü); stok satışın 0-8 haftası
+    lam = urun_talep[u_idx] * magaza_buyukluk[m_idx]
+    satis = rng.poisson(lam).astype(np.int32)
+    stok = rng.poisson(lam * rng.uniform(0, 8, size=len(lam))).astype(np.int32)
+    yol = (rng.random(len(lam)) < 0.15) * rng.poisson(lam + 1)
+
+    return {
+        'rng': rng,
+        'urun_sayisi': urun_sayisi,
+        'magaza_sayisi': magaza_sayisi,
+        'depo_sayisi': depo_sayisi,
+        'urun_talep': urun_talep,
+        'urun_fiyat': urun_fiyat,
+        'urun_mg': urun_mg,
+        'urun_klasman': urun_klasman,
+        'magaza_depo': magaza_depo,
+        'm_idx': m_idx,
+        'u_idx': u_idx,
+        'satis': satis,
+        'stok': stok,
+        'yol': yol.astype(np.int32)
+    }
+
+
+def _kodlar(onek, adet):
+    return pd.Index([f"{onek}{i:06d}" for i in range(adet)])
+
+
+def _depo_stok_miktari(isk):
+    """Depo × ürün stoğu: toplam mağaza satışının 0-3 haftası, %10 ürün depoda yok"""
+    rng = isk['rng']
+    depo_sayisi, urun_sayisi = isk['depo_sayisi'], isk['urun_sayisi']
+
+    haftalik = np.bincount(isk['u_idx'], weights=isk['satis'], minlength=urun_sayisi)
+    haftalik_depo = np.tile(haftalik / depo_sayisi, depo_sayisi)
+    stok = rng.poisson(haftalik_depo * rng.uniform(0, 3, size=len(haftalik_depo)))
+    stok[rng.random(len(stok)) < 0.10] = 0
+    return stok.astype(np.int32)
+
+
+# -------------------------------
+# 📋 PO ASİSTANI ŞEMALARI
+# -------------------------------
+
+def generate_po_dataset(magaza_sayisi, urun_sayisi, depo_sayisi=5,
+                        yogunluk=VARSAYILAN_YOGUNLUK, seed=42):
+    """
+    PO asistanının veri yükleme şemalarına (po_engine.VERI_TANIMLARI) uygun veri
+
+    Returns:
+        dict: {'urun_master', 'magaza_master', 'depo_stok', 'anlik_stok_satis', 'kpi'}
+    """
+    isk = _iskelet(magaza_sayisi, urun_sayisi, depo_sayisi, yogunluk, seed)
+    rng = isk['rng']
+
+    urun_kod = _kodlar('U', urun_sayisi)
+    magaza_kod = _kodlar('M', magaza_sayisi)
+    mg = pd.Index([f"MG{i}" for i in range(20)])
+
+    urun_master = pd.DataFrame({
+        'urun_kod': urun_kod,
+        'satici_kod': rng.integers(0, 200, size=urun_sayisi).astype(str),
+        'kategori_kod': (isk['urun_mg'] // 4).astype(str),
+        'umg': (isk['urun_mg'] // 2).astype(str),
+        'mg': mg[isk['urun_mg']],
+        'marka_kod': rng.integers(0, 500, size=urun_sayisi).astype(str),
+        'klasman_kod': isk['urun_klasman'].astype(str),
+        'nitelik': '',
+        'durum': 'Aktif',
+        'ithal': rng.integers(0, 2, size=urun_sayisi),
+        'olcu_birimi': 'Adet',
+        'koli_ici': rng.choice([6, 12, 24], size=urun_sayisi),
+        'paket_ici': rng.choice([1, 3, 6], size=urun_sayisi)
+    })
+
+    magaza_master = pd.DataFrame({
+        'magaza_kod': magaza_kod,
+        'il': rng.integers(1, 82, size=magaza_sayisi).astype(str),
+        'bolge': rng.integers(1, 8, size=magaza_sayisi).astype(str),
+        'tip': rng.choice(['Hipermarket', 'Süpermarket', 'Market'], size=magaza_sayisi),
+        'adres_kod': magaza_kod,
+        'sm': rng.integers(200, 6000, size=magaza_sayisi),
+        'bs': rng.integers(1, 20, size=magaza_sayisi).astype(str),
+        'depo_kod': isk['magaza_depo']
+    })
+
+    depo_stok = pd.DataFrame({
+        'depo_kod': np.repeat(np.arange(1, depo_sayisi + 1), urun_sayisi),
+        'urun_kod': np.tile(urun_kod.to_numpy(), depo_sayisi),
+        'stok': _depo_stok_miktari(isk)
+    })
+
+    fiyat = isk['urun_fiyat'][isk['u_idx']]
+    anlik_stok_satis = pd.DataFrame({
+        'magaza_kod': magaza_kod.to_numpy()[isk['m_idx']],
+        'urun_kod': urun_kod.to_numpy()[isk['u_idx']],
+        'stok': isk['stok'],
+        'yol': isk['yol'],
+        'satis': isk['satis'],
+        'ciro': np.round(isk['satis'] * fiyat, 2),
+        'smm': np.round(fiyat * 0.65, 2)
+    })
+
+    kpi = pd.DataFrame({
+        'mg_id': mg,
+        'min_deger': rng.integers(0, 6, size=len(mg)),
+        'max_deger': rng.integers(20, 100, size=len(mg)),
+        'forward_cover': np.round(rng.uniform(1.5, 6, size=len(mg)), 1)
+    })
+
+    return {
+        'urun_master': urun_master,
+        'magaza_master': magaza_master,
+        'depo_stok': depo_stok,
+        'anlik_stok_satis': anlik_stok_satis,
+        'kpi': kpi
+    }
+
+
+# -------------------------------
+# 🚢 SEVKİYAT ML ŞEMALARI
+# -------------------------------
+
+def generate_ml_dataset(magaza_sayisi, urun_sayisi, depo_sayisi=5,
+                        yogunluk=VARSAYILAN_YOGUNLUK, seed=42):
+    """
+    Sevkiyat ML Modül dosyaları (run_shipment_calculation file_data formatı)
+
+    Returns:
+        dict: {'Sevkiyat.csv', 'Depo_Stok.csv', 'Cover.csv', 'KPI.csv'}
+    """
+    isk = _iskelet(magaza_sayisi, urun_sayisi, depo_sayisi, yogunluk, seed)
+    rng = isk['rng']
+
+    urun_id = _kodlar('U', urun_sayisi).to_numpy()
+    magaza_id = _kodlar('M', magaza_sayisi).to_numpy()
+    klasman = pd.Index([f"K{i}" for i in range(50)])
+
+    sevkiyat = pd.DataFrame({
+        'depo_id': isk['magaza_depo'][isk['m_idx']],
+        'magaza_id': magaza_id[isk['m_idx']],
+        'urun_id': urun_id[isk['u_idx']],
+        'haftalik_satis': isk['satis'],
+        'mevcut_stok': isk['stok'],
+        'yolda': isk['yol'],
+        'klasmankod': klasman[isk['urun_klasman'][isk['u_idx']]]
+    })
+
+    depo_stok = pd.DataFrame({
+        'depo_id': np.repeat(np.arange(1, depo_sayisi + 1), urun_sayisi),
+        'urun_id': np.tile(urun_id, depo_sayisi),
+        'depo_stok': _depo_stok_miktari(isk)
+    })
+
+    # Mağaza cover'ı 0-40 hafta: cover ≤ 50 filtresinden geçer, tüm gruplara dağılır
+    cover = pd.DataFrame({
+        'magaza_id': magaza_id,
+        'cover': np.round(rng.uniform(0, 40, size=magaza_sayisi), 1)
+    })
+
+    kpi = pd.DataFrame({
+        'klasmankod': klasman,
+        'hedef_hafta': rng.integers(2, 7, size=len(klasman)),
+        'min_adet': rng.integers(1, 5, size=len(klasman)),
+        'maks_adet': rng.integers(10, 40, size=len(klasman))
+    })
+
+    return {
+        'Sevkiyat.csv': sevkiyat,
+        'Depo_Stok.csv': depo_stok,
+        'Cover.csv': cover,
+        'KPI.csv': kpi
+    }
+
+
+# -------------------------------
+# DOSYAYA YAZ
+# -------------------------------
+
+def write_dataset(veriler, klasor, sep=None):
+    """
+    Veri setini CSV olarak yaz (sevkiyat_batch.py ile okunabilir)
+    PO asistanı şemaları ';' + BOM'lu UTF-8, Sevkiyat ML dosyaları ',' + düz UTF-8
+    (read_csv_advanced BOM'u kolon adına katar) ile yazılır
+    """
+    os.makedirs(klasor, exist_ok=True)
+    for ad, df in veriler.items():
+        ml_dosyasi = ad.endswith('.csv')
+        dosya = ad if ml_dosyasi else f"{ad}.csv"
+        ayrac = sep or (',' if ml_dosyasi else ';')
+        encoding = 'utf-8' if ml_dosyasi else 'utf-8-sig'
+        df.to_csv(os.path.join(klasor, dosya), index=False, sep=ayrac, encoding=encoding)